@@ -72,10 +72,15 @@ class Collection(object):
         """length of items in collection."""
         count = 0
         links=set()
-        for item in self.graph.items(self.uri):
-            assert item not in links,"There is a loop in the RDF list! (%s has been processed before)"%item
-            links.add(item)
-            count += 1
+        graph = self.graph
+        container = self.uri
+        while container:
+            assert container not in links,"There is a loop in the RDF list! (%s has been processed before)"%container
+            links.add(container)
+            # count the item without fetching it
+            if graph.count((container, RDF.first, None)):
+                count += 1
+            container = graph.value(container, RDF.rest)
         return count
 
     def index(self, item):
@@ -0,0 +1,256 @@
+"""
+Streaming gzip and bzip2 support for parsing and serializing.
+
+Compressed input is recognised by its first bytes, as a file name may
+not say (an HTTP response with a .gz URL may already be decoded), and
+compressed output is chosen by the extension of the file written::
+
+    g.parse("dump.nt.gz", format="nt")
+    g.serialize("dump.nt.bz2", format="nt")
+
+Data is decompressed and compressed a chunk at a time, so no
+uncompressed copy of it is ever written to disk.
+"""
+import bz2
+import zlib
+
+
+GZIP_MAGIC = "\x1f\x8b"
+BZIP2_MAGIC = "BZh"
+# "BZh", the block size and the block header
+BZIP2_HEADER_SIZE = 10
+
+
+def gzip_decompressor():
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+def gzip_compressor():
+    return zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def compression(head):
+    """
+    Return "gzip" or "bzip2" if the bytes in head, taken from the start
+    of a stream, show it to be compressed that way, else None.
+    """
+    if not isinstance(head, str):
+        # streams of characters are never compressed
+        return None
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(BZIP2_MAGIC) and head[3:4] in "123456789" and \
+           head[4:10] == "1AY&SY":
+        return "bzip2"
+    return None
+
+
+def extension_compression(name):
+    """Return the compression a file name's extension asks for, if any."""
+    name = name.lower()
+    if name.endswith(".gz") or name.endswith(".gzip"):
+        return "gzip"
+    if name.endswith(".bz2"):
+        return "bzip2"
+    return None
+
+
+def decompressing_stream(stream):
+    """
+    Return stream, or a stream decompressing it as it is read if it
+    holds gzip or bzip2 data.
+
+    A seekable stream is returned as is when it is not compressed, so
+    that parsers can still use its name and seek on it.
+    """
+    if isinstance(stream, DecompressingStream):
+        return stream
+    try:
+        position = stream.tell()
+    except (AttributeError, IOError):
+        position = None
+    # pipes and sockets may return fewer bytes than asked for
+    head = stream.read(BZIP2_HEADER_SIZE)
+    while head and len(head) < BZIP2_HEADER_SIZE:
+        more = stream.read(BZIP2_HEADER_SIZE - len(head))
+        if not more:
+            break
+        head += more
+    kind = compression(head)
+    if kind is None:
+        if position is not None:
+            try:
+                stream.seek(position)
+                return stream
+            except (AttributeError, IOError):
+                pass
+        return DecompressingStream(stream, None, head)
+    if kind == "gzip":
+        return DecompressingStream(stream, gzip_decompressor, head)
+    return DecompressingStream(stream, bz2.BZ2Decompressor, head)
+
+
+def compressing_stream(stream, name):
+    """
+    Return a stream compressing what is written to it into stream, if
+    name's extension asks for compression, else stream itself.
+    """
+    kind = extension_compression(name)
+    if kind == "gzip":
+        return CompressingStream(stream, gzip_compressor())
+    if kind == "bzip2":
+        return CompressingStream(stream, bz2.BZ2Compressor())
+    return stream
+
+
+class DecompressingStream(object):
+    """
+    A read only file-like object decompressing another as it is read.
+
+    Concatenated compressed streams, as written by parallel gzip and
+    bzip2 tools, are read one after another. Given no decompressor
+    factory, the data is passed through unchanged, head being bytes
+    already read from stream, and other attributes such as name are
+    those of stream.
+    """
+
+    chunk_size = 1 << 16
+
+    def __init__(self, stream, decompressor, head=""):
+        self.stream = stream
+        self.new_decompressor = decompressor
+        self.decompressor = decompressor and decompressor()
+        self.pending = head
+        self.buffer = ""
+        self.position = 0 # of the next byte to read in buffer
+        # after the end of a compressed member, zeros padding the file
+        # are skipped
+        self.padding = False
+        self.closed = False
+
+    def fill(self):
+        """Add more data to the buffer, returning False at the end."""
+        if self.position:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        while True:
+            data = self.pending or self.stream.read(self.chunk_size)
+            self.pending = ""
+            if not data:
+                if self.decompressor is not None and \
+                       hasattr(self.decompressor, "flush"):
+                    self.buffer += self.decompressor.flush()
+                    self.decompressor = self.new_decompressor()
+                return False
+            if self.padding:
+                # gzip files may be padded with zeros, in any number of
+                # reads
+                data = data.lstrip("\0")
+                if not data:
+                    continue
+                self.padding = False
+            decompressor = self.decompressor
+            if decompressor is None:
+                self.buffer += data
+                return True
+            try:
+                data = decompressor.decompress(data)
+            except EOFError:
+                # a bzip2 stream ended with the previous chunk
+                self.decompressor = self.new_decompressor()
+                self.pending = data
+                continue
+            rest = decompressor.unused_data
+            if rest:
+                if hasattr(decompressor, "flush"):
+                    data += decompressor.flush()
+                self.decompressor = self.new_decompressor()
+                self.pending = rest
+                self.padding = True
+            if data:
+                self.buffer += data
+                return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            while self.fill():
+                pass
+            data, self.buffer = self.buffer, ""
+            return data
+        while len(self.buffer) - self.position < size and self.fill():
+            pass
+        start = self.position
+        data = self.buffer[start:start + size]
+        self.position = start + len(data)
+        return data
+
+    def readline(self, size=-1):
+        start = self.position
+        end = self.buffer.find("\n", start)
+        while end < 0:
+            searched = len(self.buffer) - self.position
+            more = self.fill() # moves the unread data to the start
+            start = 0
+            if not more:
+                break
+            end = self.buffer.find("\n", searched)
+        if end < 0:
+            end = len(self.buffer)
+        else:
+            end += 1
+        if size is not None and 0 <= size < end - start:
+            end = start + size
+        data = self.buffer[start:end]
+        self.position = end
+        return data
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.stream.close()
+
+    def __getattr__(self, name):
+        if self.__dict__.get("new_decompressor", True) is not None:
+            raise AttributeError(name)
+        return getattr(self.stream, name)
+
+
+class CompressingStream(object):
+    """
+    A write only file-like object compressing what is written to it
+    into another. Closing it finishes the compressed data and closes
+    the other stream.
+    """
+
+    def __init__(self, stream, compressor):
+        self.stream = stream
+        self.compressor = compressor
+        self.closed = False
+
+    def write(self, data):
+        if isinstance(data, unicode):
+            data = data.encode("utf-8")
+        data = self.compressor.compress(data)
+        if data:
+            self.stream.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.stream.write(self.compressor.flush())
+            self.stream.close()
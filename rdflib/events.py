@@ -72,6 +72,13 @@ class Dispatcher(object):
             lst.append(handler)
         self._dispatch_map[event_type] = lst
 
+    def subscribed(self, event_type):
+        """ Return True if any handler is subscribed to event_type, so
+        that sources can avoid creating events nobody will see.
+        """
+        return self._dispatch_map is not None and \
+            event_type in self._dispatch_map
+
     def dispatch(self, event):
         """ Dispatch the given event to the subscribed handlers for
         the event's type"""
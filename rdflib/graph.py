@@ -136,7 +136,9 @@ import logging
 _logger = logging.getLogger(__name__)
 
 #import md5
+import errno
 import random
+import sys
 import warnings
 
 try:
@@ -171,14 +173,20 @@ from rdflib.term import URIRef
 from rdflib.term import BNode
 from rdflib.term import Literal
 from rdflib.namespace import Namespace
-from rdflib.store import Store
+from rdflib.store import Store, TripleAddedEvent, distinct
 from rdflib.serializer import Serializer
 from rdflib.parser import Parser
 from rdflib.parser import create_input_source
+from rdflib.compression import compressing_stream
 from rdflib.namespace import NamespaceManager
 
 import tempfile, shutil, os
+import cPickle
+from time import time
+from urllib import quote
 from urlparse import urlparse
+from threading import Thread
+from Queue import Queue, Empty
 
 
 class Graph(Node):
@@ -334,9 +342,9 @@ class Graph(Node):
 
     def addN(self, quads):
         """Add a sequence of triple with context"""
-        self.__store.addN([(s, p, o, c) for s, p, o, c in quads
-                                        if isinstance(c, Graph)
-                                        and c.identifier is self.identifier])
+        self.__store.addN((s, p, o, c) for s, p, o, c in quads
+                                       if isinstance(c, Graph)
+                                       and c.identifier is self.identifier)
 
     def remove(self, (s, p, o)):
         """Remove a triple from the graph
@@ -352,8 +360,7 @@ class Graph(Node):
         Returns triples that match the given triple pattern. If triple pattern
         does not provide a context, all contexts will be searched.
         """
-        for (s, p, o), cg in self.__store.triples((s, p, o), context=self):
-            yield (s, p, o)
+        return self.__store.triples_without_contexts((s, p, o), context=self)
 
     def __len__(self):
         """Returns the number of triples in the graph
@@ -361,7 +368,11 @@ class Graph(Node):
         If context is specified then the number of triples in the context is
         returned instead.
         """
-        return self.__store.__len__(context=self)
+        return self.__store.count((None, None, None), context=self)
+
+    def count(self, (s, p, o)=(None, None, None)):
+        """Number of triples in the graph matching the given pattern"""
+        return self.__store.count((s, p, o), context=self)
 
     def __iter__(self):
         """Iterates over all triples in the store"""
@@ -440,20 +451,40 @@ class Graph(Node):
         self.remove((subject, predicate, None))
         self.add((subject, predicate, object))
 
-    def subjects(self, predicate=None, object=None):
-        """A generator of subjects with the given predicate and object"""
-        for s, p, o in self.triples((None, predicate, object)):
-            yield s
+    def subjects(self, predicate=None, object=None, unique=False):
+        """A generator of subjects with the given predicate and object
+
+        With unique=True each subject is generated once. Without a
+        predicate and object they then come from the store's
+        uniqueSubjects, which need not look at every triple.
+        """
+        if unique:
+            if predicate is None and object is None:
+                return self.__store.uniqueSubjects(context=self)
+            return distinct(self.subjects(predicate, object))
+        return (s for s, p, o in self.triples((None, predicate, object)))
+
+    def predicates(self, subject=None, object=None, unique=False):
+        """A generator of predicates with the given subject and object
 
-    def predicates(self, subject=None, object=None):
-        """A generator of predicates with the given subject and object"""
-        for s, p, o in self.triples((subject, None, object)):
-            yield p
+        With unique=True each predicate is generated once.
+        """
+        if unique:
+            if subject is None and object is None:
+                return self.__store.uniquePredicates(context=self)
+            return distinct(self.predicates(subject, object))
+        return (p for s, p, o in self.triples((subject, None, object)))
+
+    def objects(self, subject=None, predicate=None, unique=False):
+        """A generator of objects with the given subject and predicate
 
-    def objects(self, subject=None, predicate=None):
-        """A generator of objects with the given subject and predicate"""
-        for s, p, o in self.triples((subject, predicate, None)):
-            yield o
+        With unique=True each object is generated once.
+        """
+        if unique:
+            if subject is None and predicate is None:
+                return self.__store.uniqueObjects(context=self)
+            return distinct(self.objects(subject, predicate))
+        return (o for s, p, o in self.triples((subject, predicate, None)))
 
     def subject_predicates(self, object=None):
         """A generator of (subject, predicate) tuples for the given object"""
@@ -667,7 +698,8 @@ class Graph(Node):
         """Serialize the Graph to destination
 
         If destination is None serialize method returns the serialization as a
-        string. Format defaults to xml (AKA rdf/xml).
+        string. Format defaults to xml (AKA rdf/xml). A destination file name
+        ending in .gz or .bz2 is written compressed.
         """
         serializer = plugin.get(format, Serializer)(self)
         if destination is None:
@@ -685,7 +717,7 @@ class Graph(Node):
                       "is not a local file reference")
                 return
             name = tempfile.mktemp()
-            stream = open(name, 'wb')
+            stream = compressing_stream(open(name, 'wb'), path)
             serializer.serialize(stream, base=base, encoding=encoding, **args)
             stream.close()
             if hasattr(shutil,"move"):
@@ -843,8 +875,8 @@ class Graph(Node):
             return False
 
     def all_nodes(self):
-        obj = set(self.objects())
-        allNodes = obj.union(set(self.subjects()))
+        obj = set(self.objects(unique=True))
+        allNodes = obj.union(self.subjects(unique=True))
         return allNodes
 
 class ConjunctiveGraph(Graph):
@@ -887,8 +919,16 @@ class ConjunctiveGraph(Graph):
         self.store.add((s, p, o), context=self.default_context, quoted=False)
 
     def addN(self, quads):
-        """Add a sequence of triples with context"""
-        self.store.addN([quad for quad in quads if quad not in self])
+        """Add a sequence of triples with context
+
+        Quads already in the graph are left out, so that no
+        TripleAddedEvent is dispatched for them. Without a subscriber to
+        that event the stores detect duplicates themselves, and quads
+        are streamed to the store without probing the graph first.
+        """
+        if self.store.dispatcher.subscribed(TripleAddedEvent):
+            quads = [quad for quad in quads if quad not in self]
+        self.store.addN(quads)
 
     def remove(self, (s, p, o)):
         """Removes from all its contexts"""
@@ -896,8 +936,7 @@ class ConjunctiveGraph(Graph):
 
     def triples(self, (s, p, o), context=None):
         """Iterate over all the triples in the entire conjunctive graph"""
-        for (s, p, o), cg in self.store.triples((s, p, o), context=context):
-            yield s, p, o
+        return self.store.triples_without_contexts((s, p, o), context=context)
 
     def quads(self,(s,p,o)):
         """Iterate over all the quads in the entire conjunctive graph"""
@@ -913,7 +952,12 @@ class ConjunctiveGraph(Graph):
 
     def __len__(self):
         """Number of triples in the entire conjunctive graph"""
-        return self.store.__len__()
+        return self.store.count((None, None, None))
+
+    def count(self, (s, p, o)=(None, None, None), context=None):
+        """Number of triples in the entire conjunctive graph matching the
+        given pattern"""
+        return self.store.count((s, p, o), context=context)
 
     def contexts(self, triple=None):
         """Iterate over all contexts in the graph
@@ -923,6 +967,51 @@ class ConjunctiveGraph(Graph):
         for context in self.store.contexts(triple):
             yield context
 
+    def subjects(self, predicate=None, object=None, unique=False,
+                 context=None):
+        """Generate subjects with the given predicate and object, each
+        once if unique is True, from context (a graph or its identifier)
+        or from the entire conjunctive graph"""
+        context = self.__context(context)
+        if unique:
+            if predicate is None and object is None:
+                return self.store.uniqueSubjects(context)
+            return distinct(self.subjects(predicate, object, context=context))
+        return (s for s, p, o in self.store.triples_without_contexts(
+            (None, predicate, object), context))
+
+    def predicates(self, subject=None, object=None, unique=False,
+                   context=None):
+        """Generate predicates with the given subject and object, each
+        once if unique is True, from context (a graph or its identifier)
+        or from the entire conjunctive graph"""
+        context = self.__context(context)
+        if unique:
+            if subject is None and object is None:
+                return self.store.uniquePredicates(context)
+            return distinct(self.predicates(subject, object, context=context))
+        return (p for s, p, o in self.store.triples_without_contexts(
+            (subject, None, object), context))
+
+    def objects(self, subject=None, predicate=None, unique=False,
+                context=None):
+        """Generate objects with the given subject and predicate, each
+        once if unique is True, from context (a graph or its identifier)
+        or from the entire conjunctive graph"""
+        context = self.__context(context)
+        if unique:
+            if subject is None and predicate is None:
+                return self.store.uniqueObjects(context)
+            return distinct(self.objects(subject, predicate, context=context))
+        return (o for s, p, o in self.store.triples_without_contexts(
+            (subject, predicate, None), context))
+
+    def __context(self, context):
+        """The graph for context, a graph or the identifier of one."""
+        if context is None or isinstance(context, Graph):
+            return context
+        return self.get_context(context)
+
     def get_context(self, identifier, quoted=False):
         """Return a context graph for the given identifier
 
@@ -967,10 +1056,312 @@ class ConjunctiveGraph(Graph):
                       location=location, file=file, data=data, **args)
         return context
 
+    def parse_many(self, sources, format="xml", workers=4, **args):
+        """
+        Parse each of sources into its own context, workers at a time.
+
+        Each source is anything `parse` accepts as its source argument.
+        Documents are fetched and parsed concurrently by worker threads,
+        each into an in-memory conjunctive graph of its own, while the
+        calling thread alone adds the results to the store, as each
+        document is done. As with `parse`, a context is named after the
+        document's public ID and replaces any previous content of that
+        context; the named graphs of formats such as TriX and N-Quads go
+        to the contexts they name.
+
+        A source that cannot be read or parsed does not stop the
+        others.
+
+        :Returns:
+
+        A list of (source, context, error) tuples in the order of
+        sources, with context None and error the exception raised
+        for the sources that failed.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1, not %r" % workers)
+        sources = list(sources)
+        tasks = Queue()
+        for task in enumerate(sources):
+            tasks.put(task)
+        done = Queue(workers)
+
+        def work():
+            while True:
+                try:
+                    i, source = tasks.get_nowait()
+                except Empty:
+                    return
+                try:
+                    input_source = create_input_source(source=source,
+                                                       format=format)
+                    identifier = input_source.getPublicId() or \
+                                 input_source.getSystemId()
+                    graph = ConjunctiveGraph(
+                        identifier=identifier and URIRef(identifier) or None)
+                    graph.default_context.parse(input_source, format=format,
+                                                **args)
+                    done.put((i, graph, None))
+                except:
+                    # anything else, such as SystemExit, would leave the
+                    # caller waiting for this result
+                    done.put((i, None, sys.exc_info()[1]))
+
+        threads = []
+        for i in xrange(min(workers, len(sources))):
+            thread = Thread(target=work)
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+
+        results = [None] * len(sources)
+        try:
+            for n in xrange(len(sources)):
+                i, graph, error = done.get()
+                if error is not None:
+                    results[i] = (sources[i], None, error)
+                    continue
+                results[i] = (sources[i], self.__add_parsed(graph), None)
+        finally:
+            # if adding failed, the workers still have to be stopped and
+            # the results they are blocked on taken from them
+            try:
+                while True:
+                    tasks.get_nowait()
+            except Empty:
+                pass
+            while [thread for thread in threads if thread.isAlive()]:
+                try:
+                    done.get(timeout=0.1)
+                except Empty:
+                    pass
+        return results
+
+    def __add_parsed(self, graph):
+        """
+        Add the contexts of graph, parsed by parse_many, to the store,
+        returning the one of the document itself.
+        """
+        identifier = graph.default_context.identifier
+        context = Graph(store=self.store, identifier=identifier)
+        context.remove((None, None, None))
+        for parsed in graph.contexts():
+            if parsed.identifier == identifier:
+                target = context
+            elif isinstance(parsed, QuotedGraph):
+                target = QuotedGraph(self.store, parsed.identifier)
+            else:
+                target = Graph(store=self.store, identifier=parsed.identifier)
+            self.store.addN((s, p, o, target) for s, p, o in parsed)
+        for prefix, namespace in graph.namespaces():
+            self.bind(prefix, namespace, override=False)
+        return context
+
+    def serialize_contexts(self, directory, format="xml", workers=4,
+                           suffix=None, processes=False, **args):
+        """
+        Serialize each context to a file of its own in directory,
+        workers at a time.
+
+        A file is named after its context's identifier, quoted, followed
+        by suffix, which defaults to the usual extension of format. A
+        suffix ending in .gz or .bz2 writes the files compressed. Each
+        file is written under a temporary name in directory and renamed
+        once complete, so that a file is only ever replaced by a whole
+        one. Other arguments are passed to the serializer, such as
+        sort=True for N-Triples to write the same graph the same way
+        every time.
+
+        The contexts are serialized by worker threads sharing the store,
+        which should not be modified meanwhile. As the serializers are
+        written in Python, threads mostly overlap writing and
+        compression; with processes=True the workers are instead
+        processes forked from this one, which read the store as it was
+        when they were started. That suits the memory stores, but not
+        Sleepycat, whose open databases cannot be shared by forked
+        processes, nor platforms without fork, where threads are used.
+
+        :Returns:
+
+        A list of (identifier, path, seconds, error) tuples sorted by
+        identifier, with the time taken to serialize each context, and
+        error the exception raised for those that failed, else None.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1, not %r" % workers)
+        if suffix is None:
+            suffix = "." + FORMAT_SUFFIXES.get(format, format)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        contexts = sorted(self.contexts(),
+                          key=lambda context: context.identifier)
+        # settle buffered writes (see Compact) before the workers read
+        self.store.flush()
+        paths = [os.path.join(directory,
+                              _context_file_name(context.identifier, suffix))
+                 for context in contexts]
+
+        if processes and hasattr(os, "fork") and contexts:
+            timings = _serialize_in_processes(contexts, paths, workers,
+                                              format, args)
+            return [(context.identifier, path, seconds, error)
+                    for context, path, (seconds, error)
+                    in zip(contexts, paths, timings)]
+
+        tasks = Queue()
+        for task in enumerate(contexts):
+            tasks.put(task)
+        results = [None] * len(contexts)
+
+        def work():
+            while True:
+                try:
+                    i, context = tasks.get_nowait()
+                except Empty:
+                    return
+                seconds, error = _serialize_context(context, paths[i],
+                                                    format, args)
+                results[i] = (context.identifier, paths[i], seconds, error)
+
+        threads = []
+        for i in xrange(min(workers, len(contexts))):
+            thread = Thread(target=work)
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
     def __reduce__(self):
         return (ConjunctiveGraph, (self.store, self.identifier))
 
 
+# file name extensions of the serialization formats
+FORMAT_SUFFIXES = {"xml": "rdf", "pretty-xml": "rdf", "n3": "n3",
+                   "turtle": "ttl", "nt": "nt", "nquads": "nq",
+                   "trix": "trix"}
+
+def _context_file_name(identifier, suffix):
+    """
+    Name of the file for the context identifier: the identifier quoted,
+    cut short and followed by a hash of it if it is long.
+    """
+    name = quote(identifier.encode("utf-8"), safe="")
+    if len(name) + len(suffix) > 200:
+        name = "%s-%s" % (name[:160], md5(name).hexdigest())
+    return name + suffix
+
+def _serialize_in_processes(contexts, paths, workers, format, args):
+    """
+    Serialize each of contexts to the matching path in workers processes
+    forked from this one, returning the (seconds, error) of each.
+
+    The processes are handed the contexts as they are forked, and read
+    the indices of the ones to serialize from a queue.
+    """
+    from multiprocessing import Process, Queue as ProcessQueue
+    tasks, done = ProcessQueue(), ProcessQueue()
+
+    def work():
+        for i in iter(tasks.get, None):
+            seconds, error = _serialize_context(contexts[i], paths[i],
+                                                format, args)
+            if error is not None:
+                try:
+                    cPickle.dumps(error)
+                except Exception:
+                    error = Exception(str(error))
+            done.put((i, seconds, error))
+
+    processes = [Process(target=work)
+                 for i in xrange(min(workers, len(contexts)))]
+    for i in xrange(len(contexts)):
+        tasks.put(i)
+    for process in processes:
+        tasks.put(None)
+        process.daemon = True
+        process.start()
+    timings = [None] * len(contexts)
+    try:
+        for n in xrange(len(contexts)):
+            while True:
+                try:
+                    i, seconds, error = done.get(timeout=0.1)
+                    break
+                except Empty:
+                    if not [p for p in processes if p.is_alive()]:
+                        # the last results may still be in the pipe
+                        try:
+                            i, seconds, error = done.get(timeout=1)
+                            break
+                        except Empty:
+                            raise RuntimeError(
+                                "serialize_contexts worker processes exited "
+                                "with contexts left to serialize")
+            timings[i] = (seconds, error)
+    finally:
+        for process in processes:
+            if process.is_alive() and None in timings:
+                process.terminate()
+            process.join()
+    return timings
+
+def _serialize_context(context, path, format, args):
+    """
+    Serialize context to path, returning the seconds it took and the
+    exception raised, if any.
+    """
+    start = time()
+    try:
+        _serialize_to_file(context, path, format, args)
+        error = None
+    except Exception, e:
+        _logger.warning("Could not serialize %s: %s" % (context.identifier, e))
+        error = e
+    return time() - start, error
+
+def _create_temp_file(directory, name):
+    """
+    Create a new file in directory with a name made from name, returning
+    its descriptor and path. Unlike mkstemp's, which only their owner
+    may read, the file gets the mode open() gives new files.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temp = os.path.join(directory, ".%s.%d.%06x.tmp" % (
+            name[:50], os.getpid(), random.getrandbits(24)))
+        try:
+            return os.open(temp, flags, 0666), temp
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+
+def _serialize_to_file(graph, path, format, args):
+    """
+    Serialize graph to path through a temporary file in the same
+    directory, renamed to path once complete.
+    """
+    directory, name = os.path.split(path)
+    fd, temp = _create_temp_file(directory, name)
+    try:
+        stream = compressing_stream(os.fdopen(fd, "wb"), path)
+        try:
+            graph.serialize(stream, format=format, **args)
+        finally:
+            stream.close()
+        try:
+            os.rename(temp, path)
+        except OSError:
+            # Windows does not rename over an existing file
+            os.remove(path)
+            os.rename(temp, path)
+    except:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
 class QuotedGraph(Graph):
     """
     Quoted Graphs are intended to implement Notation 3 formulae. They are 
@@ -987,9 +1378,9 @@ class QuotedGraph(Graph):
 
     def addN(self,quads):
         """Add a sequence of triple with context"""
-        self.store.addN([(s,p,o,c) for s,p,o,c in quads
-                                   if isinstance(c, QuotedGraph)
-                                   and c.identifier is self.identifier])
+        self.store.addN((s,p,o,c) for s,p,o,c in quads
+                                  if isinstance(c, QuotedGraph)
+                                  and c.identifier is self.identifier)
 
     def n3(self):
         """Return an n3 identifier for the Graph"""
@@ -1096,6 +1487,24 @@ class BackwardCompatGraph(ConjunctiveGraph):
     def open(self, configuration, create=True):
         return ConjunctiveGraph.open(self, configuration, create)
 
+    def subjects(self, predicate=None, object=None, context=None,
+                 unique=False):
+        """Generate subjects with the given predicate and object"""
+        return ConjunctiveGraph.subjects(self, predicate, object, unique,
+                                         context)
+
+    def predicates(self, subject=None, object=None, context=None,
+                   unique=False):
+        """Generate predicates with the given subject and object"""
+        return ConjunctiveGraph.predicates(self, subject, object, unique,
+                                           context)
+
+    def objects(self, subject=None, predicate=None, context=None,
+                unique=False):
+        """Generate objects with the given subject and predicate"""
+        return ConjunctiveGraph.objects(self, subject, predicate, unique,
+                                        context)
+
     def add(self, (s, p, o), context=None):
         """Add to to the given context or to the default context"""
         if context is not None:
@@ -1119,14 +1528,18 @@ class BackwardCompatGraph(ConjunctiveGraph):
             assert c.identifier == context
         else:
             c = None
-        for (s, p, o), cg in self.store.triples((s, p, o), c):
-            yield (s, p, o)
+        return self.store.triples_without_contexts((s, p, o), c)
 
     def __len__(self, context=None):
         """Number of triples in the entire graph"""
+        return self.count((None, None, None), context)
+
+    def count(self, (s, p, o)=(None, None, None), context=None):
+        """Number of triples in the entire graph matching the given
+        pattern"""
         if context is not None:
             context = self.get_context(context)
-        return self.store.__len__(context)
+        return self.store.count((s, p, o), context)
 
     def get_context(self, identifier, quoted=False):
         """Return a context graph for the given identifier
@@ -1158,21 +1571,6 @@ class BackwardCompatGraph(ConjunctiveGraph):
         for context in self.store.contexts(triple):
             yield context.identifier
 
-    def subjects(self, predicate=None, object=None, context=None):
-        """Generate subjects with the given predicate and object"""
-        for s, p, o in self.triples((None, predicate, object), context):
-            yield s
-
-    def predicates(self, subject=None, object=None, context=None):
-        """Generate predicates with the given subject and object"""
-        for s, p, o in self.triples((subject, None, object), context):
-            yield p
-
-    def objects(self, subject=None, predicate=None, context=None):
-        """Generate objects with the given subject and predicate"""
-        for s, p, o in self.triples((subject, predicate, None), context):
-            yield o
-
     def subject_predicates(self, object=None, context=None):
         """Generate (subject, predicate) tuples for the given object"""
         for s, p, o in self.triples((None, None, object), context):
@@ -1288,6 +1686,27 @@ class ReadOnlyGraphAggregate(ConjunctiveGraph):
     def __len__(self):
         return reduce(lambda x, y: x + y, [len(g) for g in self.graphs])
 
+    def count(self, (s, p, o)=(None, None, None)):
+        return sum([g.count((s, p, o)) for g in self.graphs])
+
+    def subjects(self, predicate=None, object=None, unique=False):
+        subjects = (s for s, p, o in self.triples((None, predicate, object)))
+        if unique:
+            return distinct(subjects)
+        return subjects
+
+    def predicates(self, subject=None, object=None, unique=False):
+        predicates = (p for s, p, o in self.triples((subject, None, object)))
+        if unique:
+            return distinct(predicates)
+        return predicates
+
+    def objects(self, subject=None, predicate=None, unique=False):
+        objects = (o for s, p, o in self.triples((subject, predicate, None)))
+        if unique:
+            return distinct(objects)
+        return objects
+
     def __hash__(self):
         raise UnSupportedAggregateOperation()
 
@@ -11,11 +11,18 @@ want to do so through the Graph class parse method.
 """
 
 import os
+import zlib
+import errno
+import socket
+import httplib
 import __builtin__
 import warnings
-from urllib import pathname2url, url2pathname
-from urllib2 import urlopen, Request, HTTPError
-from urlparse import urljoin
+from hashlib import sha1
+from threading import Lock
+from tempfile import SpooledTemporaryFile, mkstemp
+from urllib import pathname2url, url2pathname, getproxies
+from urllib2 import urlopen, Request, HTTPError, URLError
+from urlparse import urljoin, urlsplit
 from StringIO import StringIO
 from xml.sax import xmlreader
 from xml.sax.saxutils import prepare_input_source
@@ -28,6 +35,7 @@ except AttributeError:
 from rdflib import __version__
 from rdflib.term import URIRef
 from rdflib.namespace import Namespace
+from rdflib.compression import decompressing_stream
 
 
 class Parser(object):
@@ -68,6 +76,270 @@ headers = {
     }
 
 
+class HTTPFetcher(object):
+    """
+    Fetches documents over HTTP and HTTPS for URLInputSource.
+
+    Connections are kept alive and reused, up to max_connections idle
+    ones per host. Responses are requested gzip or deflate encoded and
+    decoded as they are read, and every socket operation gives up
+    after timeout seconds.
+
+    Given a cache_dir, responses carrying an ETag or Last-Modified
+    header are stored there and revalidated with a conditional GET the
+    next time they are fetched, the cached copy being used when the
+    server answers 304 Not Modified.
+
+    URLs with other schemes, or with a proxy configured for their
+    scheme, are opened with urllib2 as before.
+
+    To use another fetcher for all URLs, set rdflib.parser.fetcher, e.g.
+    rdflib.parser.fetcher = HTTPFetcher(cache_dir="/var/cache/rdf").
+    """
+
+    max_redirects = 10
+    spool_size = 1 << 20
+    chunk_size = 1 << 16
+
+    def __init__(self, cache_dir=None, timeout=30, max_connections=4):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.connections = {} # (scheme, host) -> idle connections
+        self.lock = Lock()
+
+    def fetch(self, url, headers):
+        """
+        Return a (stream, content type) pair for the document at url,
+        requested with the given headers.
+        """
+        scheme = urlsplit(url)[0]
+        if scheme not in ("http", "https") or scheme in getproxies():
+            return self.fetch_urllib2(url, headers)
+        cache = self.cache_files(url, headers)
+        meta = None
+        if cache is not None and os.path.exists(cache[0]) and \
+               os.path.exists(cache[1]):
+            meta = self.read_meta(cache[1])
+        result = self.fetch_http(url, headers, cache, meta)
+        if result is None:
+            # the cached copy went away after the server said it is
+            # current, so ask for the document itself
+            result = self.fetch_http(url, headers, cache, None)
+        return result
+
+    def fetch_http(self, url, headers, cache, meta):
+        """
+        GET url, conditionally if the meta data of a cached copy is
+        given, and return a (stream, content type) pair, or None if the
+        server answered 304 Not Modified but the cached copy is gone.
+        """
+        request_headers = dict(headers)
+        request_headers["Accept-Encoding"] = "gzip, deflate"
+        if meta is not None:
+            if "etag" in meta:
+                request_headers["If-None-Match"] = meta["etag"]
+            if "last-modified" in meta:
+                request_headers["If-Modified-Since"] = meta["last-modified"]
+        location = url
+        for i in xrange(self.max_redirects + 1):
+            key, connection, response = self.request(location,
+                                                     request_headers)
+            if response.status in (301, 302, 303, 307) and \
+                   response.getheader("location"):
+                response.read()
+                self.release(key, connection, response)
+                location = urljoin(location, response.getheader("location"))
+                # the cached copy's validators are only good for url
+                request_headers.pop("If-None-Match", None)
+                request_headers.pop("If-Modified-Since", None)
+                meta = None
+                continue
+            break
+        else:
+            raise Exception('Too many redirects while trying to open "%s"'
+                            % url)
+        try:
+            if response.status == 304 and meta is not None:
+                response.read()
+                try:
+                    stream = __builtin__.file(cache[0], "rb")
+                except IOError, e:
+                    if e.errno != errno.ENOENT:
+                        raise
+                    return None
+                return stream, meta.get("content-type")
+            if response.status != 200:
+                raise Exception('"HTTP Error %s: %s" while trying to open "%s"'
+                                % (response.status, response.reason, url))
+            content_type = response.getheader("content-type")
+            meta = {"content-type": content_type,
+                    "etag": response.getheader("etag"),
+                    "last-modified": response.getheader("last-modified")}
+            if cache is not None and (meta["etag"] or meta["last-modified"]):
+                stream = self.store(response, cache, meta)
+            else:
+                stream = SpooledTemporaryFile(self.spool_size)
+                self.copy(response, stream)
+                stream.seek(0)
+            return stream, content_type
+        finally:
+            self.release(key, connection, response)
+
+    def fetch_urllib2(self, url, headers):
+        req = Request(url, None, headers)
+        try:
+            file = urlopen(req)
+        except HTTPError, e:
+            # TODO:
+            raise Exception('"%s" while trying to open "%s"' % (e, url))
+        return file, file.info().get('content-type')
+
+    def request(self, url, headers):
+        """
+        Send a GET request for url, on an idle connection if there is
+        one, and return the connection's key, the connection and the
+        response.
+        """
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        if query:
+            path = "%s?%s" % (path, query)
+        key = (scheme, netloc)
+        connection = self.acquire(key)
+        if connection is not None:
+            try:
+                connection.request("GET", path or "/", headers=headers)
+                return key, connection, connection.getresponse()
+            except (socket.error, httplib.HTTPException):
+                # the server closed the idle connection, try a new one
+                connection.close()
+        if scheme == "https":
+            connection = httplib.HTTPSConnection(netloc, timeout=self.timeout)
+        else:
+            connection = httplib.HTTPConnection(netloc, timeout=self.timeout)
+        try:
+            try:
+                connection.request("GET", path or "/", headers=headers)
+            except socket.error, e:
+                # failing to connect raises URLError, as with urllib2
+                raise URLError(e)
+            return key, connection, connection.getresponse()
+        except:
+            connection.close()
+            raise
+
+    def acquire(self, key):
+        self.lock.acquire()
+        try:
+            idle = self.connections.get(key)
+            if idle:
+                return idle.pop()
+        finally:
+            self.lock.release()
+
+    def release(self, key, connection, response):
+        """
+        Keep connection for reuse if response has been read to its end
+        and the server did not ask for it to be closed.
+        """
+        if not response.isclosed() or response.will_close:
+            connection.close()
+            return
+        self.lock.acquire()
+        try:
+            idle = self.connections.setdefault(key, [])
+            if len(idle) < self.max_connections:
+                idle.append(connection)
+                return
+        finally:
+            self.lock.release()
+        connection.close()
+
+    def close(self):
+        """Close all idle connections."""
+        self.lock.acquire()
+        try:
+            connections, self.connections = self.connections, {}
+        finally:
+            self.lock.release()
+        for idle in connections.values():
+            for connection in idle:
+                connection.close()
+
+    def copy(self, response, stream):
+        """Write the decoded body of response to stream."""
+        encoding = (response.getheader("content-encoding") or "").lower()
+        if encoding in ("gzip", "x-gzip"):
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            decoder = zlib.decompressobj()
+        else:
+            decoder = None
+        read, write = response.read, stream.write
+        data = read(self.chunk_size)
+        if decoder is not None and encoding == "deflate" and data:
+            # some servers send raw deflate data without a zlib header
+            try:
+                first = decoder.decompress(data)
+            except zlib.error:
+                decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+                first = decoder.decompress(data)
+            write(first)
+            data = read(self.chunk_size)
+        while data:
+            if decoder is not None:
+                data = decoder.decompress(data)
+            write(data)
+            data = read(self.chunk_size)
+        if decoder is not None:
+            write(decoder.flush())
+
+    def cache_files(self, url, headers):
+        """Return the body and meta data file names for url, if caching."""
+        if self.cache_dir is None:
+            return None
+        name = sha1("%s %s" % (url, headers.get("Accept", ""))).hexdigest()
+        name = os.path.join(self.cache_dir, name)
+        return name, name + ".meta"
+
+    def store(self, response, (body, meta_file), meta):
+        """
+        Store the body of response in the cache and return it opened
+        for reading. The files are written under temporary names and
+        renamed, so a concurrent reader never sees them half written.
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        fd, tmp = mkstemp(dir=self.cache_dir)
+        stream = os.fdopen(fd, "wb")
+        try:
+            self.copy(response, stream)
+            stream.close()
+            os.rename(tmp, body)
+        except:
+            stream.close()
+            os.remove(tmp)
+            raise
+        fd, tmp = mkstemp(dir=self.cache_dir)
+        stream = os.fdopen(fd, "wb")
+        for name, value in meta.items():
+            if value:
+                stream.write("%s: %s\n" % (name, value))
+        stream.close()
+        os.rename(tmp, meta_file)
+        return __builtin__.file(body, "rb")
+
+    def read_meta(self, meta_file):
+        meta = {}
+        for line in __builtin__.file(meta_file, "rb"):
+            name, value = line.rstrip("\r\n").split(": ", 1)
+            meta[name] = value
+        return meta
+
+
+fetcher = HTTPFetcher()
+
+
 class URLInputSource(InputSource):
     """
     TODO:
@@ -88,14 +360,9 @@ class URLInputSource(InputSource):
         else: 
             myheaders['Accept']='application/rdf+xml,text/rdf+n3;q=0.9,application/xhtml+xml;q=0.5, */*;q=0.1'
         
-        req = Request(system_id, None, myheaders)
-        try:
-            file = urlopen(req)
-        except HTTPError, e:
-            # TODO:
-            raise Exception('"%s" while trying to open "%s"' % (e, self.url))
-        self.content_type = file.info().get('content-type')
-        self.content_type = self.content_type.split(";", 1)[0]
+        file, self.content_type = fetcher.fetch(system_id, myheaders)
+        if self.content_type is not None:
+            self.content_type = self.content_type.split(";", 1)[0]
         self.setByteStream(file)
         # TODO: self.setEncoding(encoding)
 
@@ -125,6 +392,9 @@ def create_input_source(source=None, publicID=None,
     """
     Return an appropriate InputSource instance for the given
     parameters.
+
+    Byte streams holding gzip or bzip2 compressed data are decompressed
+    as they are read.
     """
 
     # TODO: test that exactly one of source, location, file, and data
@@ -168,6 +438,10 @@ def create_input_source(source=None, publicID=None,
     if input_source is None:
         raise Exception("could not create InputSource")
     else:
+        stream = input_source.getByteStream()
+        if stream is not None:
+            input_source.setByteStream(decompressing_stream(stream))
+
         if publicID:
             input_source.setPublicId(publicID)
 
@@ -117,6 +117,8 @@ register('default', Store,
                 'rdflib.plugins.memory', 'IOMemory')
 register('IOMemory', Store, 
                 'rdflib.plugins.memory', 'IOMemory')
+register('Compact', Store,
+                'rdflib.plugins.compact', 'Compact')
 register('Sleepycat', Store, 
                 'rdflib.plugins.sleepycat', 'Sleepycat')
 
@@ -128,6 +130,8 @@ register('turtle', Serializer,
                 'rdflib.plugins.serializers.turtle', 'TurtleSerializer')
 register('nt', Serializer, 
                 'rdflib.plugins.serializers.nt', 'NTSerializer')
+register('nquads', Serializer,
+                'rdflib.plugins.serializers.nquads', 'NQuadsSerializer')
 register('pretty-xml', Serializer,
                 'rdflib.plugins.serializers.rdfxml', 'PrettyXMLSerializer')
 register('trix', Serializer,
@@ -143,8 +147,12 @@ register('xml', Parser,
                 'rdflib.plugins.parsers.rdfxml', 'RDFXMLParser')
 register('n3', Parser, 
                 'rdflib.plugins.parsers.notation3', 'N3Parser')
+register('turtle', Parser,
+                'rdflib.plugins.parsers.turtle', 'TurtleParser')
 register('nt', Parser, 
                 'rdflib.plugins.parsers.nt', 'NTParser')
+register('nquads', Parser,
+                'rdflib.plugins.parsers.nquads', 'NQuadsParser')
 register('trix', Parser, 
                 'rdflib.plugins.parsers.trix', 'TriXParser')
 register('rdfa', Parser, 
@@ -0,0 +1,530 @@
+"""
+A compact, context-aware in-memory store.
+
+Terms are interned to sequential integer ids and every statement is kept
+as a row of four integers in six sorted indices (cspo, cpos, cosp for
+lookups within a context and spoc, posc, ospc for conjunctive lookups).
+Each index holds its rows in four parallel ``array`` columns, so a
+statement costs a few dozen bytes per index instead of the nested
+dictionaries used by IOMemory.
+
+New rows are appended to an unsorted write buffer which is merged into
+the sorted columns in a single pass, either when the buffer grows past
+``buffer_size`` (or a sixteenth of the index, whichever is larger) or
+before the next read.
+
+    >>> from rdflib.graph import Graph
+    >>> from rdflib.term import URIRef, Literal
+    >>> g = Graph(store='Compact')
+    >>> g.add((URIRef('http://example.org/a'), URIRef('http://example.org/b'), Literal('c')))
+    >>> len(g)
+    1
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby, izip
+
+from rdflib.term import BNode
+from rdflib.store import Store, TripleAddedEvent, batches
+
+ANY = Any = None
+
+ID_TYPECODE = 'i'
+
+# The positions of subject, predicate and object in the keys of the
+# spo, pos and osp orderings.
+ORDERS = ((0, 1, 2), (1, 2, 0), (2, 0, 1))
+
+# (ordering, length of the bound prefix) indexed by a bitmask of the
+# bound terms: 1 for subject, 2 for predicate and 4 for object.
+LOOKUP = {
+    0: (0, 0),
+    1: (0, 1),
+    2: (1, 1),
+    3: (0, 2),
+    4: (2, 1),
+    5: (2, 2),
+    6: (1, 2),
+    7: (0, 3),
+}
+
+CHUNK_SIZE = 1024
+
+
+def _permute(ids, order):
+    return (ids[order[0]], ids[order[1]], ids[order[2]])
+
+
+def _unpermute(key, order):
+    ids = [None, None, None]
+    ids[order[0]], ids[order[1]], ids[order[2]] = key
+    return tuple(ids)
+
+
+def _columns():
+    return [array(ID_TYPECODE) for i in xrange(4)]
+
+
+class QuadIndex(object):
+    """
+    A sorted index of integer quads held in four parallel arrays.
+
+    Rows added with ``add`` go to an unsorted buffer and only become
+    visible to ``range`` and ``rows`` after ``merge``.
+    """
+
+    def __init__(self):
+        self.columns = _columns()
+        self.buffer = _columns()
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def pending(self):
+        """Number of buffered rows, duplicates included."""
+        return len(self.buffer[0])
+
+    def add(self, key):
+        for column, value in izip(self.buffer, key):
+            column.append(value)
+
+    def range(self, prefix, lo=0, hi=None):
+        """Return the (lo, hi) slice of the rows starting with prefix."""
+        if hi is None:
+            hi = len(self.columns[0])
+        for column, value in izip(self.columns, prefix):
+            if lo == hi:
+                break
+            lo = bisect_left(column, value, lo, hi)
+            hi = bisect_right(column, value, lo, hi)
+        return lo, hi
+
+    def rows(self, lo, hi):
+        """A snapshot of the rows in [lo, hi) as tuples."""
+        return izip(*[column[lo:hi] for column in self.columns])
+
+    def row(self, i):
+        return tuple(column[i] for column in self.columns)
+
+    def merge(self):
+        """
+        Merge the buffer into the sorted columns in place and return the
+        sorted list of rows that were not already in the index.
+        """
+        if not self.pending():
+            return []
+        items = sorted(set(izip(*self.buffer)))
+        self.buffer = _columns()
+
+        columns = self.columns
+        n = len(columns[0])
+        if not n:
+            for column, values in izip(columns, izip(*items)):
+                column.extend(array(ID_TYPECODE, values))
+            return items
+        new = []
+        positions = []
+        for item in items:
+            lo, hi = self.range(item, 0, n)
+            if lo == hi:
+                new.append(item)
+                positions.append(lo)
+        k = len(new)
+        if not k:
+            return new
+
+        # Grow each column by k and move the existing rows into place,
+        # walking backwards so that every row is copied at most once.
+        for i, column in enumerate(columns):
+            column.extend(array(ID_TYPECODE, [0]) * k)
+            end = n
+            for j in xrange(k - 1, -1, -1):
+                pos = positions[j]
+                if pos < end:
+                    column[pos + j + 1:end + j + 1] = column[pos:end]
+                column[pos + j] = new[j][i]
+                end = pos
+        return new
+
+    def discard(self, keys):
+        """
+        Remove the given rows from the sorted columns; rows that are not
+        in the index are ignored. Returns the number of rows removed.
+        """
+        positions = []
+        for key in set(keys):
+            lo, hi = self.range(key)
+            if lo < hi:
+                positions.append(lo)
+        if not positions:
+            return 0
+        positions.sort()
+        count = len(positions)
+        positions.append(len(self.columns[0]))
+        for column in self.columns:
+            write = positions[0]
+            for j in xrange(count):
+                start, stop = positions[j] + 1, positions[j + 1]
+                if start < stop:
+                    column[write:write + stop - start] = column[start:stop]
+                    write += stop - start
+            del column[write:]
+        return count
+
+
+class Compact(Store):
+    """\
+    A compact, integer-interned, context-aware in-memory store.
+
+    Terms (including contexts) are assigned sequential integer ids. The
+    statements are kept in six QuadIndex instances: cspo, cpos and cosp
+    hold every statement (quoted ones included) keyed by context first,
+    while spoc, posc and ospc hold the asserted statements with the
+    context last, so that the contexts of a triple are adjacent rows.
+    """
+
+    context_aware = True
+    formula_aware = True
+
+    # minimum number of buffered statements before a merge is forced
+    buffer_size = 1 << 16
+
+    def __init__(self, configuration=None, identifier=None):
+        super(Compact, self).__init__(configuration)
+        self.identifier = identifier or BNode()
+
+        # id -> term and term -> id
+        self.__terms = []
+        self.__ids = {}
+
+        # indexed by [context][s, p, o in each order]
+        self.__context_indices = [QuadIndex() for order in ORDERS]
+
+        # indexed by [s, p, o in each order][context], asserted only
+        self.__indices = [QuadIndex() for order in ORDERS]
+
+        self.__contexts = set()
+
+        # number of distinct asserted triples
+        self.__len = 0
+
+        self.__namespace = {}
+        self.__prefix = {}
+
+    def bind(self, prefix, namespace):
+        self.__prefix[namespace] = prefix
+        self.__namespace[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self.__namespace.get(prefix, None)
+
+    def prefix(self, namespace):
+        return self.__prefix.get(namespace, None)
+
+    def namespaces(self):
+        for prefix, namespace in self.__namespace.iteritems():
+            yield prefix, namespace
+
+    def __intern(self, term):
+        try:
+            return self.__ids[term]
+        except KeyError:
+            i = self.__ids[term] = len(self.__terms)
+            self.__terms.append(term)
+            return i
+
+    def __resolve(self, (subject, predicate, object)):
+        """
+        Ids of the bound terms of a pattern (None for unbound ones) and
+        the lookup bitmask. Raises KeyError for unknown terms.
+        """
+        ids = self.__ids
+        mask = 0
+        si = pi = oi = Any
+        if subject is not Any:
+            si = ids[subject]
+            mask |= 1
+        if predicate is not Any:
+            pi = ids[predicate]
+            mask |= 2
+        if object is not Any:
+            oi = ids[object]
+            mask |= 4
+        return (si, pi, oi), mask
+
+    def add(self, (subject, predicate, object), context, quoted=False):
+        """\
+        Add a triple to the store.
+        """
+        Store.add(self, (subject, predicate, object), context, quoted)
+        self.__add((subject, predicate, object), context, quoted)
+        self.__maybe_flush()
+
+    def addN(self, quads):
+        """\
+        Add a sequence of (subject, predicate, object, context) quads.
+
+        Statements in a QuotedGraph context are added as quoted. Duplicates
+        are dropped when the write buffer is merged.
+        """
+        from rdflib.graph import QuotedGraph
+        dispatch = self.dispatcher.subscribed(TripleAddedEvent)
+        for batch in batches(quads, self.buffer_size):
+            for s, p, o, c in batch:
+                assert c is not None, \
+                    "Context associated with %s %s %s is None!" % (s, p, o)
+                if dispatch:
+                    self.dispatcher.dispatch(
+                        TripleAddedEvent(triple=(s, p, o), context=c))
+                self.__add((s, p, o), c, isinstance(c, QuotedGraph))
+            self.__maybe_flush()
+
+    def __add(self, (subject, predicate, object), context, quoted):
+        intern = self.__intern
+        ids = (intern(subject), intern(predicate), intern(object))
+        ci = intern(context)
+        self.__contexts.add(ci)
+
+        for index, order in izip(self.__context_indices, ORDERS):
+            index.add((ci,) + _permute(ids, order))
+        if not quoted:
+            for index, order in izip(self.__indices, ORDERS):
+                index.add(_permute(ids, order) + (ci,))
+
+    def __maybe_flush(self):
+        cspo = self.__context_indices[0]
+        if cspo.pending() >= max(self.buffer_size, len(cspo) >> 4):
+            self.__flush()
+
+    def flush(self):
+        self.__flush()
+
+    def __flush(self):
+        """Merge the write buffers of all indices."""
+        for index in self.__context_indices:
+            index.merge()
+        spoc = self.__indices[0]
+        new = spoc.merge()
+        for index in self.__indices[1:]:
+            index.merge()
+        # a triple is new if all of its rows were just inserted
+        for triple, rows in groupby(new, lambda row: row[:3]):
+            lo, hi = spoc.range(triple)
+            if hi - lo == len(list(rows)):
+                self.__len += 1
+
+    def __scan(self, index, prefix, width):
+        """
+        Generate the rows of index starting with prefix, a chunk at a
+        time. Chunks end on a change in the first width columns and the
+        next chunk is located again by key, so the store may be modified
+        while the generator is suspended.
+        """
+        lo, hi = index.range(prefix)
+        while lo < hi:
+            end = min(lo + CHUNK_SIZE, hi)
+            last = index.row(end - 1)[:width]
+            end = index.range(last, lo, hi)[1]
+            for row in index.rows(lo, end):
+                yield row
+            lo, hi = index.range(prefix)
+            lo = index.range(last, lo, hi)[1]
+
+    def __matches(self, triple, context):
+        """
+        Generate (ids, context ids) for the triples matching the pattern,
+        where context ids is None for a lookup within a context.
+        """
+        ids, mask = self.__resolve(triple)
+        n, length = LOOKUP[mask]
+        order = ORDERS[n]
+        key = _permute(ids, order)
+        if context is None:
+            rows = self.__scan(self.__indices[n], key[:length], 3)
+            for key, group in groupby(rows, lambda row: row[:3]):
+                yield _unpermute(key, order), [row[3] for row in group]
+        else:
+            ci = self.__ids[context]
+            prefix = (ci,) + key[:length]
+            for row in self.__scan(self.__context_indices[n], prefix, 4):
+                yield _unpermute(row[1:], order), None
+
+    def triples(self, triple, context=None):
+        """A generator over all the triples matching """
+        if context is not None:
+            if context == self:
+                context = None
+        self.__flush()
+
+        terms = self.__terms
+        try:
+            matches = self.__matches(triple, context)
+            for (si, pi, oi), cis in matches:
+                s, p, o = terms[si], terms[pi], terms[oi]
+                if cis is None:
+                    yield (s, p, o), self.contexts((s, p, o))
+                else:
+                    yield (s, p, o), (terms[ci] for ci in cis)
+        except KeyError:
+            return
+
+    def triples_without_contexts(self, triple, context=None):
+        """A generator over all the triples matching, without contexts """
+        if context is not None:
+            if context == self:
+                context = None
+        self.__flush()
+
+        terms = self.__terms
+        try:
+            for (si, pi, oi), cis in self.__matches(triple, context):
+                yield terms[si], terms[pi], terms[oi]
+        except KeyError:
+            return
+
+    def remove(self, triple, context=None):
+        Store.remove(self, triple, context)
+        if context is not None:
+            if context == self:
+                context = None
+        self.__flush()
+
+        quads = []
+        try:
+            for ids, cis in self.__matches(triple, context):
+                if cis is None:
+                    quads.append((self.__ids[context],) + ids)
+                else:
+                    quads.extend((ci,) + ids for ci in cis)
+        except KeyError:
+            return
+
+        spoc = self.__indices[0]
+        asserted = set()
+        for quad in quads:
+            lo, hi = spoc.range(quad[1:])
+            if lo < hi:
+                asserted.add(quad[1:])
+
+        for index, order in izip(self.__context_indices, ORDERS):
+            index.discard([(quad[0],) + _permute(quad[1:], order)
+                           for quad in quads])
+        for index, order in izip(self.__indices, ORDERS):
+            index.discard([_permute(quad[1:], order) + (quad[0],)
+                           for quad in quads])
+
+        for ids in asserted:
+            lo, hi = spoc.range(ids)
+            if lo == hi:
+                self.__len -= 1
+
+        subject, predicate, object = triple
+        if context is not None:
+            if subject is None and predicate is None and object is None:
+                # remove context
+                self.__contexts.discard(self.__ids[context])
+
+    def __len__(self, context=None):
+        if context is not None:
+            if context == self:
+                context = None
+        self.__flush()
+
+        if context is None:
+            return self.__len
+        ci = self.__ids.get(context)
+        if ci is None:
+            return 0
+        lo, hi = self.__context_indices[0].range((ci,))
+        return hi - lo
+
+    def count(self, triple, context=None):
+        """Number of triples matching, from the sizes of index ranges """
+        if context is not None:
+            if context == self:
+                context = None
+        self.__flush()
+
+        try:
+            ids, mask = self.__resolve(triple)
+        except KeyError:
+            return 0
+        n, length = LOOKUP[mask]
+        key = _permute(ids, ORDERS[n])[:length]
+        if context is None:
+            if not mask:
+                return self.__len
+            index = self.__indices[n]
+            lo, hi = index.range(key)
+            if length == 3:
+                return int(lo < hi)
+            # a triple has one row per context, and its rows are adjacent
+            count = 0
+            previous = None
+            for row in izip(*[column[lo:hi]
+                              for column in index.columns[length:3]]):
+                if row != previous:
+                    count += 1
+                    previous = row
+            return count
+        ci = self.__ids.get(context)
+        if ci is None:
+            return 0
+        lo, hi = self.__context_indices[n].range((ci,) + key)
+        return hi - lo
+
+    def uniqueSubjects(self, context=None):
+        return self.__unique(0, context)
+
+    def uniquePredicates(self, context=None):
+        return self.__unique(1, context)
+
+    def uniqueObjects(self, context=None):
+        return self.__unique(2, context)
+
+    def __unique(self, n, context):
+        """
+        Generate the distinct terms in the first position of the n-th
+        ordering. Each is found by bisecting past the rows of the one
+        before, which is located again after it is yielded, so the store
+        may be modified while the generator is suspended.
+        """
+        if context is not None:
+            if context == self:
+                context = None
+        if context is None:
+            index, prefix = self.__indices[n], ()
+        else:
+            ci = self.__ids.get(context)
+            if ci is None:
+                return
+            index, prefix = self.__context_indices[n], (ci,)
+
+        terms = self.__terms
+        last = None
+        while True:
+            self.__flush()
+            lo, hi = index.range(prefix)
+            if last is not None:
+                lo = index.range(prefix + (last,), lo, hi)[1]
+            if lo >= hi:
+                return
+            last = index.columns[len(prefix)][lo]
+            yield terms[last]
+
+    def contexts(self, triple=None):
+        terms = self.__terms
+        if triple:
+            try:
+                ids, mask = self.__resolve(triple)
+            except KeyError:
+                return
+            self.__flush()
+            spoc = self.__indices[0]
+            lo, hi = spoc.range(ids)
+            for ci in spoc.columns[3][lo:hi]:
+                yield terms[ci]
+        else:
+            for ci in list(self.__contexts):
+                yield terms[ci]
@@ -1,6 +1,6 @@
 from __future__ import generators
 from rdflib.term import BNode
-from rdflib.store import Store
+from rdflib.store import Store, TripleAddedEvent
 
 ANY = Any = None
 
@@ -30,10 +30,14 @@ class Memory(Store):
         self.__namespace = {}
         self.__prefix = {}
 
+        # number of triples in the store
+        self.__count = 0
+
     def add(self, (subject, predicate, object), context, quoted=False):
         """\
         Add a triple to the store of triples.
         """
+        Store.add(self, (subject, predicate, object), context, quoted)
         # add dictionary entries for spo[s][p][p] = 1 and pos[p][o][s]
         # = 1, creating the nested dictionaries where they do not yet
         # exits.
@@ -46,7 +50,10 @@ class Memory(Store):
             o = po[predicate]
         except:
             o = po[predicate] = {}
+        if object in o:
+            return
         o[object] = 1
+        self.__count += 1
 
         pos = self.__pos
         try:
@@ -70,15 +77,56 @@ class Memory(Store):
             p = sp[subject] = {}
         p[predicate] = 1
 
+    def addN(self, quads):
+        """\
+        Add a sequence of (subject, predicate, object, context) quads,
+        updating the indices directly. The context is ignored. Events
+        are only created if someone subscribed to TripleAddedEvent.
+        """
+        dispatch = self.dispatcher.subscribed(TripleAddedEvent)
+        spo = self.__spo
+        pos = self.__pos
+        osp = self.__osp
+        count = 0
+        for subject, predicate, object, context in quads:
+            if dispatch:
+                self.dispatcher.dispatch(TripleAddedEvent(
+                    triple=(subject, predicate, object), context=context))
+            try:
+                o = spo[subject][predicate]
+            except KeyError:
+                o = spo.setdefault(subject, {}).setdefault(predicate, {})
+            if object in o:
+                continue
+            o[object] = 1
+            try:
+                pos[predicate][object][subject] = 1
+            except KeyError:
+                pos.setdefault(predicate, {}).setdefault(object, {})[subject] = 1
+            try:
+                osp[object][subject][predicate] = 1
+            except KeyError:
+                osp.setdefault(object, {}).setdefault(subject, {})[predicate] = 1
+            count += 1
+        self.__count += count
+
     def remove(self, (subject, predicate, object), context=None):
-        for (subject, predicate, object), c in self.triples(
+        for subject, predicate, object in self.triples_without_contexts(
                                             (subject, predicate, object)):
-            del self.__spo[subject][predicate][object]
-            del self.__pos[predicate][object][subject]
-            del self.__osp[object][subject][predicate]
+            _removeNested(self.__spo, subject, predicate, object)
+            _removeNested(self.__pos, predicate, object, subject)
+            _removeNested(self.__osp, object, subject, predicate)
+            self.__count -= 1
 
     def triples(self, (subject, predicate, object), context=None):
         """A generator over all the triples matching """
+        for triple in self.triples_without_contexts(
+                                        (subject, predicate, object)):
+            yield triple, self.__contexts()
+
+    def triples_without_contexts(self, (subject, predicate, object),
+                                 context=None):
+        """A generator over all the triples matching, without contexts """
         if subject!=ANY: # subject is given
             spo = self.__spo
             if subject in spo:
@@ -87,26 +135,24 @@ class Memory(Store):
                     if predicate in subjectDictionary:
                         if object!=ANY: # subject+predicate+object is given
                             if object in subjectDictionary[predicate]:
-                                yield (subject, predicate, object), \
-                                                            self.__contexts()
+                                yield subject, predicate, object
                             else: # given object not found
                                 pass
                         else: # subject+predicate is given, object unbound
                             for o in subjectDictionary[predicate].keys():
-                                yield (subject, predicate, o), \
-                                                            self.__contexts()
+                                yield subject, predicate, o
                     else: # given predicate not found
                         pass
                 else: # subject given, predicate unbound
                     for p in subjectDictionary.keys():
                         if object!=ANY: # object is given
                             if object in subjectDictionary[p]:
-                                yield (subject, p, object), self.__contexts()
+                                yield subject, p, object
                             else: # given object not found
                                 pass
                         else: # object unbound
                             for o in subjectDictionary[p].keys():
-                                yield (subject, p, o), self.__contexts()
+                                yield subject, p, o
             else: # given subject not found
                 pass
         elif predicate!=ANY: # predicate is given, subject unbound
@@ -116,34 +162,46 @@ class Memory(Store):
                 if object!=ANY: # predicate+object is given, subject unbound
                     if object in predicateDictionary:
                         for s in predicateDictionary[object].keys():
-                            yield (s, predicate, object), self.__contexts()
+                            yield s, predicate, object
                     else: # given object not found
                         pass
                 else: # predicate is given, object+subject unbound
                     for o in predicateDictionary.keys():
                         for s in predicateDictionary[o].keys():
-                            yield (s, predicate, o), self.__contexts()
+                            yield s, predicate, o
         elif object!=ANY: # object is given, subject+predicate unbound
             osp = self.__osp
             if object in osp:
                 objectDictionary = osp[object]
                 for s in objectDictionary.keys():
                     for p in objectDictionary[s].keys():
-                        yield (s, p, object), self.__contexts()
+                        yield s, p, object
         else: # subject+predicate+object unbound
             spo = self.__spo
             for s in spo.keys():
                 subjectDictionary = spo[s]
                 for p in subjectDictionary.keys():
                     for o in subjectDictionary[p].keys():
-                        yield (s, p, o), self.__contexts()
+                        yield s, p, o
 
     def __len__(self, context=None):
-        #@@ optimize
-        i = 0
-        for triple in self.triples((None, None, None)):
-            i += 1
-        return i
+        return self.__count
+
+    def count(self, (subject, predicate, object), context=None):
+        """Number of triples matching, from the sizes of the indices """
+        if subject is None and predicate is None and object is None:
+            return self.__count
+        return _countNested(self.__spo, self.__pos, self.__osp,
+                            subject, predicate, object)
+
+    def uniqueSubjects(self, context=None):
+        return iter(self.__spo.keys())
+
+    def uniquePredicates(self, context=None):
+        return iter(self.__pos.keys())
+
+    def uniqueObjects(self, context=None):
+        return iter(self.__osp.keys())
 
     def bind(self, prefix, namespace):
         self.__prefix[namespace] = prefix
@@ -209,6 +267,11 @@ class IOMemory(Store):
 
         self.identifier = identifier or BNode()
 
+        # number of asserted triples and number of triples per context,
+        # indexed by [context] = count
+        self.__count = 0
+        self.__contextCount = {}
+
         self.__namespace = self.createPrefixMap()
         self.__prefix = self.createPrefixMap()
 
@@ -247,28 +310,25 @@ class IOMemory(Store):
         return (self.reverse[s], self.reverse[p], self.reverse[o])
 
     def uniqueSubjects(self, context=None):
-        if context is None:
-            index = self.spo
-        else:
-            index = self.cspo[context]
-        for si in index.keys():
-            yield self.forward[si]
+        return self.__unique(self.spo, self.cspo, context)
 
     def uniquePredicates(self, context=None):
-        if context is None:
-            index = self.pos
-        else:
-            index = self.cpos[context]
-        for pi in index.keys():
-            yield self.forward[pi]
+        return self.__unique(self.pos, self.cpos, context)
 
     def uniqueObjects(self, context=None):
-        if context is None:
-            index = self.osp
-        else:
-            index = self.cosp[context]
-        for oi in index.keys():
-            yield self.forward[oi]
+        return self.__unique(self.osp, self.cosp, context)
+
+    def __unique(self, index, contextIndex, context):
+        """The terms of the top level of index, or of contextIndex for
+        the context """
+        if context is not None and context != self:
+            ci = self.reverse.get(context, None)
+            if ci is None or ci not in contextIndex:
+                return
+            index = contextIndex[ci]
+        f = self.forward
+        for key in index.keys():
+            yield f[key]
 
     def createForward(self):
         return {}
@@ -287,10 +347,26 @@ class IOMemory(Store):
         Add a triple to the store.
         """
         Store.add(self, triple, context, quoted)
-        for triple, cg in self.triples(triple, context):
-            #triple is already in the store.
-            return
+        self.__add(triple, context, quoted)
 
+    def addN(self, quads):
+        """\
+        Add a sequence of (subject, predicate, object, context) quads.
+
+        Statements in a QuotedGraph context are added as quoted. Events
+        are only created if someone subscribed to TripleAddedEvent.
+        """
+        from rdflib.graph import QuotedGraph
+        dispatch = self.dispatcher.subscribed(TripleAddedEvent)
+        for s, p, o, c in quads:
+            assert c is not None, \
+                "Context associated with %s %s %s is None!" % (s, p, o)
+            if dispatch:
+                self.dispatcher.dispatch(
+                    TripleAddedEvent(triple=(s, p, o), context=c))
+            self.__add((s, p, o), c, isinstance(c, QuotedGraph))
+
+    def __add(self, triple, context, quoted):
         subject, predicate, object = triple
 
         f = self.forward
@@ -334,14 +410,21 @@ class IOMemory(Store):
         else:
             ci = r[context]
 
+        if self._hasNestedIndex(self.cspo, ci, si, pi, oi):
+            #triple is already in the store.
+            return
+
         # add dictionary entries for cspo[c][s][p][o] = 1,
         # cpos[c][p][o][s] = 1, and cosp[c][o][s][p] = 1, creating the
         # nested {} where they do not yet exits.
         self._setNestedIndex(self.cspo, ci, si, pi, oi)
         self._setNestedIndex(self.cpos, ci, pi, oi, si)
         self._setNestedIndex(self.cosp, ci, oi, si, pi)
+        self.__contextCount[ci] = self.__contextCount.get(ci, 0) + 1
 
         if not quoted:
+            if not self._hasNestedIndex(self.spo, si, pi, oi):
+                self.__count += 1
             self._setNestedIndex(self.spo, si, pi, oi, ci)
             self._setNestedIndex(self.pos, pi, oi, si, ci)
             self._setNestedIndex(self.osp, oi, si, pi, ci)
@@ -354,6 +437,13 @@ class IOMemory(Store):
         index[keys[-1]] = 1
 
 
+    def _hasNestedIndex(self, index, *keys):
+        for key in keys:
+            if not index.has_key(key):
+                return False
+            index = index[key]
+        return True
+
     def _removeNestedIndex(self, index, *keys):
         """ Remove context from the list of contexts in a nested index.
 
@@ -387,9 +477,10 @@ class IOMemory(Store):
                 contexts = list(self.contexts(triple))
                 for context in contexts:
                     ci = r[context]
-                    del self.cspo[ci][si][pi][oi]
-                    del self.cpos[ci][pi][oi][si]
-                    del self.cosp[ci][oi][si][pi]
+                    self._removeNestedIndex(self.cspo[ci], si, pi, oi)
+                    self._removeNestedIndex(self.cpos[ci], pi, oi, si)
+                    self._removeNestedIndex(self.cosp[ci], oi, si, pi)
+                    self.__contextCount[ci] -= 1
 
                     self._removeNestedIndex(self.spo, si, pi, oi, ci)
                     self._removeNestedIndex(self.pos, pi, oi, si, ci)
@@ -397,15 +488,18 @@ class IOMemory(Store):
                     # grr!! hafta ref-count these before you can collect them dumbass!
                     #del f[si], f[pi], f[oi]
                     #del r[subject], r[predicate], r[object]
+                if contexts:
+                    self.__count -= 1
         else:
             subject, predicate, object = triple
             ci = r.get(context, None)
             if ci:
                 for triple, cg in self.triples(triple, context):
                     si, pi, oi = self.identifierToInt(triple)
-                    del self.cspo[ci][si][pi][oi]
-                    del self.cpos[ci][pi][oi][si]
-                    del self.cosp[ci][oi][si][pi]
+                    self._removeNestedIndex(self.cspo[ci], si, pi, oi)
+                    self._removeNestedIndex(self.cpos[ci], pi, oi, si)
+                    self._removeNestedIndex(self.cosp[ci], oi, si, pi)
+                    self.__contextCount[ci] -= 1
 
                     try:
                         self._removeNestedIndex(self.spo, si, pi, oi, ci)
@@ -416,6 +510,9 @@ class IOMemory(Store):
                         # there will not be a triple in spo, pos or
                         # osp. So ignore any KeyErrors
                         pass
+                    else:
+                        if not self._hasNestedIndex(self.spo, si, pi, oi):
+                            self.__count -= 1
                     # TODO delete references to resources in self.forward/self.reverse
                     # that are not in use anymore...
 
@@ -424,6 +521,7 @@ class IOMemory(Store):
                 try:
                     ci = self.reverse[context]
                     del self.cspo[ci], self.cpos[ci], self.cosp[ci]
+                    self.__contextCount.pop(ci, None)
                 except KeyError:
                     # TODO: no exception when removing non-existant context?
                     pass
@@ -431,6 +529,18 @@ class IOMemory(Store):
 
     def triples(self, triple, context=None):
         """A generator over all the triples matching """
+        f = self.forward
+        for si, pi, oi in self.__match(triple, context):
+            yield (f[si], f[pi], f[oi]), ContextView(self, (si, pi, oi))
+
+    def triples_without_contexts(self, triple, context=None):
+        """A generator over all the triples matching, without contexts """
+        f = self.forward
+        for si, pi, oi in self.__match(triple, context):
+            yield f[si], f[pi], f[oi]
+
+    def __match(self, triple, context=None):
+        """A generator over the integer keys of the matching triples """
 
         if context is not None:
             if context == self:
@@ -468,28 +578,24 @@ class IOMemory(Store):
                     if subjectDictionary.has_key(pi):
                         if oi!= Any: # subject+predicate+object is given
                             if subjectDictionary[pi].has_key(oi):
-                                ss, pp, oo = self.intToIdentifier((si, pi, oi))
-                                yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                                yield si, pi, oi
                             else: # given object not found
                                 pass
                         else: # subject+predicate is given, object unbound
                             for o in subjectDictionary[pi].keys():
-                                ss, pp, oo = self.intToIdentifier((si, pi, o))
-                                yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                                yield si, pi, o
                     else: # given predicate not found
                         pass
                 else: # subject given, predicate unbound
                     for p in subjectDictionary.keys():
                         if oi != Any: # object is given
                             if subjectDictionary[p].has_key(oi):
-                                ss, pp, oo = self.intToIdentifier((si, p, oi))
-                                yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                                yield si, p, oi
                             else: # given object not found
                                 pass
                         else: # object unbound
                             for o in subjectDictionary[p].keys():
-                                ss, pp, oo = self.intToIdentifier((si, p, o))
-                                yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                                yield si, p, o
             else: # given subject not found
                 pass
         elif pi != Any: # predicate is given, subject unbound
@@ -498,29 +604,25 @@ class IOMemory(Store):
                 if oi != Any: # predicate+object is given, subject unbound
                     if predicateDictionary.has_key(oi):
                         for s in predicateDictionary[oi].keys():
-                            ss, pp, oo = self.intToIdentifier((s, pi, oi))
-                            yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                            yield s, pi, oi
                     else: # given object not found
                         pass
                 else: # predicate is given, object+subject unbound
                     for o in predicateDictionary.keys():
                         for s in predicateDictionary[o].keys():
-                            ss, pp, oo = self.intToIdentifier((s, pi, o))
-                            yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                            yield s, pi, o
         elif oi != Any: # object is given, subject+predicate unbound
             if osp.has_key(oi):
                 objectDictionary = osp[oi]
                 for s in objectDictionary.keys():
                     for p in objectDictionary[s].keys():
-                        ss, pp, oo = self.intToIdentifier((s, p, oi))
-                        yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                        yield s, p, oi
         else: # subject+predicate+object unbound
             for s in spo.keys():
                 subjectDictionary = spo[s]
                 for p in subjectDictionary.keys():
                     for o in subjectDictionary[p].keys():
-                        ss, pp, oo = self.intToIdentifier((s, p, o))
-                        yield (ss, pp, oo), (c for c in self.contexts((ss, pp, oo)))
+                        yield s, p, o
 
     def __len__(self, context=None):
 
@@ -528,22 +630,128 @@ class IOMemory(Store):
             if context == self:
                 context = None
 
-        # TODO: for eff. implementation
-        count = 0
-        for triple, cg in self.triples((Any, Any, Any), context):
-            count += 1
-        return count
+        if context is None:
+            return self.__count
+        ci = self.reverse.get(context, None)
+        if ci is None:
+            return 0
+        return self.__contextCount.get(ci, 0)
+
+    def count(self, triple, context=None):
+        """Number of triples matching, from the sizes of the indices """
+        if context is not None:
+            if context == self:
+                context = None
+
+        subject, predicate, object = triple
+        if subject is None and predicate is None and object is None:
+            return self.__len__(context)
+
+        r = self.reverse
+        if context is None:
+            spo, pos, osp = self.spo, self.pos, self.osp
+        else:
+            ci = r.get(context, None)
+            if ci is None or ci not in self.cspo:
+                return 0
+            spo, pos, osp = self.cspo[ci], self.cpos[ci], self.cosp[ci]
+        try:
+            if subject is not None:
+                subject = r[subject]
+            if predicate is not None:
+                predicate = r[predicate]
+            if object is not None:
+                object = r[object]
+        except KeyError:
+            return 0
+        return _countNested(spo, pos, osp, subject, predicate, object)
 
     def contexts(self, triple=None):
         if triple:
             si, pi, oi = self.identifierToInt(triple)
-            for ci in self.spo[si][pi][oi]:
-                yield self.forward[ci]
+            for c in self._contextsOfInts(si, pi, oi):
+                yield c
         else:
             for ci in self.cspo.keys():
                 yield self.forward[ci]
 
+    def _contextsOfInts(self, si, pi, oi):
+        """ Generator over the contexts of an integer triple. """
+        try:
+            cis = self.spo[si][pi][oi].keys()
+        except KeyError:
+            # the triple is only quoted
+            return
+        f = self.forward
+        for ci in cis:
+            yield f[ci]
+
 
+class ContextView(object):
+    """
+    Iterable over the contexts of a triple yielded by IOMemory.triples.
+
+    The contexts are only looked up, by their integer keys, when the view
+    is iterated, so callers that ignore them pay nothing for them.
+    """
+
+    __slots__ = ('store', 'ints')
+
+    def __init__(self, store, ints):
+        self.store = store
+        self.ints = ints
+
+    def __iter__(self):
+        return self.store._contextsOfInts(*self.ints)
+
+
+def _removeNested(index, first, second, third):
+    """ Delete index[first][second][third], and the dictionaries it leaves
+    empty, so that the keys of each level are the terms in use. """
+    firstDictionary = index[first]
+    secondDictionary = firstDictionary[second]
+    del secondDictionary[third]
+    if not secondDictionary:
+        del firstDictionary[second]
+        if not firstDictionary:
+            del index[first]
+
+
+def _countNested(spo, pos, osp, subject, predicate, object):
+    """
+    Number of triples matching subject, predicate and object (None for any,
+    but not all None) in the nested spo, pos and osp indices, summing the
+    sizes of the innermost dictionaries instead of iterating the triples.
+    """
+    if subject is not None:
+        po = spo.get(subject)
+        if not po:
+            return 0
+        if predicate is not None:
+            o = po.get(predicate)
+            if not o:
+                return 0
+            if object is not None:
+                return int(object in o)
+            return len(o)
+        if object is not None:
+            p = osp.get(object, {}).get(subject)
+            if not p:
+                return 0
+            return len(p)
+        return sum([len(o) for o in po.itervalues()])
+    elif predicate is not None:
+        os = pos.get(predicate)
+        if not os:
+            return 0
+        if object is not None:
+            return len(os.get(object, ()))
+        return sum([len(s) for s in os.itervalues()])
+    else:
+        sp = osp.get(object)
+        if not sp:
+            return 0
+        return sum([len(p) for p in sp.itervalues()])
 
 
 import random
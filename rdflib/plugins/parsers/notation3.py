@@ -31,6 +31,7 @@ Copyright 2010, Gunnar A. Grimnes
 # Python standard libraries
 import types
 import sys
+import codecs
 import os
 import string
 import re
@@ -810,9 +811,60 @@ interesting = re.compile(r'[\\\r\n\"]')
 langcode = re.compile(r'[a-zA-Z0-9]+(-[a-zA-Z0-9]+)?')
 #"
 
+# For finding the ends of top level statements in a partly read document
+scanSpecial = re.compile(r'[.<#"(\[{)\]}]')
+scanIRI = re.compile(r'<[^>]*>')
+scanComment = re.compile(r'#[^\n]*\n')
+scanString = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+scanLongString = re.compile(r'"""(?:[^"\\]|\\.|"(?!""))*"""', re.S)
+
+def scanStatements(str, i, depth):
+    """Find where the top level statements read so far end.
+
+    Scans str from i, at bracket nesting depth, for a '.' outside of
+    any brackets, strings, IRIs and comments that is followed by white
+    space. Returns (end, i, depth): end is the index just after the last
+    such '.', or 0 if there is none, and the scan can be resumed at i
+    with depth once more text has been appended to str."""
+    end = 0
+    n = len(str)
+    while 1:
+        m = scanSpecial.search(str, i)
+        if m == None: return end, n, depth
+        i = m.start()
+        ch = str[i]
+        if ch in "([{":
+            depth = depth + 1
+            i = i + 1
+        elif ch in ")]}":
+            depth = depth - 1
+            i = i + 1
+        elif ch == ".":
+            if i + 1 >= n: return end, i, depth
+            i = i + 1
+            if depth == 0 and str[i] in " \t\r\n#":
+                end = i
+        else:
+            if ch == '"':
+                if i + 3 > n: return end, i, depth
+                if str[i:i+3] == '"""': m = scanLongString.match(str, i)
+                else: m = scanString.match(str, i)
+            elif ch == "<":
+                if i + 1 >= n: return end, i, depth
+                if str[i+1] == "=":
+                    i = i + 2
+                    continue
+                m = scanIRI.match(str, i)
+            else:
+                m = scanComment.match(str, i)
+            if m == None: return end, i, depth
+            i = m.end()
+
 
 
 class SinkParser:
+    chunkSize = 1 << 16     # Bytes read by loadStream at a time
+
     def __init__(self, store, openFormula=None, thisDoc="", baseURI=None,
                  genPrefix = "", flags="",
                  why=None):
@@ -888,7 +940,32 @@ class SinkParser:
         return self._formula
     
     def loadStream(self, stream):
-        return self.loadBuf(stream.read())   # Not ideal
+        """Parses a stream a chunk at a time and returns its top level formula
+
+        Only whole top level statements are fed to the parser, so the text
+        held in memory is bounded by the largest statement rather than by
+        the document."""
+        self.startDoc()
+
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buf = u""
+        i, depth = 0, 0
+        while 1:
+            octets = stream.read(self.chunkSize)
+            if isinstance(octets, unicode):
+                buf = buf + octets
+            else:
+                buf = buf + decoder.decode(octets, not octets)
+            if not octets: break
+            end, i, depth = scanStatements(buf, i, depth)
+            if end:
+                self.feed(buf[:end])
+                # keep character numbers relative to the rest of buf
+                self.startOfLine = self.startOfLine - end
+                buf = buf[end:]
+                i = i - end
+        self.feed(buf)
+        return self.endDoc()    # self._formula
 
     def loadBuf(self, buf):
         """Parses a buffer and returns its top level formula"""
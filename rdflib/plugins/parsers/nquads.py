@@ -0,0 +1,95 @@
+"""
+N-Quads parser for RDFLib: N-Triples lines with an optional fourth
+term naming the graph each triple belongs to.
+
+Usage::
+
+    g = ConjunctiveGraph()
+    g.parse("dump.nq", format="nquads")
+
+See http://sw.deri.org/2008/07/n-quads/ for details about the format.
+"""
+import re
+
+from rdflib.graph import Graph
+from rdflib.parser import Parser
+from rdflib.store import BATCH_SIZE, InternCache, default_context
+from rdflib.plugins.parsers.ntriples import ChunkedNTriplesParser, \
+     unquote, eol, line_uriref, line_nodeid, line_literal, line_litinfo
+
+
+r_quad_line = re.compile(
+    r'[ \t]*(?:' + line_uriref + '|' + line_nodeid + r')' +
+    r'[ \t]+' + line_uriref +
+    r'[ \t]+(?:' + line_uriref + '|' + line_nodeid + '|' +
+    line_literal + line_litinfo + r')' +
+    r'(?:[ \t]+(?:' + line_uriref + '|' + line_nodeid + r'))?' +
+    r'[ \t]*\.[ \t]*' + eol)
+
+
+class ChunkedNQuadsParser(ChunkedNTriplesParser):
+    """An N-Quads parser reading its input a chunk at a time.
+
+    Works like ChunkedNTriplesParser, but hands the sink (s, p, o, g)
+    quads through its quads method, g being None for triples in the
+    default graph.
+    """
+
+    r_line = r_quad_line
+
+    def statement(self, groups):
+        s, s_id, p, o, o_id, lit, lang, dtype, g, g_id = groups
+        if lit is not None:
+            lit = unquote(lit)
+        subject, predicate, object = self.triple(s, s_id, p, o, o_id,
+                                                 lit, lang, dtype)
+        if g is not None:
+            graph = self.uris.get(g) or self.uri(g)
+        elif g_id is not None:
+            graph = self.bnodes.get(g_id) or self.bnode(g_id)
+        else:
+            graph = None
+        return subject, predicate, object, graph
+
+    def flush(self, batch):
+        self.sink.quads(batch)
+
+
+class NQuadsSink(object):
+    """Adds quads to the store of graph, triples without a graph name
+    going to graph itself."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.store = graph.store
+        self.contexts = InternCache()
+
+    def quads(self, quads):
+        graph = default_context(self.graph)
+        store, contexts = self.store, self.contexts
+        def context(identifier):
+            if identifier is None:
+                return graph
+            c = contexts.get(identifier)
+            if c is None:
+                c = contexts[identifier] = Graph(store, identifier)
+            return c
+        store.addN((s, p, o, context(g)) for s, p, o, g in quads)
+
+
+class NQuadsParser(Parser):
+    """parser for the N-Quads format, often stored with the .nq extension
+
+    Quads are added to the store of the graph batch_size at a time, in
+    the context they name. Triples without a graph name are added to
+    the graph being parsed into."""
+
+    def __init__(self):
+        super(NQuadsParser, self).__init__()
+
+    def parse(self, source, sink, baseURI=None, batch_size=BATCH_SIZE, **args):
+        assert sink.store.context_aware
+        f = source.getByteStream()
+        parser = ChunkedNQuadsParser(NQuadsSink(sink), batch_size=batch_size)
+        parser.parse(f)
+        f.close()
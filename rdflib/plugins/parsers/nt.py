@@ -1,5 +1,7 @@
 from rdflib.parser import Parser
-from rdflib.plugins.parsers.ntriples import NTriplesParser
+from rdflib.store import BATCH_SIZE, add_triples
+from rdflib.plugins.parsers.ntriples import ChunkedNTriplesParser
+from rdflib.plugins.parsers.ntriples import ParallelNTriplesParser
 
 
 class NTSink(object):
@@ -9,19 +11,32 @@ class NTSink(object):
     def triple(self, s, p, o):
         self.graph.add((s, p, o))
 
+    def triples(self, triples):
+        add_triples(self.graph, triples)
+
 
 class NTParser(Parser):
     """parser for the ntriples format, often stored with the .nt extension
 
+    Triples are added to the graph batch_size at a time. Given a number
+    of workers, a local file is parsed by that many processes, e.g.
+    graph.parse("big.nt", format="nt", workers=4).
+
     See http://www.w3.org/TR/rdf-testcases/#ntriples"""
 
     def __init__(self):
         super(NTParser, self).__init__()
 
-    def parse(self, source, sink, baseURI=None):
+    def parse(self, source, sink, baseURI=None, batch_size=BATCH_SIZE,
+              workers=None):
         f = source.getByteStream() # TODO getCharacterStream?
-        parser = NTriplesParser(NTSink(sink))
+        if workers:
+            parser = ParallelNTriplesParser(NTSink(sink),
+                                            batch_size=batch_size,
+                                            workers=workers)
+        else:
+            parser = ChunkedNTriplesParser(NTSink(sink),
+                                           batch_size=batch_size)
         parser.parse(f)
         f.close()
 
-
@@ -13,6 +13,7 @@ Command line usage::
 # @@ fully empty document?
 """
 
+import os
 import re
 
 uriref = r'<([^:]+:[^\s"<>]+)>'
@@ -42,6 +43,7 @@ class Node(unicode): pass
 from rdflib.term import URIRef as URI
 from rdflib.term import BNode as bNode
 from rdflib.term import Literal
+from rdflib.store import BATCH_SIZE, INTERN_SIZE, InternCache
 
 class Sink(object):
    def __init__(self):
@@ -51,6 +53,10 @@ class Sink(object):
       self.length += 1
       print (s, p, o)
 
+   def triples(self, triples):
+      for s, p, o in triples:
+         self.triple(s, p, o)
+
 class ParseError(Exception): pass
 
 quot = {'t': '\t', 'n': '\n', 'r': '\r', '"': '"', '\\': '\\'}
@@ -231,6 +237,282 @@ class NTriplesParser(object):
          return Literal(lit, lang, dtype)
       return False
 
+# the patterns above, kept from matching across line ends
+eol = r'(?:\r\n|\r|\n)'
+line_uriref = r'<([^:\r\n]+:[^\s"<>]+)>'
+line_nodeid = r'_:([A-Za-z][A-Za-z0-9]*)'
+line_literal = r'"([^"\\\r\n]*(?:\\.[^"\\\r\n]*)*)"'
+line_litinfo = r'(?:@([a-z]+(?:-[a-z0-9]+)*)|\^\^' + line_uriref + r')?'
+
+r_triple_line = re.compile(
+   r'[ \t]*(?:' + line_uriref + '|' + line_nodeid + r')' +
+   r'[ \t]+' + line_uriref +
+   r'[ \t]+(?:' + line_uriref + '|' + line_nodeid + '|' +
+   line_literal + line_litinfo + r')' +
+   r'[ \t]*\.[ \t]*' + eol)
+r_empty_line = re.compile(r'[ \t]*(?:#[^\r\n]*)?' + eol)
+r_eol = re.compile(eol)
+
+class ChunkedNTriplesParser(object):
+   """An N-Triples parser reading its input a chunk at a time.
+
+   Each line is matched in place in the chunk with a single regular
+   expression, repeated IRIs and node IDs are interned, and the triples
+   are handed to the sink batch_size at a time through its triples
+   method. Accepts the same documents as NTriplesParser.
+
+   Usage::
+
+        p = ChunkedNTriplesParser(sink=MySink(), batch_size=10000)
+        sink = p.parse(f)
+   """
+
+   chunk_size = 1 << 16
+
+   # interned terms are forgotten when there are more of them than this
+   intern_size = INTERN_SIZE
+
+   # matches a line, with groups for the terms of the statement on it
+   r_line = r_triple_line
+
+   def __init__(self, sink=None, batch_size=BATCH_SIZE):
+      if sink is not None:
+         self.sink = sink
+      else: self.sink = Sink()
+      self.batch_size = batch_size
+      self.uris = InternCache(self.intern_size)
+      self.bnodes = InternCache(self.intern_size)
+
+   def parse(self, f):
+      """Parse f as an N-Triples file."""
+      if not hasattr(f, 'read'):
+         raise ParseError("Item to parse must be a file-like object.")
+
+      self.batch = []
+      buffer = ''
+      while True:
+         data = f.read(self.chunk_size)
+         if not data:
+            if buffer and not buffer.isspace():
+               raise ParseError("EOF in line")
+            break
+         buffer += data
+         end = max(buffer.rfind('\n'), buffer.rfind('\r')) + 1
+         if end:
+            self.parselines(buffer, 0, end)
+            buffer = buffer[end:]
+      if self.batch:
+         self.flush(self.batch)
+      self.batch = None
+      return self.sink
+
+   def parsestring(self, s):
+      """Parse s as an N-Triples string."""
+      if not isinstance(s, basestring):
+         raise ParseError("Item to parse must be a string instance.")
+      from cStringIO import StringIO
+      self.parse(StringIO(s))
+
+   def flush(self, batch):
+      self.sink.triples(batch)
+
+   def parselines(self, buffer, pos, end):
+      """Parse the complete lines in buffer[pos:end]."""
+      match_line = self.r_line.match
+      match_empty = r_empty_line.match
+      statement = self.statement
+      batch = self.batch
+      batch_size = self.batch_size
+      while pos < end:
+         m = match_line(buffer, pos, end)
+         if m is None:
+            m = match_empty(buffer, pos, end)
+            if m is None:
+               line_end = r_eol.search(buffer, pos, end)
+               raise ParseError("Invalid line: %r" %
+                                buffer[pos:line_end.start()])
+            pos = m.end()
+            continue
+         pos = m.end()
+
+         batch.append(statement(m.groups()))
+         if len(batch) >= batch_size:
+            self.flush(batch)
+            self.batch = batch = []
+
+   def statement(self, groups):
+      """Make the statement for the groups of a line matched by r_line."""
+      s, s_id, p, o, o_id, lit, lang, dtype = groups
+      if lit is not None:
+         lit = unquote(lit)
+      return self.triple(s, s_id, p, o, o_id, lit, lang, dtype)
+
+   def triple(self, s, s_id, p, o, o_id, lit, lang, dtype):
+      """Make the triple for the groups of r_triple_line, with the
+      literal unescaped, interning its IRIs and node IDs."""
+      uris, bnodes = self.uris, self.bnodes
+      if s is not None:
+         subject = uris.get(s) or self.uri(s)
+      else:
+         subject = bnodes.get(s_id) or self.bnode(s_id)
+      predicate = uris.get(p) or self.uri(p)
+      if o is not None:
+         object = uris.get(o) or self.uri(o)
+      elif o_id is not None:
+         object = bnodes.get(o_id) or self.bnode(o_id)
+      else:
+         if dtype is not None:
+            dtype = uris.get(dtype) or self.uri(dtype)
+         object = Literal(lit, lang or None, dtype)
+      return subject, predicate, object
+
+   def uri(self, s):
+      node = self.uris[s] = URI(uriquote(unquote(s)))
+      return node
+
+   def bnode(self, s):
+      node = self.bnodes[s] = bNode(s)
+      return node
+
+class ParallelNTriplesParser(ChunkedNTriplesParser):
+   """An N-Triples parser spreading the work over a pool of processes.
+
+   The file is split into byte ranges ending on line boundaries. Worker
+   processes match and unescape the lines of each range, and the terms
+   are made, interned and handed to the sink in this process, in
+   document order and batch_size at a time. Node IDs keep their labels,
+   so a node ID shared by lines in different ranges is the same BNode,
+   just as with the serial parsers.
+
+   Only named, seekable files can be split; anything else is parsed
+   serially in this process.
+
+   Usage::
+
+        p = ParallelNTriplesParser(sink=MySink(), workers=4)
+        sink = p.parse(open("big.nt", "rb"))
+   """
+
+   # ranges are about this many bytes long, but there are at least
+   # as many ranges as workers
+   range_size = 1 << 22
+
+   def __init__(self, sink=None, batch_size=BATCH_SIZE, workers=None):
+      super(ParallelNTriplesParser, self).__init__(sink, batch_size)
+      self.workers = workers
+
+   def parse(self, f):
+      """Parse f as an N-Triples file."""
+      if not hasattr(f, 'read'):
+         raise ParseError("Item to parse must be a file-like object.")
+
+      path = getattr(f, 'name', None)
+      if not (isinstance(path, basestring) and os.path.isfile(path)):
+         path = None
+      if path is None or not hasattr(f, 'seek'):
+         return super(ParallelNTriplesParser, self).parse(f)
+
+      from multiprocessing import Pool, cpu_count
+      workers = self.workers or cpu_count()
+      ranges = byte_ranges(f, max(workers,
+                                  file_size(f) // self.range_size))
+      self.batch = []
+      pool = Pool(workers)
+      try:
+         tasks = [(path, start, end) for start, end in ranges]
+         for rows in pool.imap(parse_range, tasks):
+            self.parserows(rows)
+         pool.close()
+      except:
+         pool.terminate()
+         raise
+      finally:
+         pool.join()
+      if self.batch:
+         self.flush(self.batch)
+      self.batch = None
+      return self.sink
+
+   def parserows(self, rows):
+      """Make the triples for rows of matched and unescaped lines."""
+      triple = self.triple
+      batch = self.batch
+      batch_size = self.batch_size
+      for row in rows:
+         batch.append(triple(*row))
+         if len(batch) >= batch_size:
+            self.flush(batch)
+            self.batch = batch = []
+
+def file_size(f):
+   f.seek(0, 2)
+   return f.tell()
+
+def byte_ranges(f, n):
+   """Split the seekable file f into at most n (start, end) byte ranges,
+   each but the last ending just after an end of line."""
+   size = file_size(f)
+   ranges = []
+   start = 0
+   for i in xrange(1, n):
+      pos = max(size * i // n, start)
+      f.seek(pos)
+      while True:
+         data = f.read(bufsiz)
+         if not data:
+            pos = size
+            break
+         eol = r_eol.search(data)
+         if eol is not None:
+            pos += eol.start() + 1
+            break
+         pos += len(data)
+      if pos >= size:
+         break
+      if pos > start:
+         ranges.append((start, pos))
+         start = pos
+   ranges.append((start, size))
+   return ranges
+
+def parse_range(args):
+   """Match the lines in a byte range of a file, for a worker process.
+
+   Returns the groups of r_triple_line for each triple, with the
+   literal unescaped."""
+   path, start, end = args
+   f = open(path, 'rb')
+   try:
+      f.seek(start)
+      buffer = f.read(end - start)
+   finally:
+      f.close()
+   end = max(buffer.rfind('\n'), buffer.rfind('\r')) + 1
+   if not buffer[end:].isspace() and buffer[end:]:
+      raise ParseError("EOF in line")
+
+   match_triple = r_triple_line.match
+   match_empty = r_empty_line.match
+   rows = []
+   pos = 0
+   while pos < end:
+      m = match_triple(buffer, pos, end)
+      if m is None:
+         m = match_empty(buffer, pos, end)
+         if m is None:
+            line_end = r_eol.search(buffer, pos, end)
+            raise ParseError("Invalid line: %r" %
+                             buffer[pos:line_end.start()])
+         pos = m.end()
+         continue
+      pos = m.end()
+
+      s, s_id, p, o, o_id, lit, lang, dtype = m.groups()
+      if lit is not None:
+         lit = unquote(lit)
+      rows.append((s, s_id, p, o, o_id, lit, lang, dtype))
+   return rows
+
 def parseURI(uri):
    import urllib
    parser = NTriplesParser()
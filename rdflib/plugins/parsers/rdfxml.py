@@ -38,6 +38,7 @@ from urlparse import urljoin, urldefrag
 
 from rdflib.namespace import RDF, is_ncname
 from rdflib.term import URIRef
+from rdflib.store import BATCH_SIZE, INTERN_SIZE, InternCache, add_triples
 from rdflib.term import BNode
 from rdflib.term import Literal
 from rdflib.exceptions import ParserError, Error
@@ -45,20 +46,42 @@ from rdflib.parser import Parser
 
 
 RDFNS = RDF
+RDFNS_STR = str(RDFNS)
+
+# Namespace attribute lookups are slow, so the terms used while parsing
+# are looked up once here.
+RDF_RDF = RDF.RDF
+RDF_ID = RDF.ID
+RDF_about = RDF.about
+RDF_parseType = RDF.parseType
+RDF_resource = RDF.resource
+RDF_nodeID = RDF.nodeID
+RDF_datatype = RDF.datatype
+RDF_Description = RDF.Description
+RDF_li = RDF.li
+RDF_type = RDF.type
+RDF_nil = RDF.nil
+RDF_first = RDF.first
+RDF_rest = RDF.rest
+RDF_XMLLiteral = RDF.XMLLiteral
+RDF_Statement = RDF.Statement
+RDF_subject = RDF.subject
+RDF_predicate = RDF.predicate
+RDF_object = RDF.object
 
 # http://www.w3.org/TR/rdf-syntax-grammar/#eventterm-attribute-URI
 # A mapping from unqualified terms to there qualified version.
-UNQUALIFIED = {"about" : RDF.about,
-               "ID" : RDF.ID,
-               "type" : RDF.type,
-               "resource": RDF.resource,
-               "parseType": RDF.parseType}
+UNQUALIFIED = {"about" : RDF_about,
+               "ID" : RDF_ID,
+               "type" : RDF_type,
+               "resource": RDF_resource,
+               "parseType": RDF_parseType}
 
 # http://www.w3.org/TR/rdf-syntax-grammar/#coreSyntaxTerms
-CORE_SYNTAX_TERMS = [RDF.RDF, RDF.ID, RDF.about, RDF.parseType, RDF.resource, RDF.nodeID, RDF.datatype]
+CORE_SYNTAX_TERMS = [RDF_RDF, RDF_ID, RDF_about, RDF_parseType, RDF_resource, RDF_nodeID, RDF_datatype]
 
 # http://www.w3.org/TR/rdf-syntax-grammar/#syntaxTerms
-SYNTAX_TERMS = CORE_SYNTAX_TERMS + [RDF.Description, RDF.li]
+SYNTAX_TERMS = CORE_SYNTAX_TERMS + [RDF_Description, RDF_li]
 
 # http://www.w3.org/TR/rdf-syntax-grammar/#oldTerms
 OLD_TERMS = [
@@ -66,12 +89,13 @@ OLD_TERMS = [
     URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#aboutEachPrefix"), 
     URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#bagID")]
 
-NODE_ELEMENT_EXCEPTIONS = CORE_SYNTAX_TERMS + [RDF.li,] + OLD_TERMS
-NODE_ELEMENT_ATTRIBUTES = [RDF.ID, RDF.nodeID, RDF.about]
+# Sets, as these are tested against every element and attribute name.
+NODE_ELEMENT_EXCEPTIONS = frozenset(CORE_SYNTAX_TERMS + [RDF_li,] + OLD_TERMS)
+NODE_ELEMENT_ATTRIBUTES = frozenset([RDF_ID, RDF_nodeID, RDF_about])
 
-PROPERTY_ELEMENT_EXCEPTIONS = CORE_SYNTAX_TERMS + [RDF.Description,] + OLD_TERMS
-PROPERTY_ATTRIBUTE_EXCEPTIONS = CORE_SYNTAX_TERMS + [RDF.Description, RDF.li] + OLD_TERMS
-PROPERTY_ELEMENT_ATTRIBUTES = [RDF.ID, RDF.resource, RDF.nodeID]
+PROPERTY_ELEMENT_EXCEPTIONS = frozenset(CORE_SYNTAX_TERMS + [RDF_Description,] + OLD_TERMS)
+PROPERTY_ATTRIBUTE_EXCEPTIONS = frozenset(CORE_SYNTAX_TERMS + [RDF_Description, RDF_li] + OLD_TERMS)
+PROPERTY_ELEMENT_ATTRIBUTES = frozenset([RDF_ID, RDF_resource, RDF_nodeID])
 
 XMLNS = "http://www.w3.org/XML/1998/namespace"
 BASE = (XMLNS, "base")
@@ -94,6 +118,9 @@ class ElementHandler(object):
                  'base', 'subject', 'predicate', 'object',
                  'list', 'language', 'datatype', 'declared', 'data']
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.start = None
         self.char = None
         self.end = None
@@ -101,6 +128,7 @@ class ElementHandler(object):
         self.id = None
         self.base = None
         self.subject = None
+        self.predicate = None
         self.object = None
         self.list = None
         self.language = None
@@ -114,9 +142,18 @@ class ElementHandler(object):
 
 
 class RDFXMLHandler(handler.ContentHandler):
+    """SAX handler adding the triples of an RDF/XML document to store.
+
+    Triples are added batch_size at a time. Resolved IRIs and converted
+    element and attribute names are cached, up to intern_size of each,
+    and element handlers are reused as elements end.
+    """
 
-    def __init__(self, store):
+    intern_size = INTERN_SIZE
+
+    def __init__(self, store, batch_size=BATCH_SIZE):
         self.store = store
+        self.batch_size = batch_size
         self.preserve_bnode_ids = False
         self.reset()
 
@@ -129,6 +166,12 @@ class RDFXMLHandler(handler.ContentHandler):
         self.bnode = {}
         self._ns_contexts = [{}] # contains uri -> prefix dicts
         self._current_context = self._ns_contexts[-1]
+        self.triples = []
+        self.iris = InternCache(self.intern_size) # (base, uri) -> URIRef
+        self.names = InternCache(self.intern_size) # element name -> URIRef
+        # attribute name -> URIRef, None if ignored
+        self.attnames = InternCache(self.intern_size)
+        self.frames = [] # ended element handlers, ready for reuse
 
     # ContentHandler methods
 
@@ -138,6 +181,9 @@ class RDFXMLHandler(handler.ContentHandler):
     def startDocument(self):
         pass
 
+    def endDocument(self):
+        self.flush()
+
     def startPrefixMapping(self, prefix, namespace):
         self._ns_contexts.append(self._current_context.copy())
         self._current_context[namespace] = prefix
@@ -149,9 +195,13 @@ class RDFXMLHandler(handler.ContentHandler):
 
     def startElementNS(self, name, qname, attrs):
         stack = self.stack
-        stack.append(ElementHandler())
-        current = self.current
-        parent = self.parent
+        frames = self.frames
+        if frames:
+            stack.append(frames.pop())
+        else:
+            stack.append(ElementHandler())
+        current = stack[-2]
+        parent = stack[-3]
         base = attrs.get(BASE, None)
         if base is not None:
             base, frag = urldefrag(base)
@@ -178,7 +228,9 @@ class RDFXMLHandler(handler.ContentHandler):
 
     def endElementNS(self, name, qname):
         self.current.end(name, qname)
-        self.stack.pop()
+        frame = self.stack.pop()
+        frame.reset()
+        self.frames.append(frame)
 
     def characters(self, content):
         char = self.current.char
@@ -191,11 +243,24 @@ class RDFXMLHandler(handler.ContentHandler):
     def processingInstruction(self, target, data):
         pass
 
+    def add(self, triple):
+        triples = self.triples
+        triples.append(triple)
+        if len(triples) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Add the triples collected so far to the store."""
+        triples = self.triples
+        if triples:
+            self.triples = []
+            add_triples(self.store, triples)
+
     def add_reified(self, sid, (s, p, o)):
-        self.store.add((sid, RDF.type, RDF.Statement))
-        self.store.add((sid, RDF.subject, s))
-        self.store.add((sid, RDF.predicate, p))
-        self.store.add((sid, RDF.object, o))
+        self.add((sid, RDF_type, RDF_Statement))
+        self.add((sid, RDF_subject, s))
+        self.add((sid, RDF_predicate, p))
+        self.add((sid, RDF_object, o))
 
     def error(self, message):
         locator = self.locator
@@ -222,33 +287,46 @@ class RDFXMLHandler(handler.ContentHandler):
     parent = property(get_parent)
 
     def absolutize(self, uri):
-        result = urljoin(self.current.base, uri, allow_fragments=1)
-        if uri and uri[-1]=="#" and result[-1]!="#":
-            result = "%s#" % result
-        return URIRef(result)
+        base = self.stack[-2].base
+        key = (base, uri)
+        iris = self.iris
+        result = iris.get(key)
+        if result is None:
+            result = urljoin(base, uri, allow_fragments=1)
+            if uri and uri[-1]=="#" and result[-1]!="#":
+                result = "%s#" % result
+            result = iris[key] = URIRef(result)
+        return result
 
     def convert(self, name, qname, attrs):
-        if name[0] is None:
-            name = URIRef(name[1])
-        else:
-            name = URIRef("".join(name))
+        names = self.names
+        converted = names.get(name)
+        if converted is None:
+            if name[0] is None:
+                converted = names[name] = URIRef(name[1])
+            else:
+                converted = names[name] = URIRef("".join(name))
         atts = {}
+        attnames = self.attnames
         for (n, v) in attrs.items(): #attrs._attrs.iteritems(): #
-            if n[0] is None:
-                att = URIRef(n[1])
-            else:
-                att = URIRef("".join(n))
-            if att.startswith(XMLNS) or att[0:3].lower()=="xml":
-                pass
-            elif att in UNQUALIFIED:
-                #if not RDFNS[att] in atts:
-                atts[RDFNS[att]] = v
+            if n in attnames:
+                att = attnames[n]
             else:
-                atts[URIRef(att)] = v
-        return name, atts
+                if n[0] is None:
+                    att = URIRef(n[1])
+                else:
+                    att = URIRef("".join(n))
+                if att.startswith(XMLNS) or att[0:3].lower()=="xml":
+                    att = None
+                elif att in UNQUALIFIED:
+                    att = RDFNS[att]
+                attnames[n] = att
+            if att is not None:
+                atts[att] = v
+        return converted, atts
 
     def document_element_start(self, name, qname, attrs):
-        if name[0] and URIRef("".join(name)) == RDF.RDF:
+        if name[0] and URIRef("".join(name)) == RDF_RDF:
             next = self.next
             next.start = self.node_element_start
             next.end = self.node_element_end
@@ -270,21 +348,21 @@ class RDFXMLHandler(handler.ContentHandler):
         if name in NODE_ELEMENT_EXCEPTIONS:
             self.error("Invalid node element URI: %s" % name)
 
-        if RDF.ID in atts:
-            if RDF.about in atts or RDF.nodeID in atts:
+        if RDF_ID in atts:
+            if RDF_about in atts or RDF_nodeID in atts:
                 self.error("Can have at most one of rdf:ID, rdf:about, and rdf:nodeID")
 
-            id = atts[RDF.ID]
+            id = atts[RDF_ID]
             if not is_ncname(id):
                 self.error("rdf:ID value is not a valid NCName: %s" % id)
             subject = absolutize("#%s" % id)
             if subject in self.ids:
                 self.error("two elements cannot use the same ID: '%s'" % subject)
             self.ids[subject] = 1 # IDs can only appear once within a document
-        elif RDF.nodeID in atts:
-            if RDF.ID in atts or RDF.about in atts:
+        elif RDF_nodeID in atts:
+            if RDF_ID in atts or RDF_about in atts:
                 self.error("Can have at most one of rdf:ID, rdf:about, and rdf:nodeID")
-            nodeID = atts[RDF.nodeID]
+            nodeID = atts[RDF_nodeID]
             if not is_ncname(nodeID):
                 self.error("rdf:nodeID value is not a valid NCName: %s" % nodeID)
             if self.preserve_bnode_ids is False:
@@ -295,27 +373,27 @@ class RDFXMLHandler(handler.ContentHandler):
                     self.bnode[nodeID] = subject
             else:
                 subject = BNode(nodeID)
-        elif RDF.about in atts:
-            if RDF.ID in atts or RDF.nodeID in atts:
+        elif RDF_about in atts:
+            if RDF_ID in atts or RDF_nodeID in atts:
                 self.error("Can have at most one of rdf:ID, rdf:about, and rdf:nodeID")
-            subject = absolutize(atts[RDF.about])
+            subject = absolutize(atts[RDF_about])
         else:
             subject = BNode()
 
-        if name!=RDF.Description: # S1
-            self.store.add((subject, RDF.type, absolutize(name)))
+        if name!=RDF_Description: # S1
+            self.add((subject, RDF_type, absolutize(name)))
 
         language = current.language
         for att in atts:
-            if not att.startswith(str(RDFNS)):
+            if not att.startswith(RDFNS_STR):
                 predicate = absolutize(att)
                 try:
                     object = Literal(atts[att], language)
                 except Error, e:
                     self.error(e.msg)
-            elif att==RDF.type: #S2
-                predicate = RDF.type
-                object = absolutize(atts[RDF.type])
+            elif att==RDF_type: #S2
+                predicate = RDF_type
+                object = absolutize(atts[RDF_type])
             elif att in NODE_ELEMENT_ATTRIBUTES:
                 continue
             elif att in PROPERTY_ATTRIBUTE_EXCEPTIONS: #S3
@@ -327,7 +405,7 @@ class RDFXMLHandler(handler.ContentHandler):
                     object = Literal(atts[att], language)
                 except Error, e:
                     self.error(e.msg)
-            self.store.add((subject, predicate, object))
+            self.add((subject, predicate, object))
 
         current.subject = subject
 
@@ -344,16 +422,16 @@ class RDFXMLHandler(handler.ContentHandler):
         current.data = None
         current.list = None
 
-        if not name.startswith(str(RDFNS)):
+        if not name.startswith(RDFNS_STR):
             current.predicate = absolutize(name)
-        elif name==RDF.li:
+        elif name==RDF_li:
             current.predicate = current.next_li()
         elif name in PROPERTY_ELEMENT_EXCEPTIONS:
             self.error("Invalid property element URI: %s" % name)
         else:
             current.predicate = absolutize(name)
 
-        id = atts.get(RDF.ID, None)
+        id = atts.get(RDF_ID, None)
         if id is not None:
             if not is_ncname(id):
                 self.error("rdf:ID value is not a value NCName: %s" % id)
@@ -361,9 +439,9 @@ class RDFXMLHandler(handler.ContentHandler):
         else:
             current.id = None
 
-        resource = atts.get(RDF.resource, None)
-        nodeID = atts.get(RDF.nodeID, None)
-        parse_type = atts.get(RDF.parseType, None)
+        resource = atts.get(RDF_resource, None)
+        nodeID = atts.get(RDF_nodeID, None)
+        parse_type = atts.get(RDF_parseType, None)
         if resource is not None and nodeID is not None:
             self.error("Property element cannot have both rdf:nodeID and rdf:resource")
         if resource is not None:
@@ -387,7 +465,7 @@ class RDFXMLHandler(handler.ContentHandler):
         else:
             if parse_type is not None:
                 for att in atts:
-                    if att!=RDF.parseType and att!=RDF.ID:
+                    if att!=RDF_parseType and att!=RDF_ID:
                         self.error("Property attr '%s' now allowed here" % att)
                 if parse_type=="Resource":
                     current.subject = object = BNode()
@@ -396,13 +474,13 @@ class RDFXMLHandler(handler.ContentHandler):
                     next.end = self.property_element_end
                 elif parse_type=="Collection":
                     current.char = None
-                    object = current.list = RDF.nil #BNode()#self.parent.subject
+                    object = current.list = RDF_nil #BNode()#self.parent.subject
                     next.start = self.node_element_start
                     next.end = self.list_node_element_end
                 else: #if parse_type=="Literal":
                      # All other values are treated as Literal
                      # See: http://www.w3.org/TR/rdf-syntax-grammar/#parseTypeOtherPropertyElt
-                    object = Literal("", datatype=RDF.XMLLiteral)
+                    object = Literal("", datatype=RDF_XMLLiteral)
                     current.char = self.literal_element_char
                     current.declared = {}
                     next.start = self.literal_element_start
@@ -416,14 +494,14 @@ class RDFXMLHandler(handler.ContentHandler):
                 next.start = self.node_element_start
                 next.end = self.node_element_end
 
-        datatype = current.datatype = atts.get(RDF.datatype, None)
+        datatype = current.datatype = atts.get(RDF_datatype, None)
         language = current.language
         if datatype is not None:
             # TODO: check that there are no atts other than datatype and id
             datatype = absolutize(datatype)
         else:
             for att in atts:
-                if not att.startswith(str(RDFNS)):
+                if not att.startswith(RDFNS_STR):
                     predicate = absolutize(att)
                 elif att in PROPERTY_ELEMENT_ATTRIBUTES:
                     continue
@@ -432,7 +510,7 @@ class RDFXMLHandler(handler.ContentHandler):
                 else:
                     predicate = absolutize(att)
 
-                if att==RDF.type:
+                if att==RDF_type:
                     o = URIRef(atts[att])
                 else:
                     if datatype is not None:
@@ -441,7 +519,7 @@ class RDFXMLHandler(handler.ContentHandler):
 
                 if object is None:
                     object = BNode()
-                self.store.add((object, predicate, o))
+                self.add((object, predicate, o))
         if object is None:
             current.data = ""
             current.object = None
@@ -463,10 +541,10 @@ class RDFXMLHandler(handler.ContentHandler):
             current.object = Literal(current.data, literalLang, current.datatype)
             current.data = None
         if self.next.end==self.list_node_element_end:
-            if current.object!=RDF.nil:
-                self.store.add((current.list, RDF.rest, RDF.nil))
+            if current.object!=RDF_nil:
+                self.add((current.list, RDF_rest, RDF_nil))
         if current.object is not None:
-            self.store.add((self.parent.subject, current.predicate, current.object))
+            self.add((self.parent.subject, current.predicate, current.object))
             if current.id is not None:
                 self.add_reified(current.id, (self.parent.subject,
                                  current.predicate, current.object))
@@ -474,20 +552,20 @@ class RDFXMLHandler(handler.ContentHandler):
 
     def list_node_element_end(self, name, qname):
         current = self.current
-        if self.parent.list==RDF.nil:
+        if self.parent.list==RDF_nil:
             list = BNode()
             # Removed between 20030123 and 20030905
-            #self.store.add((list, RDF.type, LIST))
+            #self.add((list, RDF_type, LIST))
             self.parent.list = list
-            self.store.add((self.parent.list, RDF.first, current.subject))
+            self.add((self.parent.list, RDF_first, current.subject))
             self.parent.object = list
             self.parent.char = None
         else:
             list = BNode()
             # Removed between 20030123 and 20030905
-            #self.store.add((list, RDF.type, LIST))
-            self.store.add((self.parent.list, RDF.rest, list))
-            self.store.add((list, RDF.first, current.subject))
+            #self.add((list, RDF_type, LIST))
+            self.add((self.parent.list, RDF_rest, list))
+            self.add((list, RDF_first, current.subject))
             self.parent.list = list
 
     def literal_element_start(self, name, qname, attrs):
@@ -536,7 +614,7 @@ class RDFXMLHandler(handler.ContentHandler):
         self.parent.object += self.current.object + end
 
 
-def create_parser(target, store):
+def create_parser(target, store, batch_size=BATCH_SIZE):
     parser = make_parser()
     try:
         # Workaround for bug in expatreader.py. Needed when
@@ -545,7 +623,7 @@ def create_parser(target, store):
     except AttributeError:
         pass # Not present in Jython (at least)
     parser.setFeature(handler.feature_namespaces, 1)
-    rdfxml = RDFXMLHandler(store)
+    rdfxml = RDFXMLHandler(store, batch_size)
     rdfxml.setDocumentLocator(target)
     #rdfxml.setDocumentLocator(_Locator(self.url, self.parser))
     parser.setContentHandler(rdfxml)
@@ -558,8 +636,8 @@ class RDFXMLParser(Parser):
     def __init__(self):
         pass
 
-    def parse(self, source, sink, **args):
-        self._parser = create_parser(source, sink)
+    def parse(self, source, sink, batch_size=BATCH_SIZE, **args):
+        self._parser = create_parser(source, sink, batch_size)
         content_handler = self._parser.getContentHandler()
         preserve_bnode_ids = args.get("preserve_bnode_ids", None)
         if preserve_bnode_ids is not None:
@@ -567,7 +645,12 @@ class RDFXMLParser(Parser):
         # We're only using it once now
         #content_handler.reset()
         #self._parser.reset()
-        self._parser.parse(source)
+        try:
+            self._parser.parse(source)
+        finally:
+            # keep the triples read before any error, as adding them
+            # one at a time did
+            content_handler.flush()
 
 
 
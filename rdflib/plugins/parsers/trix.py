@@ -36,6 +36,7 @@ from rdflib.term import URIRef
 from rdflib.term import BNode
 from rdflib.term import Literal
 from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.store import BATCH_SIZE, INTERN_SIZE, InternCache
 from rdflib.exceptions import ParserError
 from rdflib.parser import Parser
 
@@ -46,6 +47,8 @@ from xml.sax.handler import ErrorHandler
 
 TRIXNS=Namespace("http://www.w3.org/2004/03/trix/trix-1/")
 XMLNS=Namespace("http://www.w3.org/XML/1998/namespace")
+TRIXNS_STR=str(TRIXNS)
+XML_LANG=(unicode(XMLNS), u"lang")
 
 class TriXHandler(handler.ContentHandler):
     """An Sax Handler for TriX. See http://swdev.nokia.com/trix/TriX.html"""
@@ -79,7 +82,7 @@ class TriXHandler(handler.ContentHandler):
 
     def startElementNS(self, name, qname, attrs):
     
-        if name[0]!=str(TRIXNS):
+        if name[0]!=TRIXNS_STR:
             self.error("Only elements in the TriX namespace are allowed. %s!=%s"%(name[0],TRIXNS))
 
         if name[1]=="TriX":
@@ -122,12 +125,12 @@ class TriXHandler(handler.ContentHandler):
                 self.datatype=None
 
                 try:
-                    self.lang=attrs.getValue((unicode(XMLNS), u"lang"))
+                    self.lang=attrs.getValue(XML_LANG)
                 except:
                     # language not required - ignore
                     pass
                 try: 
-                    self.datatype=attrs.getValueByQName(u"datatype")
+                    self.datatype=self.uri(attrs.getValueByQName(u"datatype"))
                 except KeyError:
                     self.error("No required attribute 'datatype'")
             else:
@@ -139,7 +142,7 @@ class TriXHandler(handler.ContentHandler):
                 self.lang=None
                 self.datatype=None
                 try:
-                    self.lang=attrs.getValue((unicode(XMLNS), u"lang"))
+                    self.lang=attrs.getValue(XML_LANG)
                 except:
                     # language not required - ignore
                     pass
@@ -165,15 +168,15 @@ class TriXHandler(handler.ContentHandler):
 
     
     def endElementNS(self, name, qname):
-        if name[0]!=str(TRIXNS):
+        if name[0]!=TRIXNS_STR:
             self.error("Only elements in the TriX namespace are allowed. %s!=%s"%(name[0], TRIXNS))
 
         if name[1]=="uri":
             if self.state==3:
-                self.graph=Graph(store=self.store.store, identifier=URIRef(self.chars.strip()))
+                self.graph=Graph(store=self.store.store, identifier=self.uri(self.chars.strip()))
                 self.state=2
             elif self.state==4:
-                self.triple+=[URIRef(self.chars.strip())]
+                self.triple+=[self.uri(self.chars.strip())]
             else:
                 self.error("Illegal internal self.state - This should never happen if the SAX parser ensures XML syntax correctness")
 
@@ -197,7 +200,7 @@ class TriXHandler(handler.ContentHandler):
                 if len(self.triple)!=3:
                     self.error("Triple has wrong length, got %d elements: %s"%(len(self.triple),self.triple))
 
-                self.graph.add(self.triple)
+                self.add(self.triple)
                 #self.store.store.add(self.triple,context=self.graph)
                 #self.store.addN([self.triple+[self.graph]])
                 self.state=2
@@ -215,6 +218,12 @@ class TriXHandler(handler.ContentHandler):
             self.error("Unexpected close element")
 
 
+    def uri(self, value):
+        return URIRef(value)
+
+    def add(self, triple):
+        self.graph.add(triple)
+
     def get_bnode(self,label):
         if self.preserve_bnode_ids:
             bn=BNode(label)
@@ -245,29 +254,85 @@ class TriXHandler(handler.ContentHandler):
         raise ParserError(info + message)
 
 
-def create_parser(store):
+class StreamingTriXHandler(TriXHandler):
+    """A TriX handler adding each triple to the store as it is read.
+
+    Triples are added with their graph batch_size at a time, and up to
+    intern_size distinct URIs are kept so repeated ones are shared.
+    Apart from the blank node labels seen, memory use does not grow
+    with the size of the document.
+    """
+
+    intern_size = INTERN_SIZE
+
+    def __init__(self, store, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        TriXHandler.__init__(self, store)
+
+    def reset(self):
+        TriXHandler.reset(self)
+        # triples before the first graph is named go where
+        # ConjunctiveGraph.add would put them
+        self.graph = self.store.default_context
+        self.quads = []
+        self.uris = InternCache(self.intern_size)
+
+    def endDocument(self):
+        self.flush()
+
+    def uri(self, value):
+        uris = self.uris
+        uri = uris.get(value)
+        if uri is None:
+            uri = uris[value] = URIRef(value)
+        return uri
+
+    def add(self, (s, p, o)):
+        quads = self.quads
+        quads.append((s, p, o, self.graph))
+        if len(quads) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Add the triples read so far to the store."""
+        quads = self.quads
+        if quads:
+            self.quads = []
+            self.store.addN(quads)
+
+
+def create_parser(store, streaming=True, batch_size=BATCH_SIZE):
     parser = make_parser()
     # Workaround for bug in expatreader.py. Needed when
     # expatreader is trying to guess a prefix.
     parser.start_namespace_decl("xml", "http://www.w3.org/XML/1998/namespace")
     parser.setFeature(handler.feature_namespaces, 1)
-    trix = TriXHandler(store)
+    if streaming:
+        trix = StreamingTriXHandler(store, batch_size)
+    else:
+        trix = TriXHandler(store)
     parser.setContentHandler(trix)
     parser.setErrorHandler(ErrorHandler())
     return parser
 
 
 class TriXParser(Parser):
-    """A parser for TriX. See http://swdev.nokia.com/trix/TriX.html"""
+    """A parser for TriX. See http://swdev.nokia.com/trix/TriX.html
+
+    Triples are added to the store batch_size at a time as they are
+    read. Passing streaming=False adds them one at a time through a
+    Graph per <graph> element instead.
+    """
 
     def __init__(self):
         pass
 
-    def parse(self, source, sink, **args):
+    def parse(self, source, sink, streaming=True, batch_size=BATCH_SIZE,
+              **args):
         assert sink.store.context_aware
         g=ConjunctiveGraph(store=sink.store)
         
-        self._parser = create_parser(g)
+        self._parser = create_parser(g, streaming, batch_size)
         content_handler = self._parser.getContentHandler()
         preserve_bnode_ids = args.get("preserve_bnode_ids", None)
         if preserve_bnode_ids is not None:
@@ -275,7 +340,11 @@ class TriXParser(Parser):
         # We're only using it once now
         #content_handler.reset()
         #self._parser.reset()
-        self._parser.parse(source)
+        try:
+            self._parser.parse(source)
+        finally:
+            if streaming:
+                content_handler.flush()
 
 
 
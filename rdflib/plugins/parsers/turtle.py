@@ -0,0 +1,433 @@
+"""
+A Turtle parser for RDFLib.
+
+Plain Turtle is tokenized with a single regular expression and its
+triples are added straight to the graph, batch_size at a time, so any
+store can be parsed into, formula aware or not. When a statement uses
+syntax that is N3 rather than Turtle (formulae, paths, keywords and so
+on), the rest of the document is handed over to the N3 parser, which
+needs a formula aware store.
+
+Usage::
+
+    g = Graph()
+    g.parse("data.ttl", format="turtle")
+
+See http://www.w3.org/TeamSubmission/turtle/ for details about the format.
+"""
+import codecs
+import re
+from decimal import Decimal
+
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.namespace import RDF
+from rdflib.graph import ConjunctiveGraph
+from rdflib.store import BATCH_SIZE, INTERN_SIZE, InternCache
+from rdflib.exceptions import ParserError
+from rdflib.parser import Parser
+from rdflib.plugins.parsers.notation3 import SinkParser, RDFSink, \
+     scanStatements, join, _notQNameChars, _notNameChars, \
+     BOOLEAN_DATATYPE, DECIMAL_DATATYPE, DOUBLE_DATATYPE, INTEGER_DATATYPE
+
+
+# The names and numbers are those of the N3 parser, so that both
+# parsers read a Turtle document the same way.
+_name = '[^%s]' % re.escape(_notNameChars)
+_nameStart = '[^%s]' % re.escape(_notNameChars + "0123456789-+")
+_notQName = '[%s]' % re.escape(_notQNameChars)
+
+r_token = re.compile(
+    r'(?P<space>(?:[ \t\r\n]+|#[^\n]*)+)'
+    r'|(?P<iri><([^>\s]*)>)'
+    r'|(?P<string>(?:"""((?:[^"\\]|\\.|"(?!""))*)"""|"((?:[^"\\\n]|\\.)*)")'
+    r'(?:@([a-zA-Z0-9]+(?:-[a-zA-Z0-9]+)?)|(\^\^))?)'
+    r'|(?P<number>[-+]?[0-9]+(\.[0-9]+)?(e[-+]?[0-9]+)?)'
+    r'|(?P<pname>(' + _nameStart + _name + r'*)?:(' + _name + r'*))'
+    r'|(?P<word>' + _nameStart + _name + r'*)'
+    r'|(?P<directive>@(prefix|base)(?=' + _notQName + '))'
+    r'|(?P<punctuation>[.;,\[\]()])'
+    r'|(?P<other>.)', re.S)
+
+r_escape = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))', re.S)
+
+escapes = {'a': u'\a', 'b': u'\b', 'f': u'\f', 'r': u'\r', 't': u'\t',
+           'v': u'\v', 'n': u'\n', '\\': u'\\', '"': u'"'}
+
+RDF_type, RDF_first, RDF_rest, RDF_nil = RDF.type, RDF.first, RDF.rest, RDF.nil
+
+# the kinds of tokens
+IRI, STRING, NUMBER, PNAME, WORD, DIRECTIVE, PUNCTUATION, OTHER = range(8)
+
+
+class NotTurtle(Exception):
+    """Raised for a statement the Turtle parser does not handle."""
+
+
+def unescape(match):
+    u, U, ch = match.groups()
+    if u is not None:
+        return unichr(int(u, 16))
+    if U is not None:
+        return ('\\U' + U).decode('unicode-escape')
+    try:
+        return escapes[ch]
+    except KeyError:
+        raise NotTurtle("bad escape")
+
+
+def tokenize(text, end):
+    """Return (kind, value, value2, position) tuples for text[:end]."""
+    tokens = []
+    append = tokens.append
+    for m in r_token.finditer(text, 0, end):
+        kind = m.lastgroup
+        if kind == 'space':
+            continue
+        g = m.groups()
+        if kind == 'pname':
+            append((PNAME, g[12] or u'', g[13], m.start()))
+        elif kind == 'iri':
+            append((IRI, g[2], None, m.start()))
+        elif kind == 'punctuation':
+            append((PUNCTUATION, g[17], None, m.start()))
+        elif kind == 'string':
+            if g[4] is not None:
+                value = g[4]
+            else:
+                value = g[5]
+            if '\r' in value:
+                value = value.replace('\r', '')
+            if '\\' in value:
+                try:
+                    value = r_escape.sub(unescape, value)
+                except NotTurtle:
+                    append((OTHER, value, None, m.start()))
+                    continue
+            append((STRING, value, g[6], m.start()))
+            if g[7] is not None:
+                append((PUNCTUATION, '^^', None, m.start(8)))
+        elif kind == 'number':
+            if g[10] is not None:
+                append((NUMBER, g[8], DOUBLE_DATATYPE, m.start()))
+            elif g[9] is not None:
+                append((NUMBER, g[8], DECIMAL_DATATYPE, m.start()))
+            else:
+                append((NUMBER, g[8], INTEGER_DATATYPE, m.start()))
+        elif kind == 'word':
+            append((WORD, g[14], None, m.start()))
+        elif kind == 'directive':
+            append((DIRECTIVE, g[16], None, m.start()))
+        else:
+            append((OTHER, g[18], None, m.start()))
+    return tokens
+
+
+class TurtleReader(object):
+    """Reads Turtle from a stream into a graph."""
+
+    # bytes read at a time
+    chunk_size = 1 << 16
+
+    # IRIs and numbers are forgotten when there are more of them than this
+    intern_size = INTERN_SIZE
+
+    def __init__(self, graph, baseURI=None, batch_size=BATCH_SIZE):
+        self.graph = graph
+        self.base = baseURI or None
+        self.batch_size = batch_size
+        self.bindings = {}
+        self.bnodes = {}
+        self.iris = InternCache(self.intern_size)
+        self.pnames = InternCache(self.intern_size)
+        self.numbers = InternCache(self.intern_size)
+        self.batch = []
+        self.lines = 1
+
+    def parse(self, stream):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buf = u""
+        i, depth = 0, 0
+        while 1:
+            octets = stream.read(self.chunk_size)
+            if isinstance(octets, unicode):
+                buf = buf + octets
+            else:
+                buf = buf + decoder.decode(octets, not octets)
+            if octets:
+                end, i, depth = scanStatements(buf, i, depth)
+            else:
+                end = len(buf)
+            if end:
+                pos = self.statements(buf, end)
+                if pos is not None:
+                    self.flush()
+                    self.lines = self.lines + buf.count('\n', 0, pos)
+                    self.fallback(buf[pos:], stream, decoder)
+                    break
+                self.lines = self.lines + buf.count('\n', 0, end)
+                buf = buf[end:]
+                i = i - end
+            if not octets:
+                self.flush()
+                break
+        for prefix, namespace in self.bindings.items():
+            self.graph.bind(prefix, namespace)
+
+    def flush(self):
+        if self.batch:
+            graph = self.graph
+            graph.addN((s, p, o, graph) for s, p, o in self.batch)
+            self.batch = []
+
+    def fallback(self, text, stream, decoder):
+        """Parse text and the rest of stream with the N3 parser."""
+        graph = self.graph
+        if not graph.store.formula_aware:
+            raise ParserError(
+                "Turtle syntax error or N3 syntax at line %d: %r" % (
+                    self.lines, text.lstrip()[:80]))
+        conj_graph = ConjunctiveGraph(store=graph.store)
+        conj_graph.default_context = graph
+        conj_graph.namespace_manager = graph.namespace_manager
+        p = SinkParser(RDFSink(conj_graph), baseURI=self.base)
+        # the N3 parser counts lines from 0
+        p.lines = self.lines - 1
+        p._bindings.update(self.bindings)
+        p._anonymousNodes.update(self.bnodes)
+        p.loadStream(Remainder(text, stream, decoder))
+        self.bindings = p._bindings
+
+    def statements(self, text, end):
+        """Parse the statements in text[:end].
+
+        Returns None, or the position of the first statement that is
+        not Turtle."""
+        tokens = self.tokens = tokenize(text, end)
+        self.i = 0
+        n = len(tokens)
+        batch = self.batch
+        while self.i < n:
+            start = self.i
+            mark = len(batch)
+            try:
+                self.statement()
+            except (NotTurtle, IndexError, ValueError):
+                del batch[mark:]
+                return tokens[start][3]
+            if len(batch) >= self.batch_size:
+                self.flush()
+                batch = self.batch
+        return None
+
+    def statement(self):
+        tokens = self.tokens
+        kind, value, value2, pos = tokens[self.i]
+        if kind == DIRECTIVE:
+            self.i = self.i + 1
+            if value == 'prefix':
+                prefix, local = self.expect(PNAME)
+                if local:
+                    raise NotTurtle("expected prefix")
+                ns = self.resolve(self.expect(IRI)[0])
+                self.bindings[prefix] = ns
+                self.pnames.clear()
+            else:
+                if self.base is None:
+                    raise NotTurtle("relative @base")
+                self.base = self.resolve(self.expect(IRI)[0])
+                self.iris.clear()
+        else:
+            subject = self.subject()
+            self.predicateObjectList(subject)
+        if self.expect(PUNCTUATION)[0] != '.':
+            raise NotTurtle("expected '.'")
+
+    def expect(self, kind):
+        k, value, value2, pos = self.tokens[self.i]
+        if k != kind:
+            raise NotTurtle("unexpected token")
+        self.i = self.i + 1
+        return value, value2
+
+    def subject(self):
+        kind, value, value2, pos = self.tokens[self.i]
+        if kind == PUNCTUATION and value in '[(':
+            return self.object()
+        if kind in (IRI, PNAME):
+            return self.object()
+        raise NotTurtle("bad subject")
+
+    def predicateObjectList(self, subject):
+        tokens = self.tokens
+        while 1:
+            kind, value, value2, pos = tokens[self.i]
+            if kind == PUNCTUATION and value in '.]':
+                return
+            self.i = self.i + 1
+            if kind == WORD and value == 'a':
+                predicate = RDF_type
+            elif kind == IRI:
+                predicate = self.iri(value)
+            elif kind == PNAME:
+                predicate = self.pname(value, value2)
+                if isinstance(predicate, BNode):
+                    raise NotTurtle("bad predicate")
+            else:
+                raise NotTurtle("bad predicate")
+            self.objectList(subject, predicate)
+            kind, value, value2, pos = tokens[self.i]
+            if kind != PUNCTUATION or value != ';':
+                return
+            while kind == PUNCTUATION and value == ';':
+                self.i = self.i + 1
+                kind, value, value2, pos = tokens[self.i]
+
+    def objectList(self, subject, predicate):
+        tokens = self.tokens
+        append = self.batch.append
+        append((subject, predicate, self.object()))
+        while tokens[self.i][:2] == (PUNCTUATION, ','):
+            self.i = self.i + 1
+            append((subject, predicate, self.object()))
+
+    def object(self):
+        tokens = self.tokens
+        kind, value, value2, pos = tokens[self.i]
+        self.i = self.i + 1
+        if kind == PNAME:
+            return self.pname(value, value2)
+        elif kind == IRI:
+            return self.iri(value)
+        elif kind == STRING:
+            if tokens[self.i][:2] == (PUNCTUATION, '^^'):
+                self.i = self.i + 1
+                kind, dt, dt2, pos = tokens[self.i]
+                self.i = self.i + 1
+                if kind == IRI:
+                    dt = self.iri(dt)
+                elif kind == PNAME:
+                    dt = self.pname(dt, dt2)
+                else:
+                    raise NotTurtle("bad datatype")
+                return Literal(value, datatype=dt)
+            return Literal(value, lang=value2)
+        elif kind == NUMBER:
+            return self.numbers.get(value) or self.number(value, value2)
+        elif kind == PUNCTUATION:
+            if value == '[':
+                node = BNode()
+                self.predicateObjectList(node)
+                if self.expect(PUNCTUATION)[0] != ']':
+                    raise NotTurtle("expected ']'")
+                return node
+            elif value == '(':
+                items = []
+                while tokens[self.i][:2] != (PUNCTUATION, ')'):
+                    items.append(self.object())
+                self.i = self.i + 1
+                if not items:
+                    return RDF_nil
+                append = self.batch.append
+                head = node = BNode()
+                for n, item in enumerate(items):
+                    append((node, RDF_first, item))
+                    if n + 1 < len(items):
+                        rest = BNode()
+                    else:
+                        rest = RDF_nil
+                    append((node, RDF_rest, rest))
+                    node = rest
+                return head
+        elif kind == WORD:
+            if value == 'true' or value == 'false':
+                return Literal(value, datatype=BOOLEAN_DATATYPE)
+        raise NotTurtle("bad object")
+
+    def number(self, value, datatype):
+        # normalized as by the N3 parser
+        if datatype is INTEGER_DATATYPE:
+            lexical = unicode(long(value))
+        elif datatype is DOUBLE_DATATYPE:
+            lexical = str(float(value))
+        else:
+            lexical = str(Decimal(value).normalize())
+            if lexical == '-0':
+                lexical = '0'
+        node = self.numbers[value] = Literal(lexical, datatype=datatype)
+        return node
+
+    def iri(self, value):
+        iris = self.iris
+        node = iris.get(value)
+        if node is None:
+            node = iris[value] = URIRef(self.resolve(value))
+        return node
+
+    def resolve(self, value):
+        if self.base:
+            uri = join(self.base, value)
+        elif ':' in value:
+            uri = value
+        else:
+            raise NotTurtle("relative IRI without a base")
+        if value[-1:] == "#" and uri[-1:] != "#":
+            uri = uri + "#"
+        return uri
+
+    def pname(self, prefix, local):
+        pnames = self.pnames
+        key = (prefix, local)
+        node = pnames.get(key)
+        if node is None:
+            try:
+                ns = self.bindings[prefix]
+            except KeyError:
+                if prefix != "_":
+                    raise NotTurtle("prefix not bound")
+                node = self.bnodes.get(local)
+                if node is None:
+                    node = self.bnodes[local] = BNode()
+                return node
+            node = pnames[key] = URIRef(ns + local)
+        return node
+
+
+class Remainder(object):
+    """The text the Turtle parser stopped at, then the rest of stream."""
+
+    def __init__(self, text, stream, decoder):
+        self.text = text
+        self.stream = stream
+        self.decoder = decoder
+
+    def read(self, size=-1):
+        if self.text is not None:
+            text, self.text = self.text, None
+            return text
+        while True:
+            octets = self.stream.read(size)
+            if isinstance(octets, unicode):
+                return octets
+            # a short read may end inside a character, decoding to
+            # u"" which the N3 parser would take for the end
+            text = self.decoder.decode(octets, not octets)
+            if text or not octets:
+                return text
+
+
+class TurtleParser(Parser):
+    """parser for the Turtle format, often stored with the .ttl extension
+
+    Triples are added to the graph batch_size at a time. Documents using
+    N3 syntax are parsed by the N3 parser from the first statement that
+    is not Turtle on."""
+
+    def __init__(self):
+        super(TurtleParser, self).__init__()
+
+    def parse(self, source, sink, batch_size=BATCH_SIZE, **args):
+        baseURI = sink.absolutize(
+            source.getPublicId() or source.getSystemId() or "")
+        reader = TurtleReader(sink, baseURI, batch_size)
+        f = source.getByteStream()
+        reader.parse(f)
@@ -0,0 +1,37 @@
+"""
+N-Quads RDF graph serializer for RDFLib.
+See <http://sw.deri.org/2008/07/n-quads/> for details about the format.
+"""
+from rdflib.serializer import Serializer
+from rdflib.graph import ConjunctiveGraph
+from rdflib.plugins.serializers.nt import _nt_rows, _write_rows
+import warnings
+
+
+class NQuadsSerializer(Serializer):
+    """
+    Serializes conjunctive graphs to N-Quads format, one line per triple
+    and context, streaming the quads from the store. A plain graph is
+    written with its identifier as the graph name.
+
+    Passing sort=True writes the lines in sorted order.
+    """
+
+    def serialize(self, stream, base=None, encoding=None, sort=False,
+                  **args):
+        if base is not None:
+            warnings.warn("NQuadsSerializer does not support base.")
+        if encoding is not None:
+            warnings.warn("NQuadsSerializer does not use custom encoding.")
+        graph = self.store
+        if isinstance(graph, ConjunctiveGraph):
+            quads = ((s, p, o, context.identifier) for s, p, o, context
+                     in graph.quads((None, None, None)))
+        else:
+            context = graph.identifier
+            quads = ((s, p, o, context) for s, p, o in graph)
+        rows = _nt_rows(quads)
+        if sort:
+            rows = sorted(rows)
+        _write_rows(stream, rows, self.encoding)
+        stream.write("\n")
@@ -3,47 +3,129 @@ N-Triples RDF graph serializer for RDFLib.
 See <http://www.w3.org/TR/rdf-testcases/#ntriples> for details about the
 format.
 """
+import re
+
+from rdflib.term import Literal
 from rdflib.serializer import Serializer
+from rdflib.store import InternCache
 import warnings
 
 
 class NTSerializer(Serializer):
     """
     Serializes RDF graphs to NTriples format.
+
+    Lines are written block_size at a time. Passing sort=True writes
+    them in sorted order, so that dumps of the same graph can be
+    compared with diff (as long as its blank nodes keep their ids).
     """
 
-    def serialize(self, stream, base=None, encoding=None, **args):
+    def serialize(self, stream, base=None, encoding=None, sort=False,
+                  **args):
         if base is not None:
             warnings.warn("NTSerializer does not support base.")
         if encoding is not None:
             warnings.warn("NTSerializer does not use custom encoding.")
-        encoding = self.encoding
-        for triple in self.store:
-            stream.write(_nt_row(triple).encode(encoding, "replace"))
+        rows = _nt_rows(self.store)
+        if sort:
+            rows = sorted(rows)
+        _write_rows(stream, rows, self.encoding)
         stream.write("\n")
 
 
-def _nt_row(triple):
-    return u"%s %s %s .\n" % (triple[0].n3(),
-            triple[1].n3(),
-            _xmlcharref_encode(triple[2].n3()))
-
-# from <http://code.activestate.com/recipes/303668/>
-def _xmlcharref_encode(unicode_data, encoding="ascii"):
-    """Emulate Python 2.3's 'xmlcharrefreplace' encoding error handler."""
-    chars = []
-
-    # nothing to do about xmlchars, but replace newlines with escapes: 
-    unicode_data=unicode_data.replace("\n","\\n")
-    if unicode_data.startswith('"""'):
-        unicode_data = unicode_data.replace('"""', '"')
-
-    # Step through the unicode_data string one character at a time in
-    # order to catch unencodable characters:
-    for char in unicode_data:
-        try:
-            chars.append(char.encode(encoding, 'strict'))
-        except UnicodeError:
-            chars.append('\u%04X' % ord(char))
-    return ''.join(chars)
+# number of lines written to the stream at a time
+block_size = 1000
+
+# characters that may not appear as they are in an N-Triples string
+r_unsafe = re.compile(r'[^\x20\x21\x23-\x5B\x5D-\x7E]')
+
+# characters of object and datatype IRIs that are escaped
+r_non_ascii = re.compile(r'[^\x00-\x7E]')
+
+_escapes = {u'\t': u'\\t', u'\n': u'\\n', u'\r': u'\\r',
+            u'"': u'\\"', u'\\': u'\\\\'}
+
+def _escape_char(m):
+    char = m.group()
+    escaped = _escapes.get(char)
+    if escaped is None:
+        codepoint = ord(char)
+        if codepoint > 0xFFFF:
+            escaped = u'\\U%08X' % codepoint
+        else:
+            escaped = u'\\u%04X' % codepoint
+        _escapes[char] = escaped
+    return escaped
+
+
+def _quote_literal(value):
+    """Return value quoted as an N-Triples string."""
+    return u'"%s"' % r_unsafe.sub(_escape_char, value)
+
+
+def _escape_iri(text):
+    """Return text with its characters above U+007E escaped."""
+    return r_non_ascii.sub(_escape_char, text)
 
+
+def _nt_literal(literal):
+    encoded = _quote_literal(literal)
+    language, datatype = literal.language, literal.datatype
+    if datatype:
+        datatype = _escape_iri(datatype)
+    if language:
+        if datatype:
+            # as Literal.n3 does, though this isn't valid RDF
+            return u'%s@%s^^<%s>' % (encoded, language, datatype)
+        return u'%s@%s' % (encoded, language)
+    elif datatype:
+        return u'%s^^<%s>' % (encoded, datatype)
+    return encoded
+
+
+def _nt_rows(statements):
+    """
+    Yield the line for each (s, p, o) statement, or the N-Quads line
+    for each (s, p, o, g) one.
+
+    Characters above U+007E are escaped in literals and, as they always
+    have been, in object IRIs, but not in subjects, predicates or graph
+    names.
+    """
+    # the N-Triples forms of non literal terms
+    cache = InternCache()
+    objects = InternCache()
+    def n3(term):
+        if isinstance(term, Literal):
+            return _nt_literal(term)
+        text = cache.get(term)
+        if text is None:
+            text = cache[term] = term.n3()
+        return text
+    def object_n3(term):
+        if isinstance(term, Literal):
+            return _nt_literal(term)
+        text = objects.get(term)
+        if text is None:
+            text = objects[term] = _escape_iri(term.n3())
+        return text
+    for statement in statements:
+        terms = [n3(statement[0]), n3(statement[1]), object_n3(statement[2])]
+        if len(statement) > 3:
+            terms.append(n3(statement[3]))
+        yield u"%s .\n" % u" ".join(terms)
+
+
+def _write_rows(stream, rows, encoding):
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= block_size:
+            stream.write(u"".join(block).encode(encoding, "replace"))
+            block = []
+    if block:
+        stream.write(u"".join(block).encode(encoding, "replace"))
+
+
+def _nt_row(triple):
+    return _nt_rows([triple]).next()
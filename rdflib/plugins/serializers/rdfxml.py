@@ -5,7 +5,7 @@ from rdflib.plugins.serializers.xmlwriter import XMLWriter
 from rdflib.namespace import Namespace, RDF, RDFS, split_uri
 
 from rdflib.term import URIRef, Literal, BNode
-from rdflib.util import first, uniq, more_than
+from rdflib.util import first, more_than
 from rdflib.collection import Collection
 from rdflib.serializer import Serializer
 
@@ -23,7 +23,7 @@ class XMLSerializer(Serializer):
         store = self.store
         nm = store.namespace_manager
         bindings = {}
-        for predicate in uniq(store.predicates()):
+        for predicate in store.predicates(unique=True):
             prefix, namespace, name = nm.compute_qname(predicate)
             bindings[prefix] = URIRef(namespace)
         RDFNS = URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
@@ -35,7 +35,13 @@ class XMLSerializer(Serializer):
             yield prefix, namespace
 
 
-    def serialize(self, stream, base=None, encoding=None, **args):
+    def serialize(self, stream, base=None, encoding=None, streaming=False,
+                  **args):
+        if streaming:
+            serializer = StreamingXMLSerializer(self.store)
+            serializer.encoding = self.encoding
+            serializer.serialize(stream, base, encoding, **args)
+            return
         self.base = base
         self.__stream = stream
         self.__serialized = {}
@@ -58,7 +64,7 @@ class XMLSerializer(Serializer):
         write('>\n')
 
         # write out triples by subject
-        for subject in self.store.subjects():
+        for subject in self.store.subjects(unique=True):
             self.subject(subject, 1)
 
         # endRDF
@@ -133,7 +139,13 @@ class PrettyXMLSerializer(Serializer):
         super(PrettyXMLSerializer, self).__init__(store)
         self.forceRDFAbout=set()
 
-    def serialize(self, stream, base=None, encoding=None, **args):
+    def serialize(self, stream, base=None, encoding=None, streaming=False,
+                  **args):
+        if streaming:
+            serializer = StreamingXMLSerializer(self.store)
+            serializer.encoding = self.encoding
+            serializer.serialize(stream, base, encoding, **args)
+            return
         self.__serialized = {}
         store = self.store
         self.base = base
@@ -144,7 +156,8 @@ class PrettyXMLSerializer(Serializer):
         self.writer = writer = XMLWriter(stream, nm, encoding)
 
         namespaces = {}
-        possible = uniq(store.predicates()) + uniq(store.objects(None, RDF.type))
+        possible = list(store.predicates(unique=True)) + \
+                   list(store.objects(None, RDF.type, unique=True))
         for predicate in possible:
             prefix, namespace, local = nm.compute_qname(predicate)
             namespaces[prefix] = namespace
@@ -153,7 +166,7 @@ class PrettyXMLSerializer(Serializer):
         writer.namespaces(namespaces.iteritems())
 
         # Write out subjects that can not be inline
-        for subject in store.subjects():
+        for subject in store.subjects(unique=True):
             if (None, None, subject) in store:
                 if (subject, None, subject) in store:
                     self.subject(subject, 1)
@@ -163,7 +176,7 @@ class PrettyXMLSerializer(Serializer):
         # write out anything that has not yet been reached
         # write out BNodes last (to ensure they can be inlined where possible)
         bnodes=set()
-        for subject in store.subjects():
+        for subject in store.subjects(unique=True):
             if isinstance(subject,BNode):
                 bnodes.add(subject)
                 continue
@@ -259,7 +272,7 @@ class PrettyXMLSerializer(Serializer):
                 elif isinstance(object, BNode):
                     if not object in self.__serialized and \
                        (object, None, None) in store and \
-                       len(list(store.subjects(object=object)))==1:
+                       store.count((None, None, object))==1:
                         #inline blank nodes if they haven't been serialized yet and are
                         #only referenced once (regardless of depth)
                         self.subject(object, depth+1)
@@ -269,3 +282,100 @@ class PrettyXMLSerializer(Serializer):
                     writer.attribute(RDF.resource, self.relativize(object))
         writer.pop(predicate)
 
+
+class StreamingXMLSerializer(Serializer):
+    """
+    Serializes graphs of any size to RDF/XML using a fixed amount of
+    memory.
+
+    The distinct predicates are read first, to declare their
+    namespaces, then each triple is written as it comes from the store,
+    in an rdf:Description of its subject. A new rdf:Description is
+    started whenever the subject changes, so a subject whose triples the
+    store does not return together is described more than once. Nothing
+    is nested or abbreviated, and prefixes are made up for namespaces
+    not bound in the graph without binding them.
+    """
+
+    def serialize(self, stream, base=None, encoding=None, **args):
+        self.base = base
+        names = StreamingNames(self.store)
+        writer = XMLWriter(stream, names, self.encoding)
+        writer.push(RDF.RDF)
+        writer.namespaces(sorted(names.bindings.iteritems()))
+
+        # RDF's attributes are looked up once, not for every triple
+        Description, about, nodeID = RDF.Description, RDF.about, RDF.nodeID
+        resource, datatype = RDF.resource, RDF.datatype
+        push, pop, attribute = writer.push, writer.pop, writer.attribute
+        relativize = self.relativize
+
+        last = None
+        for subject, predicate, object in self.store.triples((None, None, None)):
+            if subject != last:
+                if last is not None:
+                    pop(Description)
+                last = subject
+                push(Description)
+                if isinstance(subject, BNode):
+                    attribute(nodeID, fix(subject))
+                else:
+                    attribute(about, relativize(subject))
+            push(predicate)
+            if isinstance(object, Literal):
+                if object.language:
+                    attribute(XMLLANG, object.language)
+                if object.datatype:
+                    attribute(datatype, object.datatype)
+                writer.text(object)
+            elif isinstance(object, BNode):
+                attribute(nodeID, fix(object))
+            else:
+                attribute(resource, relativize(object))
+            pop(predicate)
+        if last is not None:
+            pop(Description)
+
+        writer.pop(RDF.RDF)
+        stream.write("\n")
+
+
+class StreamingNames(object):
+    """
+    The qnames of the predicates in a graph and of the RDF/XML syntax
+    terms, for an XMLWriter in place of a namespace manager.
+    """
+
+    def __init__(self, store):
+        RDFNS = URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
+        self.bindings = {"rdf": RDFNS}
+        self.qnames = {XMLLANG: "xml:lang"}
+        for term in (RDF.RDF, RDF.Description, RDF.about, RDF.nodeID,
+                     RDF.resource, RDF.datatype):
+            self.qnames[term] = "rdf:%s" % term[len(RDFNS):]
+
+        namespaces = {RDFNS: "rdf"}
+        bound = store.store
+        num = 1
+        for predicate in store.predicates(unique=True):
+            if predicate in self.qnames:
+                continue
+            namespace, name = split_uri(predicate)
+            namespace = URIRef(namespace)
+            prefix = namespaces.get(namespace)
+            if prefix is None:
+                prefix = bound.prefix(namespace)
+                while prefix is None or prefix in self.bindings:
+                    prefix = "ns%s" % num
+                    num += 1
+                    if bound.namespace(prefix):
+                        prefix = None
+                namespaces[namespace] = prefix
+                self.bindings[prefix] = namespace
+            if prefix:
+                self.qnames[predicate] = "%s:%s" % (prefix, name)
+            else:
+                self.qnames[predicate] = name
+
+    def qname(self, uri):
+        return self.qnames[uri]
@@ -2,13 +2,15 @@
 Turtle RDF graph serializer for RDFLib.
 See <http://www.w3.org/TeamSubmission/turtle/> for syntax specification.
 """
+
 from rdflib.term import BNode, Literal, URIRef
 
 from rdflib.exceptions import Error
 
 from rdflib.serializer import Serializer
+from rdflib.store import INTERN_SIZE, InternCache
 
-from rdflib.namespace import RDF, RDFS
+from rdflib.namespace import RDF, RDFS, split_uri
 
 
 class RecursiveSerializer(Serializer):
@@ -155,7 +157,13 @@ class TurtleSerializer(RecursiveSerializer):
         self._shortNames = {}
         self._started = False
 
-    def serialize(self, stream, base=None, encoding=None, spacious=None, **args):
+    def serialize(self, stream, base=None, encoding=None, spacious=None,
+                  streaming=False, **args):
+        if streaming:
+            serializer = StreamingTurtleSerializer(self.store)
+            serializer.encoding = self.encoding
+            serializer.serialize(stream, base, encoding, spacious, **args)
+            return
         self.reset()
         self.stream = stream
         self.base = base
@@ -321,8 +329,7 @@ class TurtleSerializer(RecursiveSerializer):
         except:
             return False
         while l:
-            if l != RDF.nil and len(
-                    list(self.store.predicate_objects(l))) != 2:
+            if l != RDF.nil and self.store.count((l, None, None)) != 2:
                 return False
             l = self.store.value(l, RDF.rest)
         return True
@@ -363,3 +370,122 @@ class TurtleSerializer(RecursiveSerializer):
         self.depth -= depthmod
 
 
+class StreamingTurtleSerializer(TurtleSerializer):
+    """
+    Serializes graphs of any size to Turtle using memory proportional
+    to the description of one subject.
+
+    Subjects are written in the order the store's triples come in, as
+    the graph is never walked ahead of time to collect and sort them. A
+    subject is described when its first triple comes in, and again
+    whenever one comes in after another subject's, so a subject whose
+    triples the store does not return together is described more than
+    once (each time with all of its triples). Only prefixes already
+    bound in the graph are used, all of them declared at the start.
+
+    A blank node is written in brackets where it is referenced, instead
+    of as a subject of its own, if a count query shows it is referenced
+    exactly once and the chain of such references leads to a subject
+    within maxDepth steps. RDF lists are written as nested blank nodes.
+    """
+
+    intern_size = INTERN_SIZE
+
+    def reset(self):
+        super(StreamingTurtleSerializer, self).reset()
+        self._qnames = InternCache(self.intern_size)
+        self._inlined = InternCache(self.intern_size)
+
+    def serialize(self, stream, base=None, encoding=None, spacious=None,
+                  **args):
+        self.reset()
+        self.stream = stream
+        self.base = base
+        if spacious is not None:
+            self._spacious = spacious
+
+        for prefix, namespace in self.store.namespaces():
+            self.addNamespace(prefix, namespace)
+        self.startDocument()
+
+        # The bundled stores return a subject's triples together, so a
+        # subject starts a new block when it differs from the previous one.
+        last = None
+        for subject, predicate, object in self.store.triples((None, None, None)):
+            if subject == last:
+                continue
+            last = subject
+            if self.inlined(subject):
+                continue
+            self.statement(subject)
+            self.write('\n')
+
+        self.endDocument()
+        stream.write("\n")
+
+    def getQName(self, uri, gen_prefix=True):
+        if not isinstance(uri, URIRef):
+            return None
+        qnames = self._qnames
+        if uri in qnames:
+            return qnames[uri]
+        qname = None
+        try:
+            namespace, local = split_uri(uri)
+        except Exception:
+            pass
+        else:
+            prefix = self.store.store.prefix(URIRef(namespace))
+            # Local parts with '.' will mess up serialization
+            if prefix is not None and '.' not in local:
+                qname = u'%s:%s' % (prefix, local)
+        qnames[uri] = qname
+        return qname
+
+    def refCount(self, node):
+        """Return 0, 1, or 2 for two or more references to node as an
+        object."""
+        return min(self.store.count((None, None, node)), 2)
+
+    def inlined(self, node):
+        """Return True if node is written where it is referenced."""
+        if not isinstance(node, BNode):
+            return False
+        cache = self._inlined
+        if node in cache:
+            return cache[node]
+        result = False
+        store = self.store
+        seen = set([node])
+        current = node
+        for depth in xrange(self.maxDepth):
+            if store.count((None, None, current)) != 1:
+                # current is written as a subject of its own
+                result = current is not node
+                break
+            for current in store.subjects(None, current):
+                break
+            if not isinstance(current, BNode):
+                result = True
+                break
+            if current in seen:
+                # a cycle of blank nodes, write them all as subjects
+                break
+            seen.add(current)
+        cache[node] = result
+        return result
+
+    def subjectDone(self, subject):
+        pass
+
+    def isDone(self, subject):
+        return False
+
+    def isValidList(self, l):
+        return False
+
+    def p_squared(self, node, position, newline=False):
+        if position == SUBJECT or not self.inlined(node):
+            return False
+        return super(StreamingTurtleSerializer, self).p_squared(
+            node, position, newline)
@@ -1,5 +1,7 @@
 from rdflib.store import Store, VALID_STORE, CORRUPTED_STORE, NO_STORE, UNKNOWN
-from rdflib.term import URIRef
+from rdflib.store import TripleAddedEvent, batches, BATCH_SIZE
+from rdflib.term import URIRef, BNode, Literal, Variable
+from rdflib.graph import Graph, QuotedGraph, GraphValue
 
 try:
     from bsddb import db
@@ -8,8 +10,10 @@ except ImportError:
 
 from os import mkdir
 from os.path import exists, abspath
-from urllib import pathname2url
-from threading import Thread
+from urllib import pathname2url, unquote
+from threading import Thread, Lock, RLock
+from time import time
+from struct import pack, unpack
 
 import logging
 _logger = logging.getLogger(__name__)
@@ -19,8 +23,48 @@ class Sleepycat(Store):
     formula_aware = True
     transaction_aware = False
 
+    # number of quads addN converts and writes at a time
+    batch_size = BATCH_SIZE
+
+    # number of rows read with one cursor by range scans
+    scan_batch_size = 100
+
+    # number of entries in each of the term to id and id to term caches
+    term_cache_size = 10000
+
+    # encoding of terms and keys used when creating a new store, either
+    # "pickle" or "binary"; an existing store keeps the encoding it was
+    # created with (see migrate)
+    term_encoding = "pickle"
+
+    # when transaction_aware is set before opening, writes not made in an
+    # explicit txn go to a shared group transaction, which commit() and
+    # rollback() end; it is also committed after group_commit_size
+    # operations or group_commit_delay seconds (None disables either)
+    group_commit_size = 1000
+    group_commit_delay = 1.0
+
+    # Berkeley DB settings, see CONFIGURATION: the cache size in bytes, the
+    # page size of newly created databases (None leaves it to Berkeley DB),
+    # optionally per index, the largest file mapped into memory read-only
+    # instead of being read through the cache, log buffer and log file sizes
+    # and whether commits skip flushing (txn_nosync) or writing
+    # (txn_write_nosync) the log
+    cache_size = 50*1024*1024
+    page_size = None
+    spo_page_size = None
+    pos_page_size = None
+    osp_page_size = None
+    mmap_size = None
+    log_buffer_size = None
+    log_max = None
+    txn_nosync = False
+    txn_write_nosync = False
+
     def __init__(self, configuration=None, identifier=None):
         self.__open = False
+        self.__txn = None
+        self.__txn_lock = RLock()
         self.__identifier = identifier
         super(Sleepycat, self).__init__(configuration)
         self.configuration = configuration
@@ -33,8 +77,13 @@ class Sleepycat(Store):
     identifier = property(__get_identifier)
 
     def _init_db_environment(self, homeDir, create=True):
-        envsetflags  = db.DB_CDB_ALLDB
-        envflags = db.DB_INIT_MPOOL | db.DB_INIT_CDB | db.DB_THREAD
+        if self.transaction_aware:
+            envsetflags = 0
+            envflags = db.DB_INIT_MPOOL | db.DB_INIT_LOCK | db.DB_INIT_LOG | \
+                       db.DB_INIT_TXN | db.DB_RECOVER | db.DB_THREAD
+        else:
+            envsetflags  = db.DB_CDB_ALLDB
+            envflags = db.DB_INIT_MPOOL | db.DB_INIT_CDB | db.DB_THREAD
         if not exists(homeDir):
             if create==True:
                 mkdir(homeDir) # TODO: implement create method and refactor this to it
@@ -42,9 +91,22 @@ class Sleepycat(Store):
             else:
                 return -1
         db_env = db.DBEnv()
-        db_env.set_cachesize(0, 1024*1024*50) # TODO
-        #db_env.set_lg_max(1024*1024)
-        db_env.set_flags(envsetflags, 1)
+        db_env.set_cachesize(int(self.cache_size >> 30),
+                             int(self.cache_size & ((1<<30)-1)))
+        if self.mmap_size is not None:
+            db_env.set_mp_mmapsize(self.mmap_size)
+        if self.log_buffer_size is not None:
+            db_env.set_lg_bsize(self.log_buffer_size)
+        if self.log_max is not None:
+            db_env.set_lg_max(self.log_max)
+        if self.txn_nosync:
+            envsetflags |= db.DB_TXN_NOSYNC
+        if self.txn_write_nosync:
+            envsetflags |= db.DB_TXN_WRITE_NOSYNC
+        if envsetflags:
+            db_env.set_flags(envsetflags, 1)
+        if self.transaction_aware:
+            db_env.set_lk_detect(db.DB_LOCK_DEFAULT)
         db_env.open(homeDir, envflags | db.DB_CREATE)
         return db_env
 
@@ -52,6 +114,15 @@ class Sleepycat(Store):
         return self.__open
     
     def open(self, path, create=True):
+        """
+        Open the store in directory path, which may be followed by settings
+        as a query string ("/var/db/rdf?cache_size=4G&page_size=16K"), or a
+        dict with the directory under "path" and settings under their names;
+        see CONFIGURATION for the settings.
+        """
+        path, settings = parse_configuration(path)
+        for name, value in settings.iteritems():
+            setattr(self, name, value)
         homeDir = path
 
         if self.__identifier is None:
@@ -60,6 +131,9 @@ class Sleepycat(Store):
         self.db_env = db_env = self._init_db_environment(homeDir, create)        
         self.__open = True
 
+        self.__term_ids = LRUCache(self.term_cache_size)
+        self.__id_terms = LRUCache(self.term_cache_size)
+
         dbname = None
         dbtype = db.DB_BTREE
         # auto-commit ensures that the open-call commits when transactions are enabled
@@ -74,12 +148,82 @@ class Sleepycat(Store):
         self.__indicies = [None,] * 3
         self.__indicies_info = [None,] * 3
         for i in xrange(0, 3):
-            index_name = to_key_func(i)(("s", "p", "o"), "c")
+            index_name = to_key_func(i, string_keys)(("s", "p", "o"), "c")
             index = db.DB(db_env)
             index.set_flags(dbsetflags)
+            page_size = getattr(self, "%s_page_size" % INDEX_NAMES[i]) or self.page_size
+            if page_size:
+                index.set_pagesize(page_size)
             index.open(index_name, dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
             self.__indicies[i] = index
-            self.__indicies_info[i] = (index, to_key_func(i), from_key_func(i))
+
+        self.__contexts = db.DB(db_env)
+        self.__contexts.set_flags(dbsetflags)
+        if self.page_size:
+            self.__contexts.set_pagesize(self.page_size)
+        self.__contexts.open("contexts", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
+
+        self.__namespace = db.DB(db_env)
+        self.__namespace.set_flags(dbsetflags)
+        if self.page_size:
+            self.__namespace.set_pagesize(self.page_size)
+        self.__namespace.open("namespace", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
+
+        self.__prefix = db.DB(db_env)
+        self.__prefix.set_flags(dbsetflags)
+        if self.page_size:
+            self.__prefix.set_pagesize(self.page_size)
+        self.__prefix.open("prefix", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
+
+        self.__k2i = db.DB(db_env)
+        self.__k2i.set_flags(dbsetflags)
+        if self.page_size:
+            self.__k2i.set_pagesize(self.page_size)
+        self.__k2i.open("k2i", dbname, db.DB_HASH, dbopenflags|db.DB_CREATE, dbmode)
+
+        self.__i2k = db.DB(db_env)
+        self.__i2k.set_flags(dbsetflags)
+        if self.page_size:
+            self.__i2k.set_pagesize(self.page_size)
+        self.__i2k.open("i2k", dbname, db.DB_RECNO, dbopenflags|db.DB_CREATE, dbmode)
+
+        self.__meta = db.DB(db_env)
+        self.__meta.set_flags(dbsetflags)
+        if self.page_size:
+            self.__meta.set_pagesize(self.page_size)
+        self.__meta.open("meta", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
+
+        # stores created before the meta database existed are pickled
+        format = self.__meta.get("format")
+        if format is None:
+            cursor = self.__i2k.cursor()
+            empty = not cursor.first()
+            cursor.close()
+            if empty:
+                format = FORMATS[self.term_encoding]
+            else:
+                format = FORMATS["pickle"]
+            self.__meta.put("format", format)
+        for encoding, f in FORMATS.iteritems():
+            if f == format:
+                self.term_encoding = encoding
+                break
+        else:
+            _logger.error("Unsupported term encoding %r" % format)
+            self.__open = False
+            self.__close()
+            return CORRUPTED_STORE
+        if self.term_encoding == "binary":
+            self.__keys = keys = binary_keys
+            self.__dumps = self.__binary_dumps
+            self.__loads = self.__binary_loads
+        else:
+            self.__keys = keys = string_keys
+            self.__dumps = self.__pickle_dumps
+            self.__loads = self.__pickle_loads
+
+        for i in xrange(0, 3):
+            self.__indicies_info[i] = (self.__indicies[i], to_key_func(i, keys), from_key_func(i, keys))
 
         lookup = {}
         for i in xrange(0, 8):
@@ -102,43 +246,25 @@ class Sleepycat(Store):
             def get_prefix_func(start, end):
                 def get_prefix(triple, context):
                     if context is None:
-                        yield ""
+                        yield keys.null
                     else:
                         yield context
                     i = start
                     while i<end:
                         yield triple[i%3]
                         i += 1
-                    yield ""
                 return get_prefix
 
-            lookup[i] = (self.__indicies[start], get_prefix_func(start, start + len), from_key_func(start), results_from_key_func(start, self._from_string))
+            lookup[i] = (self.__indicies[start], get_prefix_func(start, start + len), from_key_func(start, keys), results_from_key_func(start, self._from_string, keys), triple_from_key_func(start, self._from_string, keys))
 
 
         self.__lookup_dict = lookup
 
-        self.__contexts = db.DB(db_env)
-        self.__contexts.set_flags(dbsetflags)
-        self.__contexts.open("contexts", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
-
-        self.__namespace = db.DB(db_env)
-        self.__namespace.set_flags(dbsetflags)
-        self.__namespace.open("namespace", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
-
-        self.__prefix = db.DB(db_env)
-        self.__prefix.set_flags(dbsetflags)
-        self.__prefix.open("prefix", dbname, dbtype, dbopenflags|db.DB_CREATE, dbmode)
-
-        self.__k2i = db.DB(db_env)
-        self.__k2i.set_flags(dbsetflags)
-        self.__k2i.open("k2i", dbname, db.DB_HASH, dbopenflags|db.DB_CREATE, dbmode)
-
-        self.__i2k = db.DB(db_env)
-        self.__i2k.set_flags(dbsetflags)
-        self.__i2k.open("i2k", dbname, db.DB_RECNO, dbopenflags|db.DB_CREATE, dbmode)
-
         self.__needs_sync = False
-        t = Thread(target=self.__sync_run)
+        if self.transaction_aware:
+            t = Thread(target=self.__commit_run)
+        else:
+            t = Thread(target=self.__sync_run)
         t.setDaemon(True)
         t.start()
         self.__sync_thread = t
@@ -168,6 +294,110 @@ class Sleepycat(Store):
         except Exception, e:
             _logger.exception(e)
 
+    def __commit_run(self):
+        from time import sleep
+        try:
+            while self.__open:
+                sleep(.1)
+                delay = self.group_commit_delay
+                if self.__txn is not None and delay is not None and \
+                   time() - self.__txn_began >= delay:
+                    self.__txn_lock.acquire()
+                    try:
+                        if self.__txn is not None and \
+                           time() - self.__txn_began >= delay:
+                            _logger.debug("group commit")
+                            self.__commit()
+                    finally:
+                        self.__txn_lock.release()
+        except Exception, e:
+            _logger.exception(e)
+
+    def commit(self):
+        """Commit the group transaction."""
+        if self.transaction_aware:
+            self.__txn_lock.acquire()
+            try:
+                self.__commit()
+            finally:
+                self.__txn_lock.release()
+
+    def rollback(self):
+        """
+        Abort the group transaction, undoing the writes made since it was
+        last committed.
+        """
+        if self.transaction_aware:
+            self.__txn_lock.acquire()
+            try:
+                txn = self.__txn
+                if txn is not None:
+                    self.__txn = None
+                    txn.abort()
+                    # ids handed out in the transaction are gone as well
+                    self.__term_ids.clear()
+                    self.__id_terms.clear()
+            finally:
+                self.__txn_lock.release()
+
+    def __commit(self):
+        txn = self.__txn
+        if txn is not None:
+            self.__txn = None
+            txn.commit()
+
+    def __begin(self, txn):
+        """
+        Return the transaction to write with, and whether the store was
+        locked for it: txn if given, otherwise the group transaction,
+        which is begun if needed. Pass the result to __end or, on errors,
+        __release.
+        """
+        if txn is not None or not self.transaction_aware:
+            return txn, False
+        self.__txn_lock.acquire()
+        if self.__txn is None:
+            try:
+                self.__txn = self.db_env.txn_begin()
+            except:
+                self.__txn_lock.release()
+                raise
+            self.__txn_ops = 0
+            self.__txn_began = time()
+        return self.__txn, True
+
+    def __end(self, locked, ops=1):
+        """
+        Count ops writes against the group transaction, commit it if it is
+        due and unlock the store.
+        """
+        if locked:
+            try:
+                self.__txn_ops += ops
+                size = self.group_commit_size
+                delay = self.group_commit_delay
+                if (size is not None and self.__txn_ops >= size) or \
+                   (delay is not None and time() - self.__txn_began >= delay):
+                    self.__commit()
+            finally:
+                self.__txn_lock.release()
+
+    def __reading(self, txn):
+        """
+        Return the transaction to read with, and whether the store was
+        locked for it: txn if given, otherwise the group transaction if
+        there is one, so that its writes are seen. Pass the result to
+        __release.
+        """
+        if txn is not None or not self.transaction_aware:
+            return txn, False
+        self.__txn_lock.acquire()
+        return self.__txn, True
+
+    def __release(self, locked):
+        if locked:
+            self.__txn_lock.release()
+
     def sync(self):
         if self.__open:
             for i in self.__indicies:
@@ -177,10 +407,26 @@ class Sleepycat(Store):
             self.__prefix.sync()
             self.__i2k.sync()
             self.__k2i.sync()
+            self.__meta.sync()
 
     def close(self, commit_pending_transaction=False):
+        """
+        Close the store. The group transaction is committed if
+        commit_pending_transaction is true or group commit is enabled,
+        and aborted otherwise.
+        """
         self.__open = False
         self.__sync_thread.join()
+        if self.transaction_aware:
+            if commit_pending_transaction or self.group_commit_size is not None \
+               or self.group_commit_delay is not None:
+                self.commit()
+            else:
+                self.rollback()
+            self.db_env.txn_checkpoint()
+        self.__close()
+
+    def __close(self):
         for i in self.__indicies:
             i.close()
         self.__contexts.close()
@@ -188,6 +434,7 @@ class Sleepycat(Store):
         self.__prefix.close()
         self.__i2k.close()
         self.__k2i.close()
+        self.__meta.close()
         self.db_env.close()
 
     def add(self, (subject, predicate, object), context, quoted=False, txn=None):
@@ -200,55 +447,120 @@ class Sleepycat(Store):
 
         _to_string = self._to_string
 
-        s = _to_string(subject, txn=txn)
-        p = _to_string(predicate, txn=txn)
-        o = _to_string(object, txn=txn)
-        c = _to_string(context, txn=txn)
-        
+        txn, locked = self.__begin(txn)
+        try:
+            s = _to_string(subject, txn=txn)
+            p = _to_string(predicate, txn=txn)
+            o = _to_string(object, txn=txn)
+            c = _to_string(context, txn=txn)
+
+            self.__add((s, p, o), c, quoted, txn=txn)
+        except:
+            self.__release(locked)
+            raise
+        self.__end(locked)
+
+    def addN(self, quads, txn=None):
+        """\
+        Add a sequence of (subject, predicate, object, context) quads.
+
+        Quads are processed batch_size at a time: each distinct term in a
+        batch is converted to its id once, duplicate quads are dropped,
+        and the remaining keys are written in sorted order. Statements in
+        a QuotedGraph context are added as quoted. In transactional mode
+        each batch counts as one group commit operation per quad.
+        """
+        assert self.__open, "The Store must be open."
+        dispatch = self.dispatcher.subscribed(TripleAddedEvent)
+        _to_string = self._to_string
+        for batch in batches(quads, self.batch_size):
+            batch_txn, locked = self.__begin(txn)
+            try:
+                ids = {}
+                keys = {}
+                for quad in batch:
+                    subject, predicate, object, context = quad
+                    assert context is not None, \
+                        "Context associated with %s %s %s is None!" % quad[:3]
+                    assert context!=self, "Can not add triple directly to store"
+                    if dispatch:
+                        self.dispatcher.dispatch(TripleAddedEvent(
+                            triple=(subject, predicate, object), context=context))
+                    key = []
+                    for term in (context, subject, predicate, object):
+                        i = ids.get(term)
+                        if i is None:
+                            i = ids[term] = _to_string(term, txn=batch_txn)
+                        key.append(i)
+                    key = tuple(key)
+                    quoted = isinstance(context, QuotedGraph)
+                    keys[key] = keys.get(key, True) and quoted
+                for key in sorted(keys):
+                    c, s, p, o = key
+                    self.__add((s, p, o), c, keys[key], txn=batch_txn)
+            except:
+                self.__release(locked)
+                raise
+            self.__end(locked, len(batch))
+
+    def __add(self, (s, p, o), c, quoted=False, txn=None):
         cspo, cpos, cosp = self.__indicies
+        keys = self.__keys
+        join = keys.join
 
-        value = cspo.get("%s^%s^%s^%s^" % (c, s, p, o), txn=txn)
+        value = cspo.get(join((c, s, p, o)), txn=txn)
         if value is None:
             self.__contexts.put(c, "", txn=txn)
 
-            contexts_value = cspo.get("%s^%s^%s^%s^" % ("", s, p, o), txn=txn) or ""
-            contexts = set(contexts_value.split("^"))
+            contexts_value = cspo.get(join((keys.null, s, p, o)), txn=txn) or ""
+            contexts = set(keys.split_contexts(contexts_value))
             contexts.add(c)
-            contexts_value = "^".join(contexts)
+            contexts_value = keys.join_contexts(contexts)
             assert contexts_value!=None
 
-            cspo.put("%s^%s^%s^%s^" % (c, s, p, o), "", txn=txn)
-            cpos.put("%s^%s^%s^%s^" % (c, p, o, s), "", txn=txn)
-            cosp.put("%s^%s^%s^%s^" % (c, o, s, p), "", txn=txn)
+            cspo.put(join((c, s, p, o)), "", txn=txn)
+            cpos.put(join((c, p, o, s)), "", txn=txn)
+            cosp.put(join((c, o, s, p)), "", txn=txn)
             if not quoted:
-                cspo.put("%s^%s^%s^%s^" % ("", s, p, o), contexts_value, txn=txn)
-                cpos.put("%s^%s^%s^%s^" % ("", p, o, s), contexts_value, txn=txn)
-                cosp.put("%s^%s^%s^%s^" % ("", o, s, p), contexts_value, txn=txn)
+                cspo.put(join((keys.null, s, p, o)), contexts_value, txn=txn)
+                cpos.put(join((keys.null, p, o, s)), contexts_value, txn=txn)
+                cosp.put(join((keys.null, o, s, p)), contexts_value, txn=txn)
 
             self.__needs_sync = True
 
     def __remove(self, (s, p, o), c, quoted=False, txn=None):
         cspo, cpos, cosp = self.__indicies
-        contexts_value = cspo.get("^".join(("", s, p, o, "")), txn=txn) or ""
-        contexts = set(contexts_value.split("^"))
+        keys = self.__keys
+        contexts_value = cspo.get(keys.join((keys.null, s, p, o)), txn=txn) or ""
+        contexts = set(keys.split_contexts(contexts_value))
         contexts.discard(c)
-        contexts_value = "^".join(contexts)
+        contexts_value = keys.join_contexts(contexts)
         for i, _to_key, _from_key in self.__indicies_info:
             i.delete(_to_key((s, p, o), c), txn=txn)
         if not quoted:
             if contexts_value:
                 for i, _to_key, _from_key in self.__indicies_info:
-                    i.put(_to_key((s, p, o), ""), contexts_value, txn=txn)
+                    i.put(_to_key((s, p, o), keys.null), contexts_value, txn=txn)
             else:
                 for i, _to_key, _from_key in self.__indicies_info:
                     try:
-                        i.delete(_to_key((s, p, o), ""), txn=txn)
+                        i.delete(_to_key((s, p, o), keys.null), txn=txn)
                     except db.DBNotFoundError, e: 
                         pass # TODO: is it okay to ignore these?
 
     def remove(self, (subject, predicate, object), context, txn=None):
         assert self.__open, "The Store must be open."
         Store.remove(self, (subject, predicate, object), context)
+
+        txn, locked = self.__begin(txn)
+        try:
+            self.__remove_matching((subject, predicate, object), context, txn)
+        except:
+            self.__release(locked)
+            raise
+        self.__end(locked)
+
+    def __remove_matching(self, (subject, predicate, object), context, txn):
         _to_string = self._to_string
         
         if context is not None:
@@ -260,44 +572,27 @@ class Sleepycat(Store):
             p = _to_string(predicate, txn=txn)
             o = _to_string(object, txn=txn)
             c = _to_string(context, txn=txn)
-            value = self.__indicies[0].get("%s^%s^%s^%s^" % (c, s, p, o), txn=txn)
+            value = self.__indicies[0].get(self.__keys.join((c, s, p, o)), txn=txn)
             if value is not None:
                 self.__remove((s, p, o), c, txn=txn)
                 self.__needs_sync = True
         else:
             cspo, cpos, cosp = self.__indicies
-            index, prefix, from_key, results_from_key = self.__lookup((subject, predicate, object), context, txn=txn)
+            index, prefix, from_key, results_from_key, triple_from_key = self.__lookup((subject, predicate, object), context, txn=txn)
 
-            cursor = index.cursor(txn=txn)
-            try:
-                current = cursor.set_range(prefix)
+            needs_sync = False
+            for key, value in self.__scan(index, prefix, txn=txn):
                 needs_sync = True
-            except db.DBNotFoundError:
-                current = None
-                needs_sync = False
-            cursor.close()
-            while current:
-                key, value = current
-                cursor = index.cursor(txn=txn)
-                try:
-                    cursor.set_range(key)
-                    current = cursor.next()
-                except db.DBNotFoundError:
-                    current = None
-                cursor.close()
-                if key.startswith(prefix):
-                    c, s, p, o = from_key(key)
-                    if context is None:
-                        contexts_value = index.get(key, txn=txn) or ""
-                        contexts = set(contexts_value.split("^")) # remove triple from all non quoted contexts
-                        contexts.add("") # and from the conjunctive index
-                        for c in contexts:
-                            for i, _to_key, _ in self.__indicies_info:
-                                i.delete(_to_key((s, p, o), c), txn=txn)
-                    else:
-                        self.__remove((s, p, o), c, txn=txn)
+                c, s, p, o = from_key(key)
+                if context is None:
+                    contexts_value = value or ""
+                    contexts = set(self.__keys.split_contexts(contexts_value)) # remove triple from all non quoted contexts
+                    contexts.add(self.__keys.null) # and from the conjunctive index
+                    for c in contexts:
+                        for i, _to_key, _ in self.__indicies_info:
+                            i.delete(_to_key((s, p, o), c), txn=txn)
                 else:
-                    break
+                    self.__remove((s, p, o), c, txn=txn)
 
             if context is not None:
                 if subject is None and predicate is None and object is None:
@@ -311,87 +606,220 @@ class Sleepycat(Store):
 
     def triples(self, (subject, predicate, object), context=None, txn=None):
         """A generator over all the triples matching """
+        return self.__triples((subject, predicate, object), context, True, txn)
+
+    def triples_without_contexts(self, (subject, predicate, object), context=None, txn=None):
+        """A generator over all the triples matching, without contexts """
+        return self.__triples((subject, predicate, object), context, False, txn)
+
+    def __triples(self, (subject, predicate, object), context, with_contexts, txn):
         assert self.__open, "The Store must be open."
 
         if context is not None:
             if context == self:
                 context = None
 
-        _from_string = self._from_string
-        index, prefix, from_key, results_from_key = self.__lookup((subject, predicate, object), context, txn=txn)
+        # looking up unknown terms assigns them ids
+        lookup_txn, locked = self.__begin(txn)
+        try:
+            index, prefix, from_key, results_from_key, triple_from_key = self.__lookup((subject, predicate, object), context, txn=lookup_txn)
+        except:
+            self.__release(locked)
+            raise
+        self.__end(locked, 0)
+
+        for key, contexts_value in self.__scan(index, prefix, txn=txn):
+            if with_contexts:
+                yield results_from_key(key, subject, predicate, object, contexts_value)
+            else:
+                yield triple_from_key(key, subject, predicate, object)
+
+    def __scan(self, index, prefix, txn=None):
+        """
+        Generator over the (key, value) pairs of index whose key starts with
+        prefix, in key order.
+
+        Rows are read scan_batch_size at a time with one cursor, which is
+        closed before they are yielded so that the caller may write to the
+        store in between (an open cursor would block writers under
+        DB_INIT_CDB). The next batch is positioned again by key, so rows
+        removed or added meanwhile are handled like any other range scan.
+        Without txn each batch is read in the group transaction current at
+        the time, if any.
+        """
+        batch_size = self.scan_batch_size
+        key = prefix
+        resume = False
+        while True:
+            rows = []
+            batch_txn, locked = self.__reading(txn)
+            try:
+                cursor = index.cursor(txn=batch_txn)
+                try:
+                    current = cursor.set_range(key)
+                    if resume and current and current[0] == key:
+                        current = cursor.next()
+                    while current and len(rows) < batch_size:
+                        if not current[0].startswith(prefix):
+                            current = None
+                            break
+                        rows.append(current)
+                        current = cursor.next()
+                except db.DBNotFoundError:
+                    current = None
+                cursor.close()
+            finally:
+                self.__release(locked)
+            for row in rows:
+                yield row
+            if not current or not rows:
+                return
+            key = rows[-1][0]
+            resume = True
+
+    def __len__(self, context=None):
+        return self.count((None, None, None), context)
+
+    def count(self, (subject, predicate, object), context=None, txn=None):
+        """
+        Number of triples matching, counted by walking the keys of the
+        matching index range without reading their values or decoding
+        any terms.
+        """
+        assert self.__open, "The Store must be open."
+        if context is not None:
+            if context == self:
+                context = None
 
-        cursor = index.cursor(txn=txn)
+        txn, locked = self.__begin(txn)
         try:
-            current = cursor.set_range(prefix)
-        except db.DBNotFoundError:
-            current = None
-        cursor.close()
-        while current:
-            key, value = current
+            index, prefix, from_key, results_from_key, triple_from_key = self.__lookup((subject, predicate, object), context, txn=txn)
+
+            count = 0
             cursor = index.cursor(txn=txn)
             try:
-                cursor.set_range(key)
-                current = cursor.next()
+                current = cursor.set_range(prefix, dlen=0, doff=0)
+                while current and current[0].startswith(prefix):
+                    count += 1
+                    current = cursor.next(dlen=0, doff=0)
             except db.DBNotFoundError:
-                current = None
+                pass
             cursor.close()
-            if key and key.startswith(prefix):
-                contexts_value = index.get(key, txn=txn)
-                yield results_from_key(key, subject, predicate, object, contexts_value)
-            else:
-                break
+        except:
+            self.__release(locked)
+            raise
+        self.__end(locked, 0)
+        return count
 
-    def __len__(self, context=None):
+    def uniqueSubjects(self, context=None, txn=None):
+        return self.__unique(0, context, txn)
+
+    def uniquePredicates(self, context=None, txn=None):
+        return self.__unique(1, context, txn)
+
+    def uniqueObjects(self, context=None, txn=None):
+        return self.__unique(2, context, txn)
+
+    def __unique(self, i, context, txn):
+        """
+        Generator over the distinct terms that keys of index i have first
+        after the context. Only one key is read for each term: the cursor
+        is then moved past the other keys starting with the same ids.
+        Like __scan, terms are read scan_batch_size at a time with one
+        cursor, which is closed before they are yielded.
+        """
         assert self.__open, "The Store must be open."
         if context is not None:
             if context == self:
                 context = None
 
+        keys = self.__keys
         if context is None:
-            prefix = "^"
+            c = keys.null
         else:
-            prefix = "%s^" % self._to_string(context)
-
-        index = self.__indicies[0]
-        cursor = index.cursor()
-        current = cursor.set_range(prefix)
-        count = 0
-        while current:
-            key, value = current
-            if key.startswith(prefix):
-                count +=1
-                current = cursor.next()
-            else:
-                break
-        cursor.close()
-        return count
+            # looking up unknown terms assigns them ids
+            lookup_txn, locked = self.__begin(txn)
+            try:
+                c = self._to_string(context, txn=lookup_txn)
+            except:
+                self.__release(locked)
+                raise
+            self.__end(locked, 0)
+
+        index = self.__indicies[i]
+        join, split = keys.join, keys.split
+        prefix = join((c,))
+        batch_size = self.scan_batch_size
+        key = prefix
+        while True:
+            ids = []
+            batch_txn, locked = self.__reading(txn)
+            try:
+                cursor = index.cursor(txn=batch_txn)
+                try:
+                    current = cursor.set_range(key, dlen=0, doff=0)
+                    while current and len(ids) < batch_size:
+                        if not current[0].startswith(prefix):
+                            current = None
+                            break
+                        id = split(current[0])[1]
+                        ids.append(id)
+                        key = join((c, id)) + AFTER_KEYS
+                        current = cursor.set_range(key, dlen=0, doff=0)
+                except db.DBNotFoundError:
+                    current = None
+                cursor.close()
+            finally:
+                self.__release(locked)
+            for id in ids:
+                yield self._from_string(id)
+            if not current:
+                return
 
     def bind(self, prefix, namespace):
         prefix = prefix.encode("utf-8")
         namespace = namespace.encode("utf-8")
-        bound_prefix = self.__prefix.get(namespace)
-        if bound_prefix:
-            self.__namespace.delete(bound_prefix)
-        self.__prefix[namespace] = prefix
-        self.__namespace[prefix] = namespace
+        txn, locked = self.__begin(None)
+        try:
+            bound_prefix = self.__prefix.get(namespace, txn=txn)
+            if bound_prefix:
+                self.__namespace.delete(bound_prefix, txn=txn)
+            self.__prefix.put(namespace, prefix, txn=txn)
+            self.__namespace.put(prefix, namespace, txn=txn)
+        except:
+            self.__release(locked)
+            raise
+        self.__end(locked)
 
     def namespace(self, prefix):
         prefix = prefix.encode("utf-8")
-        return self.__namespace.get(prefix, None)
+        txn, locked = self.__reading(None)
+        try:
+            return self.__namespace.get(prefix, None, txn=txn)
+        finally:
+            self.__release(locked)
 
     def prefix(self, namespace):
         namespace = namespace.encode("utf-8")
-        return self.__prefix.get(namespace, None)
+        txn, locked = self.__reading(None)
+        try:
+            return self.__prefix.get(namespace, None, txn=txn)
+        finally:
+            self.__release(locked)
 
     def namespaces(self):
-        cursor = self.__namespace.cursor()
         results = []
-        current = cursor.first()
-        while current:
-            prefix, namespace = current
-            results.append((prefix, namespace))
-            current = cursor.next()
-        cursor.close()
+        txn, locked = self.__reading(None)
+        try:
+            cursor = self.__namespace.cursor(txn=txn)
+            current = cursor.first()
+            while current:
+                prefix, namespace = current
+                results.append((prefix, namespace))
+                current = cursor.next()
+            cursor.close()
+        finally:
+            self.__release(locked)
         for prefix, namespace in results:
             yield prefix, URIRef(namespace)
 
@@ -400,50 +828,158 @@ class Sleepycat(Store):
         _to_string = self._to_string
 
         if triple:
-            s, p, o = triple
-            s = _to_string(s)
-            p = _to_string(p)
-            o = _to_string(o)
-            contexts = self.__indicies[0].get("%s^%s^%s^%s^" % ("", s, p, o))
+            txn, locked = self.__begin(None)
+            try:
+                s, p, o = triple
+                s = _to_string(s, txn=txn)
+                p = _to_string(p, txn=txn)
+                o = _to_string(o, txn=txn)
+                keys = self.__keys
+                contexts = self.__indicies[0].get(keys.join((keys.null, s, p, o)), txn=txn)
+            except:
+                self.__release(locked)
+                raise
+            self.__end(locked, 0)
             if contexts:
-                for c in contexts.split("^"):
-                    if c:
-                        yield _from_string(c)
+                for c in keys.split_contexts(contexts):
+                    yield _from_string(c)
         else:
-            index = self.__contexts
-            cursor = index.cursor()
-            current = cursor.first()
-            cursor.close()
-            while current:
-                key, value = current
-                context = _from_string(key)
-                yield context
-                cursor = index.cursor()
-                try:
-                    cursor.set_range(key)
-                    current = cursor.next()
-                except db.DBNotFoundError:
-                    current = None
-                cursor.close()
+            for key, value in self.__scan(self.__contexts, ""):
+                yield _from_string(key)
 
     def _from_string(self, i):
-        k = self.__i2k.get(int(i))
-        return self._loads(k)
+        term = self.__id_terms.get(i)
+        if term is None:
+            txn, locked = self.__reading(None)
+            try:
+                k = self.__i2k.get(self.__keys.to_recno(i), txn=txn)
+                term = self.__loads(k)
+            finally:
+                self.__release(locked)
+            self.__id_terms.put(i, term)
+        return term
 
     def _to_string(self, term, txn=None):
-        k = self._dumps(term)
+        key = term_cache_key(term)
+        i = self.__term_ids.get(key)
+        if i is not None:
+            return i
+        k = self.__dumps(term, txn)
         i = self.__k2i.get(k, txn=txn)
         if i is None:
             # weird behavoir from bsddb not taking a txn as a keyword argument 
             # for append
             if self.transaction_aware:
-                i = "%s" % self.__i2k.append(k, txn)
+                i = self.__keys.from_recno(self.__i2k.append(k, txn))
             else:
-                i = "%s" % self.__i2k.append(k)
+                i = self.__keys.from_recno(self.__i2k.append(k))
 
             self.__k2i.put(k, i, txn=txn)
+        self.__term_ids.put(key, i)
+        self.__id_terms.put(i, term)
         return i
 
+    def __pickle_dumps(self, term, txn=None):
+        return self._dumps(term)
+
+    def __pickle_loads(self, k):
+        return self._loads(k)
+
+    def __binary_dumps(self, term, txn=None):
+        """
+        Encode term as a one byte type tag followed by its UTF-8 value.
+        Literals carry the id of their datatype and their language, and
+        graphs the encoding of their identifier. Terms of any other type
+        are pickled.
+        """
+        cls = term.__class__
+        tag = BINARY_TAGS.get(cls)
+        if tag is None:
+            pass
+        elif cls is Literal:
+            language = term.language
+            if language is None:
+                language = ""
+                lang_len = 0
+            else:
+                language = language.encode("utf-8")
+                lang_len = len(language) + 1
+            if lang_len < 256:
+                if term.datatype is None:
+                    datatype = NULL_ID
+                else:
+                    datatype = self._to_string(term.datatype, txn=txn)
+                return "L" + datatype + chr(lang_len) + language + \
+                       term.encode("utf-8")
+        elif tag in "GQv":
+            return tag + self.__binary_dumps(term.identifier, txn)
+        else:
+            return tag + term.encode("utf-8")
+        return "P" + self._dumps(term)
+
+    def __binary_loads(self, k):
+        tag = k[0]
+        if tag == "L":
+            datatype = k[1:5]
+            if datatype == NULL_ID:
+                datatype = None
+            else:
+                datatype = self._from_string(datatype)
+            lang_len = ord(k[5])
+            if lang_len:
+                language = k[6:5+lang_len].decode("utf-8")
+                value = k[5+lang_len:]
+            else:
+                language = None
+                value = k[6:]
+            return Literal(value.decode("utf-8"), language, datatype)
+        elif tag == "P":
+            return self._loads(k[1:])
+        cls = BINARY_CLASSES[tag]
+        if tag in "GQv":
+            return cls(self, self.__binary_loads(k[1:]))
+        return cls(k[1:].decode("utf-8"))
+
+    def stats(self):
+        """
+        Return a dict with the effective settings of the store ('settings'),
+        the page size and number of keys of each database ('databases'),
+        the size and hit / miss counts of the Berkeley DB cache ('cache')
+        and of the term caches ('term_cache', see term_cache_stats).
+        """
+        assert self.__open, "The Store must be open."
+        settings = {}
+        for name in CONFIGURATION:
+            settings[name] = getattr(self, name)
+        databases = {}
+        named = [(INDEX_NAMES[i], self.__indicies[i]) for i in xrange(0, 3)]
+        named += [("contexts", self.__contexts), ("namespace", self.__namespace),
+                  ("prefix", self.__prefix), ("k2i", self.__k2i),
+                  ("i2k", self.__i2k), ("meta", self.__meta)]
+        for name, d in named:
+            stat = d.stat(flags=db.DB_FAST_STAT)
+            databases[name] = {"page_size": stat.get("pagesize"),
+                               "keys": stat.get("nkeys")}
+        cache = self.db_env.memp_stat()[0]
+        return {"settings": settings,
+                "databases": databases,
+                "cache": {"size": (cache["gbytes"] << 30) + cache["bytes"],
+                          "hits": cache["cache_hit"],
+                          "misses": cache["cache_miss"]},
+                "term_cache": self.term_cache_stats()}
+
+    def term_cache_stats(self):
+        """
+        Return a dict with the size, capacity and hit / miss counts of the
+        term to id ('term_ids') and id to term ('id_terms') caches.
+        """
+        stats = {}
+        for name, cache in (("term_ids", self.__term_ids),
+                            ("id_terms", self.__id_terms)):
+            stats[name] = {"size": len(cache), "capacity": cache.size,
+                           "hits": cache.hits, "misses": cache.misses}
+        return stats
+
     def __lookup(self, (subject, predicate, object), context, txn=None):
         _to_string = self._to_string
         if context is not None:
@@ -458,28 +994,276 @@ class Sleepycat(Store):
         if object is not None:
             i += 4
             object = _to_string(object, txn=txn)
-        index, prefix_func, from_key, results_from_key = self.__lookup_dict[i]
-        prefix = "^".join(prefix_func((subject, predicate, object), context))
-        return index, prefix, from_key, results_from_key
-
+        index, prefix_func, from_key, results_from_key, triple_from_key = self.__lookup_dict[i]
+        prefix = self.__keys.join(prefix_func((subject, predicate, object), context))
+        return index, prefix, from_key, results_from_key, triple_from_key
+
+
+def term_cache_key(term):
+    """
+    Key for a term in the term to id cache. Literals that compare equal
+    by value (Literal(1) and Literal(1.0)) are stored under different ids,
+    so they are keyed by their lexical form, language and datatype.
+    """
+    if isinstance(term, Literal):
+        return (term.__class__, unicode(term), term.language, term.datatype)
+    return (term.__class__, term)
+
+
+class LRUCache(object):
+    """
+    A mapping of at most size entries which discards the least recently
+    used entry when full, and counts the hits and misses of get.
+
+    Entries are kept in a circular doubly linked list of
+    [previous, next, key, value] links, most recently used last. The
+    list is guarded by a lock since the store may be used from several
+    threads.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__lock = Lock()
+        self.clear()
+
+    def clear(self):
+        self.__map = {}
+        root = self.__root = []
+        root[:] = [root, root, None, None]
+
+    def __len__(self):
+        return len(self.__map)
+
+    def __contains__(self, key):
+        return key in self.__map
+
+    def get(self, key, default=None):
+        self.__lock.acquire()
+        try:
+            link = self.__map.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__unlink(link)
+            self.__append(link)
+            return link[3]
+        finally:
+            self.__lock.release()
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+        self.__lock.acquire()
+        try:
+            link = self.__map.get(key)
+            if link is not None:
+                link[3] = value
+                self.__unlink(link)
+                self.__append(link)
+                return
+            if len(self.__map) >= self.size:
+                oldest = self.__root[1]
+                self.__unlink(oldest)
+                del self.__map[oldest[2]]
+            link = self.__map[key] = [None, None, key, value]
+            self.__append(link)
+        finally:
+            self.__lock.release()
+
+    def __unlink(self, link):
+        previous, next = link[0], link[1]
+        previous[1] = next
+        next[0] = previous
+
+    def __append(self, link):
+        root = self.__root
+        last = root[0]
+        link[0] = last
+        link[1] = root
+        last[1] = root[0] = link
+
+
+# names of the spo, pos and osp indices in settings and stats
+INDEX_NAMES = ("spo", "pos", "osp")
+
+
+def parse_size(value):
+    """
+    Parse a number of bytes, optionally with a K, M or G suffix.
+
+    >>> parse_size("16K"), parse_size("1m"), parse_size(100)
+    (16384, 1048576, 100)
+    """
+    if isinstance(value, (int, long)):
+        return value
+    value = value.strip().upper()
+    for suffix, shift in (("K", 10), ("M", 20), ("G", 30)):
+        if value.endswith(suffix):
+            return int(value[:-1]) << shift
+    return int(value)
+
+def parse_bool(value):
+    if isinstance(value, basestring):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+def parse_optional(parse):
+    def parse_or_none(value):
+        if value is None or \
+           isinstance(value, basestring) and value.strip().lower() == "none":
+            return None
+        return parse(value)
+    return parse_or_none
+
+# settings accepted by Sleepycat.open, with the functions parsing them
+CONFIGURATION = {
+    "cache_size": parse_size,
+    "page_size": parse_optional(parse_size),
+    "spo_page_size": parse_optional(parse_size),
+    "pos_page_size": parse_optional(parse_size),
+    "osp_page_size": parse_optional(parse_size),
+    "mmap_size": parse_optional(parse_size),
+    "log_buffer_size": parse_optional(parse_size),
+    "log_max": parse_optional(parse_size),
+    "txn_nosync": parse_bool,
+    "txn_write_nosync": parse_bool,
+    "transaction_aware": parse_bool,
+    "group_commit_size": parse_optional(int),
+    "group_commit_delay": parse_optional(float),
+    "term_encoding": str,
+    "term_cache_size": int,
+    "batch_size": int,
+    "scan_batch_size": int,
+}
+
+def parse_configuration(configuration):
+    """
+    Split a Sleepycat configuration into the store directory and a dict of
+    parsed settings; see Sleepycat.open.
+
+    >>> path, settings = parse_configuration(
+    ...     "/tmp/db?cache_size=1M&transaction_aware=yes")
+    >>> path, sorted(settings.items())
+    ('/tmp/db', [('cache_size', 1048576), ('transaction_aware', True)])
+    """
+    if isinstance(configuration, dict):
+        settings = dict(configuration)
+        path = settings.pop("path")
+    elif "?" in configuration:
+        path, query = configuration.split("?", 1)
+        settings = {}
+        for pair in query.split("&"):
+            if pair:
+                if "=" not in pair:
+                    raise ValueError("Sleepycat setting %r has no value"
+                                     % unquote(pair))
+                name, value = pair.split("=", 1)
+                settings[unquote(name)] = unquote(value)
+    else:
+        path, settings = configuration, {}
+    for name, value in settings.items():
+        parse = CONFIGURATION.get(name)
+        if parse is None:
+            raise ValueError("Unknown Sleepycat setting %r" % name)
+        settings[name] = parse(value)
+    return path, settings
+
+
+# the term encoding formats, as recorded in the meta database
+FORMATS = {"pickle": "pickle", "binary": "binary-1"}
+
+# id of no term (the conjunctive context, a Literal without datatype) in
+# the binary format; record numbers start at 1
+NULL_ID = "\0\0\0\0"
+
+# appended to the ids at the start of a key, sorts after any key starting
+# with them: ids in the pickle format are digits and "^", and binary keys
+# are 16 bytes long
+AFTER_KEYS = "\xff" * 16
+
+BINARY_TAGS = {URIRef: "U", BNode: "B", Literal: "L", Variable: "V",
+               Graph: "G", QuotedGraph: "Q", GraphValue: "v"}
+BINARY_CLASSES = dict((tag, cls) for cls, tag in BINARY_TAGS.iteritems())
+
+
+class StringKeys(object):
+    """
+    Keys of the pickle format: decimal ids joined by "^", with the empty
+    string as the conjunctive context.
+    """
+    null = ""
+
+    def join(self, ids):
+        return "^".join(ids) + "^"
+
+    def split(self, key):
+        return key.split("^")
+
+    def join_contexts(self, contexts):
+        return "^".join(contexts)
+
+    def split_contexts(self, value):
+        return [c for c in value.split("^") if c]
+
+    def from_recno(self, recno):
+        return "%s" % recno
+
+    def to_recno(self, i):
+        return int(i)
+
+
+class BinaryKeys(object):
+    """
+    Keys of the binary format: ids are 4 byte big-endian record numbers,
+    concatenated without separators so that keys sort by id.
+    """
+    null = NULL_ID
+
+    def join(self, ids):
+        return "".join(ids)
+
+    def split(self, key):
+        return key[0:4], key[4:8], key[8:12], key[12:16]
+
+    def join_contexts(self, contexts):
+        return "".join(contexts)
+
+    def split_contexts(self, value):
+        return [value[i:i+4] for i in xrange(0, len(value), 4)]
+
+    def from_recno(self, recno):
+        return pack(">I", recno)
+
+    def to_recno(self, i):
+        return unpack(">I", i)[0]
+
+string_keys = StringKeys()
+binary_keys = BinaryKeys()
+
 
-def to_key_func(i):
+def to_key_func(i, keys):
+    join = keys.join
     def to_key(triple, context):
         "Takes a string; returns key"
-        return "^".join((context, triple[i%3], triple[(i+1)%3], triple[(i+2)%3], "")) # "" to tac on the trailing ^
+        return join((context, triple[i%3], triple[(i+1)%3], triple[(i+2)%3]))
     return to_key
 
-def from_key_func(i):
+def from_key_func(i, keys):
+    split = keys.split
     def from_key(key):
         "Takes a key; returns string"
-        parts = key.split("^")
+        parts = split(key)
         return parts[0], parts[(3-i+0)%3+1], parts[(3-i+1)%3+1], parts[(3-i+2)%3+1]
     return from_key
 
-def results_from_key_func(i, from_string):
-    def from_key(key, subject, predicate, object, contexts_value):
-        "Takes a key and subject, predicate, object; returns tuple for yield"
-        parts = key.split("^")
+def triple_from_key_func(i, from_string, keys):
+    split = keys.split
+    def from_key(key, subject, predicate, object):
+        "Takes a key and subject, predicate, object; returns the triple"
+        parts = split(key)
         if subject is None:
             # TODO: i & 1: # dis assemble and/or measure to see which is faster
             # subject is None or i & 1
@@ -494,7 +1278,15 @@ def results_from_key_func(i, from_string):
             o = from_string(parts[(3-i+2)%3+1])
         else:
             o = object
-        return (s, p, o), (from_string(c) for c in contexts_value.split("^") if c)
+        return s, p, o
+    return from_key
+
+def results_from_key_func(i, from_string, keys):
+    triple_from_key = triple_from_key_func(i, from_string, keys)
+    split_contexts = keys.split_contexts
+    def from_key(key, subject, predicate, object, contexts_value):
+        "Takes a key and subject, predicate, object; returns tuple for yield"
+        return triple_from_key(key, subject, predicate, object), (from_string(c) for c in split_contexts(contexts_value))
     return from_key
 
 def readable_index(i):
@@ -503,3 +1295,55 @@ def readable_index(i):
     if i & 2: p = "p"
     if i & 4: o = "o"
     return "%s,%s,%s" % (s, p, o)
+
+def migrate(source, destination, term_encoding="binary"):
+    """
+    Copy the Sleepycat store in directory source to a new store in
+    directory destination using term_encoding ("pickle" or "binary"),
+    e.g. to convert a store created with pickled terms.
+    """
+    if not exists(source):
+        raise ValueError("No Sleepycat store at %s" % source)
+    from_store = Sleepycat()
+    if from_store.open(source, create=False) != VALID_STORE:
+        raise ValueError("Could not open Sleepycat store %s" % source)
+    to_store = Sleepycat()
+    to_store.term_encoding = term_encoding
+    try:
+        if to_store.open(destination, create=True) != VALID_STORE:
+            raise ValueError("Could not open Sleepycat store %s" % destination)
+        try:
+            if to_store.term_encoding != term_encoding:
+                raise ValueError("%s is a %s store" % (destination,
+                                                       to_store.term_encoding))
+
+            def rebind(term):
+                # graphs are bound to the store they were read from
+                if isinstance(term, Graph):
+                    return term.__class__(to_store, term.identifier)
+                return term
+
+            def quads():
+                for context in from_store.contexts():
+                    c = rebind(context)
+                    for s, p, o in from_store.triples_without_contexts(
+                            (None, None, None), context):
+                        yield rebind(s), rebind(p), rebind(o), c
+
+            for prefix, namespace in from_store.namespaces():
+                to_store.bind(prefix, namespace)
+            to_store.addN(quads())
+        finally:
+            to_store.close()
+    finally:
+        from_store.close()
+
+def main():
+    import sys
+    if len(sys.argv) in (3, 4):
+        migrate(*sys.argv[1:])
+    else:
+        print "usage: python -m rdflib.plugins.sleepycat source destination [pickle|binary]"
+
+if __name__ == "__main__":
+    main()
@@ -64,6 +64,71 @@ class TripleRemovedEvent(Event):
 
 from cPickle import Pickler, Unpickler, UnpicklingError
 from cStringIO import StringIO
+from itertools import islice
+
+# statements parsers add to a store at a time
+BATCH_SIZE = 10000
+
+# terms or names kept by the caches of parsers and serializers
+INTERN_SIZE = 100000
+
+
+class InternCache(dict):
+    """
+    Dictionary of at most size items, for the caches parsers and
+    serializers keep of the terms made from repeated text. Setting an
+    item when the cache is full clears it first, which bounds memory on
+    large documents without the cost of tracking use.
+    """
+    def __init__(self, size=INTERN_SIZE):
+        dict.__init__(self)
+        self.size = size
+
+    def __setitem__(self, key, value):
+        if len(self) >= self.size:
+            self.clear()
+        dict.__setitem__(self, key, value)
+
+
+def batches(iterable, size):
+    """
+    Generator of lists of at most size items taken from iterable, for
+    stores that process bulk additions a batch at a time.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def default_context(graph):
+    """
+    Return the graph triples added to graph without a context go to:
+    the default context of a ConjunctiveGraph, else graph itself.
+    """
+    return getattr(graph, "default_context", graph)
+
+
+def add_triples(graph, triples):
+    """
+    Add triples to graph in one addN call, for parsers handing their
+    sink a batch at a time.
+    """
+    context = default_context(graph)
+    graph.addN((s, p, o, context) for s, p, o in triples)
+
+
+def distinct(iterable):
+    """
+    Generator over the items of iterable, leaving out those seen before.
+    """
+    seen = set()
+    for item in iterable:
+        if item not in seen:
+            seen.add(item)
+            yield item
 
 
 class NodePickler(object):
@@ -176,13 +241,16 @@ class Store(object):
         It should be an error to not specify a context and have the quoted argument be True.
         It should also be an error for the quoted argument to be True when the store is not formula-aware.
         """
-        self.dispatcher.dispatch(TripleAddedEvent(triple=(subject, predicate, object), context=context))
+        if self.dispatcher.subscribed(TripleAddedEvent):
+            self.dispatcher.dispatch(TripleAddedEvent(triple=(subject, predicate, object), context=context))
 
     def addN(self, quads):
        """
        Adds each item in the list of statements to a specific context. The quoted argument
        is interpreted by formula-aware stores to indicate this statement is quoted/hypothetical.
-       Note that the default implementation is a redirect to add
+       Note that the default implementation is a redirect to add; stores
+       that can insert many statements at once more cheaply than one by
+       one (see the memory and Sleepycat stores) override it.
        """
        for s,p,o,c in quads:
            assert c is not None, "Context associated with %s %s %s is None!"%(s,p,o)
@@ -193,7 +261,8 @@ class Store(object):
 
     def remove(self, (subject, predicate, object), context=None):
         """ Remove the set of triples matching the pattern from the store """
-        self.dispatcher.dispatch(TripleRemovedEvent(triple=(subject, predicate, object), context=context))
+        if self.dispatcher.subscribed(TripleRemovedEvent):
+            self.dispatcher.dispatch(TripleRemovedEvent(triple=(subject, predicate, object), context=context))
 
     def triples_choices(self, (subject, predicate, object_),context=None):
         """
@@ -243,6 +312,16 @@ class Store(object):
         for the context or the identifier associated with the Conjunctive Graph (if it's context aware).
         """
 
+    def triples_without_contexts(self, (subject, predicate, object), context=None):
+        """
+        A generator over the (subject, predicate, object) triples matching the
+        pattern, for callers that have no use for the contexts yielded by
+        triples. The default implementation drops them; stores override this
+        to avoid looking them up at all.
+        """
+        for triple, contexts in self.triples((subject, predicate, object), context):
+            yield triple
+
     # variants of triples will be done if / when optimization is needed
 
     def __len__(self, context=None):
@@ -251,6 +330,46 @@ class Store(object):
         if the context is not specified, otherwise it should return the number of statements in the formula or context given.
         """
 
+    def count(self, (subject, predicate, object), context=None):
+        """
+        Number of statements matching the pattern, counted like __len__. The
+        default implementation iterates over the matches; stores override
+        this to count without materializing the terms.
+        """
+        if subject is None and predicate is None and object is None:
+            return self.__len__(context=context)
+        count = 0
+        for triple in self.triples_without_contexts((subject, predicate, object), context):
+            count += 1
+        return count
+
+    def uniqueSubjects(self, context=None):
+        """
+        Generator over the distinct subjects of the statements in the
+        context, or in the store, counted like __len__. The default
+        implementation remembers the subjects seen in a scan of all the
+        statements; stores override this and the two methods below to
+        read each term once from the top level of an index.
+        """
+        return distinct(s for s, p, o in
+                      self.triples_without_contexts((None, None, None), context))
+
+    def uniquePredicates(self, context=None):
+        """
+        Generator over the distinct predicates of the statements in the
+        context, or in the store.
+        """
+        return distinct(p for s, p, o in
+                      self.triples_without_contexts((None, None, None), context))
+
+    def uniqueObjects(self, context=None):
+        """
+        Generator over the distinct objects of the statements in the
+        context, or in the store.
+        """
+        return distinct(o for s, p, o in
+                      self.triples_without_contexts((None, None, None), context))
+
     def contexts(self, triple=None):
         """
         Generator over all contexts in the graph. If triple is specified, a generator over all
@@ -273,6 +392,12 @@ class Store(object):
         if False:
             yield
 
+    def flush(self):
+        """
+        Apply writes the store has buffered, so that it is not reorganized
+        by a later read, e.g. before several threads read it at once.
+        """
+
     # Optional Transactional methods
 
     def commit(self):
@@ -0,0 +1,75 @@
+import unittest
+
+from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.term import URIRef, BNode, Literal
+
+from test import test_graph
+from test import test_context
+
+
+class CompactGraphTestCase(test_graph.GraphTestCase):
+    store_name = "Compact"
+
+
+class CompactStoreTestCase(test_context.ContextTestCase):
+    store = "Compact"
+
+
+class CompactBufferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = ConjunctiveGraph(store="Compact")
+        # force a merge every few statements
+        self.graph.store.buffer_size = 7
+        self.p = URIRef(u'p')
+
+    def testMergeAndLen(self):
+        p = self.p
+        g1 = Graph(self.graph.store, URIRef(u'g1'))
+        g2 = Graph(self.graph.store, URIRef(u'g2'))
+        for i in range(100):
+            g1.add((URIRef(u's%d' % (i % 10)), p, Literal(i)))
+            g2.add((URIRef(u's%d' % (i % 10)), p, Literal(i % 50)))
+        self.assertEquals(len(g1), 100)
+        self.assertEquals(len(g2), 50)
+        self.assertEquals(len(self.graph), 100)
+        self.assertEquals(len(list(self.graph.triples((None, p, None)))), 100)
+        self.assertEquals(len(list(g1.objects(URIRef(u's3'), p))), 10)
+        self.assertEquals(
+            set(self.graph.contexts((URIRef(u's3'), p, Literal(3)))),
+            set([g1, g2]))
+
+    def testDuplicates(self):
+        g = Graph(self.graph.store, URIRef(u'g'))
+        t = (BNode(), self.p, Literal(u'x'))
+        for i in range(20):
+            g.add(t)
+        self.assertEquals(len(g), 1)
+        self.assertEquals(len(self.graph), 1)
+        g.remove(t)
+        self.assertEquals(len(g), 0)
+        self.assertEquals(len(self.graph), 0)
+
+    def testAddN(self):
+        p = self.p
+        g1 = Graph(self.graph.store, URIRef(u'g1'))
+        g2 = Graph(self.graph.store, URIRef(u'g2'))
+        quads = [(URIRef(u's%d' % (i % 5)), p, Literal(i % 20), g)
+                 for i in range(40) for g in (g1, g2)]
+        self.graph.addN(quads)
+        self.assertEquals(len(g1), 20)
+        self.assertEquals(len(g2), 20)
+        self.assertEquals(len(self.graph), 20)
+
+    def testRemoveWhileIterating(self):
+        g = Graph(self.graph.store, URIRef(u'g'))
+        for i in range(3000):
+            g.add((URIRef(u's%d' % i), self.p, Literal(i)))
+        for t in g:
+            g.remove(t)
+        self.assertEquals(len(g), 0)
+        self.assertEquals(len(self.graph), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
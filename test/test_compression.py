@@ -0,0 +1,144 @@
+import os
+import bz2
+import gzip
+import shutil
+import unittest
+from tempfile import mkdtemp
+from StringIO import StringIO
+
+from rdflib.graph import Graph
+from rdflib.parser import create_input_source
+from rdflib.term import URIRef, Literal
+from rdflib.compression import DecompressingStream, decompressing_stream, \
+     gzip_decompressor
+
+
+ntriples = "".join('<http://example.org/%d> <http://example.org/p> "%d" .\n'
+                   % (i, i) for i in range(1000))
+
+
+def gzipped(data):
+    f = StringIO()
+    g = gzip.GzipFile(fileobj=f, mode="wb")
+    g.write(data)
+    g.close()
+    return f.getvalue()
+
+
+class ShortReads(object):
+    """A stream returning one byte a read, like a slow pipe."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.data)
+        data, self.data = self.data[:min(size, 1)], self.data[min(size, 1):]
+        return data
+
+
+class CompressionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name, data=None):
+        path = os.path.join(self.dir, name)
+        if data is not None:
+            f = open(path, "wb")
+            f.write(data)
+            f.close()
+        return path
+
+    def testParse(self):
+        for name, data in (("a.nt.gz", gzipped(ntriples)),
+                           ("a.nt.bz2", bz2.compress(ntriples)),
+                           # found by content, not by name
+                           ("b.nt", gzipped(ntriples)),
+                           ("c.nt", ntriples)):
+            g = Graph()
+            g.parse(self.path(name, data), format="nt")
+            self.assertEquals(len(g), 1000)
+            g = Graph()
+            g.parse(StringIO(data), format="nt")
+            self.assertEquals(len(g), 1000)
+
+    def testConcatenated(self):
+        half = len(ntriples) / 2
+        for data in (gzipped(ntriples[:half]) + gzipped(ntriples[half:]),
+                     bz2.compress(ntriples[:half]) +
+                     bz2.compress(ntriples[half:])):
+            stream = decompressing_stream(StringIO(data))
+            stream.chunk_size = 7
+            self.assertEquals(stream.read(), ntriples)
+
+    def testReadline(self):
+        stream = DecompressingStream(StringIO(gzipped(ntriples)),
+                                     gzip_decompressor)
+        stream.chunk_size = 10
+        lines = ntriples.splitlines(True)
+        self.assertEquals(stream.readline(), lines[0])
+        self.assertEquals(stream.read(5), lines[1][:5])
+        self.assertEquals(stream.readline(3), lines[1][5:8])
+        self.assertEquals(list(stream), [lines[1][8:]] + lines[2:])
+        self.assertEquals(stream.read(), "")
+
+    def testPadding(self):
+        # zeros after a gzip member, read across several chunks
+        data = gzipped(ntriples) + "\0" * 100000
+        for chunk_size in (7, 1 << 16):
+            stream = decompressing_stream(StringIO(data))
+            stream.chunk_size = chunk_size
+            self.assertEquals(stream.read(), ntriples)
+        g = Graph()
+        g.parse(self.path("pad.nt.gz", data), format="nt")
+        self.assertEquals(len(g), 1000)
+
+    def testShortReads(self):
+        stream = decompressing_stream(ShortReads(gzipped(ntriples)))
+        self.assertEquals(stream.read(), ntriples)
+
+    def testPlainStreams(self):
+        f = open(self.path("plain.nt", ntriples), "rb")
+        self.assert_(decompressing_stream(f) is f)
+        self.assertEquals(f.read(), ntriples)
+        f.close()
+
+    def testPlainPipes(self):
+        read, write = os.pipe()
+        os.write(write, ntriples[:1000])
+        os.close(write)
+        f = os.fdopen(read, "rb")
+        source = create_input_source(f)
+        stream = source.getByteStream()
+        self.assertEquals(stream.name, f.name)
+        self.assertEquals(stream.fileno(), read)
+        self.assertEquals(stream.read(), ntriples[:1000])
+        f.close()
+        self.assertRaises(AttributeError, getattr,
+                          decompressing_stream(StringIO(gzipped(ntriples))),
+                          "buf")
+
+    def testSerialize(self):
+        g = Graph()
+        g.parse(data=ntriples, format="nt")
+        for name, decompress in (("out.nt.gz", lambda path:
+                                  gzip.open(path).read()),
+                                 ("out.nt.bz2", lambda path:
+                                  bz2.BZ2File(path).read())):
+            path = self.path(name)
+            g.serialize(path, format="nt")
+            g2 = Graph()
+            g2.parse(data=decompress(path), format="nt")
+            self.assertEquals(set(g2), set(g))
+            g2 = Graph()
+            g2.parse(path, format="nt")
+            self.assertEquals(set(g2), set(g))
+
+
+if __name__ == "__main__":
+    unittest.main()
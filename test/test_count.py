@@ -0,0 +1,128 @@
+import unittest
+
+from rdflib.graph import Graph, ConjunctiveGraph, QuotedGraph
+from rdflib.term import URIRef, Literal
+from rdflib.collection import Collection
+
+
+class CountTestCase(unittest.TestCase):
+    store = "IOMemory"
+
+    def setUp(self):
+        self.graph = ConjunctiveGraph(store=self.store)
+        self.open()
+        store = self.graph.store
+        self.contexts = [Graph(store, URIRef(u'c1')),
+                         Graph(store, URIRef(u'c2'))]
+        if store.formula_aware:
+            self.contexts.append(QuotedGraph(store, URIRef(u'f')))
+        p = [URIRef(u'p0'), URIRef(u'p1')]
+        self.triples = []
+        for i in range(12):
+            t = (URIRef(u's%d' % (i % 4)), p[i % 2], Literal(i % 3))
+            self.triples.append(t)
+            self.contexts[i % len(self.contexts)].add(t)
+            if i % 5 == 0:
+                self.contexts[0].add(t)
+
+    def open(self):
+        pass
+
+    def tearDown(self):
+        self.graph.close()
+
+    def patterns(self):
+        for s, p, o in self.triples + [(URIRef(u'x'), None, None)]:
+            for mask in range(8):
+                yield (mask & 1 and s or None, mask & 2 and p or None,
+                       mask & 4 and o or None)
+
+    def testCount(self):
+        store = self.graph.store
+        for context in [None] + self.contexts:
+            for pattern in self.patterns():
+                self.assertEquals(
+                    store.count(pattern, context),
+                    len(list(store.triples_without_contexts(pattern, context))),
+                    (pattern, context))
+
+    def testGraphCount(self):
+        self.assertEquals(len(self.graph), self.graph.count())
+        p = URIRef(u'p0')
+        self.assertEquals(self.graph.count((None, p, None)),
+                          len(list(self.graph.triples((None, p, None)))))
+        c = self.contexts[0]
+        self.assertEquals(len(c), len(list(c)))
+        self.assertEquals(c.count((None, p, None)),
+                          len(list(c.triples((None, p, None)))))
+
+    def assertUnique(self):
+        store = self.graph.store
+        methods = [(store.uniqueSubjects, 0), (store.uniquePredicates, 1),
+                   (store.uniqueObjects, 2)]
+        for context in [None] + self.contexts:
+            triples = list(store.triples_without_contexts((None, None, None),
+                                                          context))
+            for method, position in methods:
+                terms = list(method(context))
+                self.assertEquals(len(terms), len(set(terms)))
+                self.assertEquals(set(terms),
+                                  set([t[position] for t in triples]),
+                                  (method, context))
+
+    def testUnique(self):
+        self.assertUnique()
+
+    def testUniqueAfterRemove(self):
+        # terms whose last triple is removed are no longer generated
+        self.graph.remove((URIRef(u's0'), None, None))
+        for c in self.contexts:
+            c.remove((None, None, Literal(1)))
+        self.assertUnique()
+
+    def testGraphUnique(self):
+        p = URIRef(u'p0')
+        self.assertEquals(sorted(self.graph.predicates(unique=True)),
+                          [p, URIRef(u'p1')])
+        c = self.contexts[1]
+        subjects = list(c.subjects(unique=True))
+        self.assertEquals(sorted(subjects), sorted(set(c.subjects())))
+        objects = list(self.graph.objects(None, p, unique=True))
+        self.assertEquals(sorted(objects),
+                          sorted(set(self.graph.objects(None, p))))
+
+    def testGraphUniqueContext(self):
+        # a context may be given as a graph or as its identifier, with
+        # or without unique
+        g = self.graph
+        c = self.contexts[1]
+        expected = set(t[0] for t in c)
+        self.assert_(expected)
+        for context in (c, c.identifier):
+            for unique in (False, True):
+                self.assertEquals(set(g.subjects(unique=unique,
+                                                 context=context)),
+                                  expected, (context, unique))
+                self.assertEquals(set(g.predicates(context=context,
+                                                   unique=unique)),
+                                  set(t[1] for t in c))
+                self.assertEquals(set(g.objects(None, None, unique,
+                                                context)),
+                                  set(t[2] for t in c))
+
+    def testCollectionLen(self):
+        g = self.contexts[1]
+        c = Collection(g, URIRef(u'l'), [Literal(1), Literal(1), Literal(2)])
+        self.assertEquals(len(c), 3)
+
+
+class MemoryCountTestCase(CountTestCase):
+    store = "default"
+
+
+class CompactCountTestCase(CountTestCase):
+    store = "Compact"
+
+
+if __name__ == "__main__":
+    unittest.main()
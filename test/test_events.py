@@ -57,5 +57,57 @@ class EventTestCase(unittest.TestCase):
         assert c1.has_key('bob') == False
         assert c2.has_key('bob') == False
 
+class StoreEventTestCase(unittest.TestCase):
+
+    def testAddedEvents(self):
+        from rdflib.graph import ConjunctiveGraph, Graph
+        from rdflib.store import TripleAddedEvent
+        from rdflib.term import URIRef, BNode
+        graph = ConjunctiveGraph()
+        added = []
+        graph.store.dispatcher.subscribe(TripleAddedEvent, added.append)
+        context = Graph(graph.store, URIRef(u'c'))
+        graph.add((BNode(), URIRef(u'p'), URIRef(u'o')))
+        graph.addN([(BNode(), URIRef(u'p'), URIRef(u'o'), context)])
+        self.assertEquals(len(added), 2)
+        self.assertEquals(added[1].context, context)
+
+    def testMemoryEvents(self):
+        from rdflib.graph import Graph
+        from rdflib.plugins.memory import Memory
+        from rdflib.store import TripleAddedEvent
+        from rdflib.term import URIRef
+        graph = Graph(store=Memory())
+        added = []
+        graph.store.dispatcher.subscribe(TripleAddedEvent, added.append)
+        t1 = (URIRef(u's1'), URIRef(u'p'), URIRef(u'o'))
+        t2 = (URIRef(u's2'), URIRef(u'p'), URIRef(u'o'))
+        graph.add(t1)
+        graph.addN([t2 + (graph,)])
+        self.assertEquals([e.triple for e in added], [t1, t2])
+        self.assertEquals(added[1].context, graph)
+
+    def testNoEventsForDuplicates(self):
+        from rdflib.graph import ConjunctiveGraph, Graph
+        from rdflib.store import TripleAddedEvent
+        from rdflib.term import URIRef
+        for store in ("default", "IOMemory", "Compact"):
+            graph = ConjunctiveGraph(store=store)
+            context = Graph(graph.store, URIRef(u'c'))
+            t = (URIRef(u's'), URIRef(u'p'), URIRef(u'o'))
+            context.add(t)
+            added = []
+            graph.store.dispatcher.subscribe(TripleAddedEvent, added.append)
+            t2 = (URIRef(u's2'), URIRef(u'p'), URIRef(u'o'))
+            graph.addN([t + (context,), t2 + (context,)])
+            self.assertEquals([e.triple for e in added], [t2], store)
+
+    def testNoSubscribers(self):
+        d = events.Dispatcher()
+        self.assertEquals(d.subscribed(AddedEvent), False)
+        d.subscribe(RemovedEvent, lambda event: None)
+        self.assertEquals(d.subscribed(AddedEvent), False)
+        self.assertEquals(d.subscribed(RemovedEvent), True)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,201 @@
+import os
+import sys
+import gzip
+import errno
+import zlib
+import time
+import shutil
+import socket
+import unittest
+import threading
+from StringIO import StringIO
+from tempfile import mkdtemp
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from urllib2 import URLError
+
+from rdflib.graph import Graph
+from rdflib.term import URIRef, Literal
+from rdflib import parser
+from rdflib.parser import HTTPFetcher
+
+
+rdfxml = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:ex="http://example.org/">
+  <rdf:Description rdf:about="http://example.org/a">
+    <ex:b>c</ex:b>
+  </rdf:Description>
+</rdf:RDF>
+"""
+
+ntriples = '<http://example.org/a> <http://example.org/b> "nt" .\n'
+
+
+def gzipped(data):
+    f = StringIO()
+    g = gzip.GzipFile(fileobj=f, mode="wb")
+    g.write(data)
+    g.close()
+    return f.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        self.server.conditional.append(
+            self.headers.get("If-None-Match") is not None)
+        status, content_type, body, headers = 200, "application/rdf+xml", \
+                                              rdfxml, {}
+        if self.path == "/doc":
+            headers["ETag"] = '"v1"'
+            if self.headers.get("If-None-Match") == '"v1"':
+                status, body = 304, ""
+        elif self.path == "/gzip":
+            headers["Content-Encoding"] = "gzip"
+            body = gzipped(body)
+        elif self.path == "/deflate":
+            headers["Content-Encoding"] = "deflate"
+            body = zlib.compress(body)
+        elif self.path == "/nt":
+            content_type, body = "text/plain; charset=utf-8", ntriples
+            headers["Last-Modified"] = "Mon, 01 Jan 2001 00:00:00 GMT"
+        elif self.path == "/redirect":
+            status, body = 303, ""
+            headers["Location"] = "/doc"
+        elif self.path == "/slow":
+            time.sleep(1)
+        elif self.path != "/plain":
+            status, body = 404, "not found"
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients the tests time out or close early leave the handlers
+        # writing to closed connections
+        error = sys.exc_info()[1]
+        if isinstance(error, socket.error) and \
+               error.args[0] in (errno.EPIPE, errno.ECONNRESET):
+            return
+        HTTPServer.handle_error(self, request, client_address)
+
+
+class HTTPFetcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.conditional = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+        self.base = "http://127.0.0.1:%s" % self.server.server_address[1]
+        self.cache_dir = mkdtemp()
+        self.fetcher = HTTPFetcher(cache_dir=self.cache_dir)
+        self.default_fetcher = parser.fetcher
+        parser.fetcher = self.fetcher
+
+    def tearDown(self):
+        parser.fetcher = self.default_fetcher
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def parse(self, path, **args):
+        g = Graph()
+        g.parse(self.base + path, **args)
+        return g
+
+    def testParse(self):
+        g = self.parse("/plain")
+        self.assertEquals(list(g), [(URIRef("http://example.org/a"),
+                                     URIRef("http://example.org/b"),
+                                     Literal("c"))])
+        g = self.parse("/nt", format="nt")
+        self.assertEquals(g.value(URIRef("http://example.org/a"),
+                                  URIRef("http://example.org/b")),
+                          Literal("nt"))
+
+    def testKeepAlive(self):
+        for i in range(3):
+            self.assertEquals(len(self.parse("/plain")), 1)
+        self.assertEquals(self.server.connections, 1)
+
+    def testConditionalGet(self):
+        for i in range(2):
+            self.assertEquals(len(self.parse("/doc")), 1)
+            self.assertEquals(len(self.parse("/nt", format="nt")), 1)
+        self.assertEquals(len(os.listdir(self.cache_dir)), 4)
+        stream, content_type = self.fetcher.fetch(self.base + "/doc", {})
+        self.assertEquals(stream.read(), rdfxml)
+        stream.close()
+        self.assertEquals(content_type, "application/rdf+xml")
+        self.assertEquals(self.server.requests,
+                          ["/doc", "/nt", "/doc", "/nt", "/doc"])
+
+    def testMissingCachedBody(self):
+        self.assertEquals(len(self.parse("/doc")), 1)
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".meta"):
+                os.remove(os.path.join(self.cache_dir, name))
+        self.assertEquals(len(self.parse("/doc")), 1)
+        # the document is fetched again without a conditional GET
+        self.assertEquals(self.server.requests, ["/doc", "/doc"])
+        self.assertEquals(self.server.conditional, [False, False])
+        self.assertEquals(len(self.parse("/doc")), 1)
+        self.assertEquals(self.server.conditional, [False, False, True])
+
+    def testContentEncoding(self):
+        for path in ("/gzip", "/deflate"):
+            stream, content_type = self.fetcher.fetch(self.base + path, {})
+            self.assertEquals(stream.read(), rdfxml)
+
+    def testRedirect(self):
+        self.assertEquals(len(self.parse("/redirect")), 1)
+        self.assertEquals(self.server.requests, ["/redirect", "/doc"])
+        # a cached copy of /redirect is not revalidated against /doc
+        self.assertEquals(len(self.parse("/redirect")), 1)
+        self.assertEquals(self.server.conditional, [False, False, True, False])
+
+    def testErrors(self):
+        self.assertRaises(Exception, self.parse, "/missing")
+        fetcher = HTTPFetcher(timeout=0.2)
+        try:
+            self.assertRaises(socket.timeout, fetcher.fetch,
+                              self.base + "/slow", {})
+        finally:
+            fetcher.close()
+        # failing to connect raises URLError, as with urllib2
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()
+        self.assertRaises(URLError, self.fetcher.fetch,
+                          "http://127.0.0.1:%s/plain" % port, {})
+        # the pooled connection is still usable after the 404
+        self.assertEquals(len(self.parse("/plain")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from rdflib.graph import Graph, ConjunctiveGraph, QuotedGraph
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.plugins.memory import Memory
+
+
+class MemoryLenTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = Graph(store=Memory())
+        self.p = URIRef(u'p')
+
+    def testLen(self):
+        s = BNode()
+        self.graph.add((s, self.p, Literal(1)))
+        self.graph.add((s, self.p, Literal(1)))
+        self.graph.add((s, self.p, Literal(2)))
+        self.assertEquals(len(self.graph), 2)
+        self.graph.remove((s, None, None))
+        self.assertEquals(len(self.graph), 0)
+
+    def testAddN(self):
+        s = BNode()
+        quads = [(s, self.p, Literal(i % 3), self.graph) for i in range(9)]
+        self.graph.store.addN(quads)
+        self.assertEquals(len(self.graph), 3)
+        self.assertEquals(len(list(self.graph.objects(s, self.p))), 3)
+
+
+class IOMemoryLenTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = ConjunctiveGraph(store='IOMemory')
+        self.store = self.graph.store
+        self.p = URIRef(u'p')
+        self.c1 = Graph(self.store, URIRef(u'c1'))
+        self.c2 = Graph(self.store, URIRef(u'c2'))
+        self.f = QuotedGraph(self.store, URIRef(u'f'))
+
+    def testDuplicatesAndContexts(self):
+        t = (BNode(), self.p, Literal(u'x'))
+        self.c1.add(t)
+        self.c1.add(t)
+        self.c2.add(t)
+        self.assertEquals(len(self.graph), 1)
+        self.assertEquals(len(self.c1), 1)
+        self.assertEquals(len(self.c2), 1)
+        self.c1.remove(t)
+        self.assertEquals(len(self.graph), 1)
+        self.assertEquals(len(self.c1), 0)
+        self.graph.remove(t)
+        self.assertEquals(len(self.graph), 0)
+        self.assertEquals(len(self.c2), 0)
+
+    def testQuoted(self):
+        t = (BNode(), self.p, Literal(u'x'))
+        self.f.add(t)
+        self.assertEquals(len(self.graph), 0)
+        self.assertEquals(len(self.f), 1)
+        self.c1.add(t)
+        self.assertEquals(len(self.graph), 1)
+        self.f.remove(t)
+        self.assertEquals(len(self.f), 0)
+        self.assertEquals(len(self.graph), 1)
+
+    def testAddN(self):
+        s = BNode()
+        quads = [(s, self.p, Literal(i % 3), self.c1) for i in range(9)]
+        quads += [(s, self.p, Literal(0), self.c2),
+                  (s, self.p, Literal(9), self.f)]
+        self.graph.addN(iter(quads))
+        self.assertEquals(len(self.graph), 3)
+        self.assertEquals(len(self.c1), 3)
+        self.assertEquals(len(self.c2), 1)
+        self.assertEquals(len(self.f), 1)
+        self.assertEquals(
+            set(self.graph.contexts((s, self.p, Literal(0)))),
+            set([self.c1, self.c2]))
+
+    def testTriplesWithoutContexts(self):
+        t = (BNode(), self.p, Literal(u'x'))
+        self.c1.add(t)
+        self.c2.add(t)
+        self.f.add((BNode(), self.p, Literal(u'y')))
+        self.assertEquals(
+            list(self.store.triples_without_contexts((None, self.p, None))),
+            [t])
+        (triple, contexts), = self.store.triples((None, self.p, None))
+        self.assertEquals(triple, t)
+        # the view can be iterated more than once
+        self.assertEquals(set(contexts), set([self.c1, self.c2]))
+        self.assertEquals(set(contexts), set([self.c1, self.c2]))
+        (triple, contexts), = self.store.triples((None, self.p, None), self.f)
+        self.assertEquals(list(contexts), [])
+
+    def testRemoveContext(self):
+        for i in range(10):
+            self.c1.add((BNode(), self.p, Literal(i)))
+        self.c2.add((BNode(), self.p, Literal(0)))
+        self.assertEquals(len(self.graph), 11)
+        self.graph.remove_context(self.c1)
+        self.assertEquals(len(self.c1), 0)
+        self.assertEquals(len(self.graph), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
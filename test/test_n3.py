@@ -62,6 +62,7 @@ n3:context      a rdf:Property; rdfs:domain n3:statement;
 import unittest
 
 from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.plugins.parsers.notation3 import SinkParser, scanStatements
 
 
 class TestN3Case(unittest.TestCase):
@@ -185,5 +186,45 @@ class TestN3Quoting(unittest.TestCase):
             self.assertEqual(l, Literal(case))
 
 
+chunk_data = """@prefix : <http://example.org/> .
+@prefix x: <http://example.org/x. y#>. # a comment . with dots
+:a :b "short . string", \"\"\"long . "string"
+. with lines\"\"\" ; :c 1. :d :e 2.5 .
+:f :g x:h. :i :j "x\\". :k" .
+{ :l :m :n . :o :p :q } <= { :r :s :t . } .
+"""
+
+class TestN3Chunks(unittest.TestCase):
+
+    def setUp(self):
+        self.chunkSize = SinkParser.chunkSize
+
+    def tearDown(self):
+        SinkParser.chunkSize = self.chunkSize
+
+    def testScanStatements(self):
+        ends = []
+        i, depth = 0, 0
+        for n in range(len(chunk_data) + 1):
+            end, i, depth = scanStatements(chunk_data[:n], i, depth)
+            if end and end not in ends:
+                ends.append(end)
+        self.assertEquals([chunk_data[end - 2:end] for end in ends],
+                          [" .", ">.", "1.", " .", "h.", " .", " ."])
+        self.assertEquals(depth, 0)
+
+    def testChunkedParse(self):
+        g = ConjunctiveGraph()
+        g.parse(data=chunk_data, format="n3")
+        for chunkSize in (1, 7):
+            SinkParser.chunkSize = chunkSize
+            g2 = ConjunctiveGraph()
+            g2.parse(data=chunk_data, format="n3")
+            self.assertEquals(len(g2), len(g))
+            self.assertEquals(set(t for t in g2 if not isinstance(t[0], Graph)),
+                              set(t for t in g if not isinstance(t[0], Graph)))
+            self.assertEquals(len(list(g2.contexts())), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from StringIO import StringIO
+
+from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.plugins.parsers.ntriples import ParseError
+
+
+class NQuadsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.label = URIRef('predicate:label')
+        self.g = ConjunctiveGraph()
+        g1 = Graph(self.g.store, URIRef('store:1'))
+        g1.add((URIRef('resource:1'), self.label,
+                Literal("label 1\n", lang="en")))
+        g1.add((URIRef('resource:1'), self.label,
+                Literal('"label" 2')))
+        g1.add((BNode('b1'), self.label, Literal(u"R\u00E4ksm\u00F6rg\u00E5s")))
+        g2 = Graph(self.g.store, BNode('g2'))
+        g2.add((URIRef('resource:2'), self.label, BNode('b1')))
+        g2.add((URIRef('resource:2'), self.label,
+                Literal("3", datatype=URIRef('type:int'))))
+
+    def quads(self, g):
+        return set((s, p, o, c.identifier) for s, p, o, c
+                   in g.quads((None, None, None)))
+
+    def testRoundTrip(self):
+        data = self.g.serialize(format='nquads')
+        self.assertEquals(len(data.strip().split("\n")), 5)
+        g = ConjunctiveGraph()
+        g.parse(StringIO(data), format='nquads')
+        self.assertEquals(self.quads(g), self.quads(self.g))
+
+    def testDefaultGraph(self):
+        data = ("<resource:1> <predicate:label> \"x\" .\n"
+                "<resource:1> <predicate:label> \"y\" <store:1> .\n"
+                "# comment\n\n"
+                "_:a <predicate:label> _:b _:c .\n")
+        g = ConjunctiveGraph()
+        context = g.parse(data=data, format='nquads', batch_size=1)
+        self.assertEquals(list(context), [(URIRef('resource:1'), self.label,
+                                           Literal("x"))])
+        self.assertEquals(len(g), 3)
+        self.assertEquals(
+            len(Graph(g.store, URIRef('store:1'))), 1)
+        self.assertEquals(list(Graph(g.store, BNode('c'))),
+                          [(BNode('a'), self.label, BNode('b'))])
+
+    def testSerializeGraph(self):
+        g = Graph(identifier=URIRef('store:3'))
+        g.add((URIRef('resource:1'), self.label, Literal("x")))
+        self.assertEquals(g.serialize(format='nquads').strip(),
+            '<resource:1> <predicate:label> "x" <store:3> .')
+
+    def testErrors(self):
+        g = ConjunctiveGraph()
+        self.assertRaises(ParseError, g.parse, format='nquads',
+                          data="<resource:1> <predicate:label> .\n")
+        self.assertRaises(ParseError, g.parse, format='nquads',
+                          data="<a:1> <a:2> <a:3> \"g\" .\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
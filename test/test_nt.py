@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from rdflib import Graph, Literal, URIRef
+from rdflib.store import InternCache
+from rdflib.plugins.parsers.ntriples import NTriplesParser, \
+     ChunkedNTriplesParser, ParallelNTriplesParser, ParseError, byte_ranges
 
 
 class NTTestCase(unittest.TestCase):
@@ -18,6 +24,168 @@ class NTTestCase(unittest.TestCase):
         s = g.serialize(format="nt").strip()
         self.assertEqual(s, '<foo> <foo> "test\\n"@en .')
 
+    def testEscaping(self):
+        g = Graph()
+        values = [u'say "hi"\nthen\t\\ leave\r', u'"""', u'\U0001D11E\x01',
+                  u'a\nb"']
+        for i, value in enumerate(values):
+            g.add((URIRef("http://example.org/s"),
+                   URIRef("http://example.org/p%d" % i), Literal(value)))
+        s = g.serialize(format="nt")
+        self.assertTrue('"say \\"hi\\"\\nthen\\t\\\\ leave\\r"' in s)
+        self.assertTrue('"\\U0001D11E\\u0001"' in s)
+        g2 = Graph()
+        g2.parse(data=s, format="nt")
+        self.assertEquals(set(g2), set(g))
+
+    def testIRIEscaping(self):
+        g = Graph()
+        g.add((URIRef(u"http://example.org/caf\u00e9"),
+               URIRef(u"http://example.org/p"),
+               URIRef(u"http://example.org/caf\u00e9")))
+        g.add((URIRef(u"http://example.org/s"), URIRef(u"http://example.org/p"),
+               Literal(u"x", datatype=URIRef(u"http://example.org/t\u00e9"))))
+        s = g.serialize(format="nt")
+        # object and datatype IRIs are escaped, as they always have been
+        self.assert_(u'<http://example.org/caf\u00e9> <http://example.org/p> '
+                     u'<http://example.org/caf\\u00E9> .'.encode("utf-8")
+                     in s, s)
+        self.assert_('"x"^^<http://example.org/t\\u00E9>' in s, s)
+
+    def testSorted(self):
+        g = Graph()
+        for i in (3, 1, 2):
+            g.add((URIRef("s%d" % i), URIRef("p"), Literal(i)))
+        lines = g.serialize(format="nt", sort=True).strip().split("\n")
+        self.assertEquals(lines, sorted(lines))
+        self.assertEquals(len(lines), 3)
+
+
+class ListSink(object):
+    def __init__(self):
+        self.batches = []
+        self.list = []
+
+    def triple(self, s, p, o):
+        self.list.append((s, p, o))
+
+    def triples(self, triples):
+        self.batches.append(len(triples))
+        self.list.extend(triples)
+
+
+class ChunkedNTriplesParserTestCase(unittest.TestCase):
+
+    def parse(self, data, chunk_size=13, batch_size=7):
+        parser = ChunkedNTriplesParser(ListSink(), batch_size=batch_size)
+        parser.chunk_size = chunk_size
+        parser.parsestring(data)
+        return parser.sink
+
+    def testSameAsNTriplesParser(self):
+        paths = []
+        for directory, dirs, files in os.walk("test"):
+            paths += [os.path.join(directory, f) for f in files
+                      if f.endswith(".nt")]
+        self.assert_(paths)
+        for path in paths:
+            data = open(path, "rb").read()
+            expected = ListSink()
+            NTriplesParser(expected).parsestring(data)
+            self.assertEquals(self.parse(data).list, expected.list, path)
+
+    def testBatches(self):
+        data = "".join(["<http://example.org/s> <http://example.org/p> "
+                        "\"%d\" .\r\n" % i for i in range(20)])
+        sink = self.parse(data)
+        self.assertEquals(sink.batches, [7, 7, 6])
+        self.assertEquals([o for s, p, o in sink.list],
+                          [Literal(u"%d" % i) for i in range(20)])
+        # IRIs are interned
+        self.assert_(sink.list[0][0] is sink.list[19][0])
+
+    def testInternSize(self):
+        data = "".join(["<http://example.org/s%d> <http://example.org/p> "
+                        "_:b%d .\n" % (i, i) for i in range(20)])
+        parser = ChunkedNTriplesParser(ListSink())
+        parser.uris, parser.bnodes = InternCache(5), InternCache(5)
+        parser.parsestring(data)
+        self.assertEquals(len(parser.sink.list), 20)
+        self.assert_(0 < len(parser.uris) <= 5)
+        self.assert_(0 < len(parser.bnodes) <= 5)
+
+    def testErrors(self):
+        self.assertRaises(ParseError, self.parse,
+                          "<http://example.org/s> <http://example.org/p> .\n")
+        self.assertRaises(ParseError, self.parse,
+                          "_:a <http://example.org/p> _:b .")
+
+    def testGraphParse(self):
+        data = "_:a <http://example.org/p> \"x\"@en .\n# comment\n\n"
+        g = Graph()
+        g.parse(data=data, format="nt", batch_size=1)
+        self.assertEquals(list(g.objects()), [Literal(u"x", lang="en")])
+
+
+class ParallelNTriplesParserTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "test.nt")
+        lines = []
+        for i in range(100):
+            lines.append("_:b%d <http://example.org/p> \"%d\" .\n" % (i % 7, i))
+            lines.append("<http://example.org/s%d> <http://example.org/q> "
+                         "_:b%d .\r\n" % (i, i % 7))
+        self.data = "".join(lines)
+        f = open(self.path, "wb")
+        f.write(self.data)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def testByteRanges(self):
+        f = open(self.path, "rb")
+        ranges = byte_ranges(f, 9)
+        f.close()
+        self.assertEquals(len(ranges), 9)
+        self.assertEquals(ranges[0][0], 0)
+        self.assertEquals(ranges[-1][1], len(self.data))
+        for (start, end), (next, _) in zip(ranges, ranges[1:]):
+            self.assertEquals(end, next)
+            self.assert_(self.data[end - 1] in "\r\n")
+
+    def testSameAsChunkedParser(self):
+        expected = ListSink()
+        ChunkedNTriplesParser(expected).parsestring(self.data)
+        parser = ParallelNTriplesParser(ListSink(), batch_size=50, workers=3)
+        parser.range_size = 1000
+        sink = parser.parse(open(self.path, "rb"))
+        # the triples arrive in document order, so node IDs in different
+        # ranges name the same BNodes
+        self.assertEquals(sink.list, expected.list)
+        self.assertEquals(sink.batches, [50, 50, 50, 50])
+
+    def testErrors(self):
+        f = open(self.path, "ab")
+        f.write("_:a <http://example.org/p> .\n")
+        f.close()
+        parser = ParallelNTriplesParser(ListSink(), workers=2)
+        self.assertRaises(ParseError, parser.parse, open(self.path, "rb"))
+
+    def testGraphParse(self):
+        serial = Graph()
+        serial.parse(self.path, format="nt")
+        g = Graph()
+        g.parse(self.path, format="nt", workers=2)
+        self.assertEquals(len(g), 200)
+        self.assertEquals(set(g), set(serial))
+        # data that is not in a file is parsed serially
+        g = Graph()
+        g.parse(data=self.data, format="nt", workers=2)
+        self.assertEquals(set(g), set(serial))
+
 
 if __name__ == "__main__":
     unittest.main()
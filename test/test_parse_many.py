@@ -0,0 +1,110 @@
+import os
+import shutil
+import unittest
+import threading
+from tempfile import mkdtemp
+from StringIO import StringIO
+
+from rdflib.graph import ConjunctiveGraph
+from rdflib import plugin
+from rdflib.parser import Parser
+from rdflib.term import URIRef, Literal
+from rdflib.plugins.parsers.ntriples import ParseError
+
+
+class ParseManyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = mkdtemp()
+        self.files = []
+        for i in range(5):
+            name = os.path.join(self.dir, "doc%d.nt" % i)
+            f = open(name, "w")
+            for j in range(i + 1):
+                f.write('<http://example.org/%d> <http://example.org/p> '
+                        '"%d" .\n' % (i, j))
+            f.close()
+            self.files.append(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testParseMany(self):
+        g = ConjunctiveGraph()
+        results = g.parse_many(self.files, format="nt", workers=3)
+        self.assertEquals([source for source, context, error in results],
+                          self.files)
+        for i, (source, context, error) in enumerate(results):
+            self.assertEquals(error, None)
+            self.assertEquals(len(context), i + 1)
+            self.assert_(context.identifier.endswith("doc%d.nt" % i))
+        self.assertEquals(len(g), 15)
+        self.assertEquals(len(list(g.contexts())), 5)
+
+        # parsing again replaces the contexts' content
+        g.parse_many(self.files[:2], format="nt")
+        self.assertEquals(len(g), 15)
+
+    def testErrors(self):
+        g = ConjunctiveGraph()
+        missing = os.path.join(self.dir, "missing.nt")
+        broken = StringIO("<http://example.org/a> .\n")
+        sources = [self.files[0], missing, broken, self.files[1]]
+        results = g.parse_many(sources, format="nt", workers=2)
+        self.assertEquals(len(results), 4)
+        self.assertEquals(results[1][1], None)
+        self.assert_(isinstance(results[1][2], IOError))
+        self.assertEquals(results[2][1], None)
+        self.assert_(isinstance(results[2][2], ParseError))
+        self.assertEquals([len(results[i][1]) for i in (0, 3)], [1, 2])
+        self.assertEquals(len(g), 3)
+        self.assert_((URIRef("http://example.org/1"),
+                      URIRef("http://example.org/p"), Literal("1")) in g)
+
+    def testNamedGraphs(self):
+        nquads = os.path.join(self.dir, "quads.nq")
+        f = open(nquads, "w")
+        f.write('<http://example.org/a> <http://example.org/p> "x" '
+                '<http://example.org/g> .\n')
+        f.close()
+        g = ConjunctiveGraph()
+        results = g.parse_many(["test/trix/aperture.trix"], format="trix")
+        self.assertEquals(results[0][2], None)
+        self.assertEquals(len(g), 21)
+        results = g.parse_many([nquads], format="nquads")
+        self.assertEquals(results[0][2], None)
+        self.assertEquals(len(g.get_context(URIRef("http://example.org/g"))),
+                          1)
+        self.assertEquals(len(g), 22)
+
+    def testWorkers(self):
+        self.assertRaises(ValueError, ConjunctiveGraph().parse_many,
+                          self.files, format="nt", workers=0)
+
+    def testWorkerExit(self):
+        plugin.register("exit", Parser, "test.test_parse_many", "ExitParser")
+        results = ConjunctiveGraph().parse_many(self.files[:2], format="exit",
+                                                workers=1)
+        self.assert_(isinstance(results[0][2], SystemExit))
+        self.assert_(isinstance(results[1][2], SystemExit))
+
+    def testStoreError(self):
+        g = ConjunctiveGraph()
+        def addN(quads):
+            raise ValueError("full")
+        g.store.addN = addN
+        threads = threading.activeCount()
+        self.assertRaises(ValueError, g.parse_many, self.files, format="nt",
+                          workers=2)
+        # the workers were stopped
+        self.assertEquals(threading.activeCount(), threads)
+
+
+class ExitParser(Parser):
+
+    def parse(self, source, sink, **args):
+        raise SystemExit()
+
+
+if __name__ == "__main__":
+    unittest.main()
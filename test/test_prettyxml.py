@@ -1,7 +1,8 @@
 from rdflib.term import  URIRef, BNode
 from rdflib.namespace import RDFS
 
-from rdflib.plugins.serializers.rdfxml import PrettyXMLSerializer
+from rdflib.plugins.serializers.rdfxml import PrettyXMLSerializer, \
+     StreamingXMLSerializer
 
 from rdflib.graph import ConjunctiveGraph
 from StringIO import StringIO
@@ -129,6 +130,36 @@ class TestPrettyXmlSerializer(SerializerTestBase):
                 [URIRef, BNode])
 
 
+
+class TestStreamingXmlSerializer(SerializerTestBase):
+
+    serializer = StreamingXMLSerializer
+    testContent = TestPrettyXmlSerializer.testContent
+    testContentFormat = 'n3'
+
+    def test_result_fragments(self):
+        rdfXml = serialize(self.sourceGraph, self.serializer)
+        assert '<rdf:Description rdf:about="http://example.org/data/b">' in rdfXml
+        assert '<name xml:lang="en">Bee</name>' in rdfXml
+        assert '<rdfs:seeAlso rdf:nodeID="' in rdfXml
+        assert '<rdf:type rdf:resource="http://example.org/model/test#Test"/>' in rdfXml
+
+    def test_namespaces_not_bound(self):
+        self.sourceGraph.add((URIRef("http://example.org/data/a"),
+                              URIRef("http://example.org/other#p"),
+                              URIRef("http://example.org/data/b")))
+        before = sorted(self.sourceGraph.namespaces())
+        rdfXml = serialize(self.sourceGraph, self.serializer)
+        assert sorted(self.sourceGraph.namespaces()) == before
+        assert 'xmlns:ns1="http://example.org/other#"' in rdfXml
+        assert '<ns1:p rdf:resource="http://example.org/data/b"/>' in rdfXml
+
+    def test_streaming_option(self):
+        for format in ("xml", "pretty-xml"):
+            rdfXml = self.sourceGraph.serialize(format=format, streaming=True)
+            assert rdfXml == serialize(self.sourceGraph, self.serializer)
+
+
 def _assert_expected_object_types_for_predicates(graph, predicates, types):
     for s, p, o in graph:
         if p in predicates:
@@ -0,0 +1,65 @@
+import unittest
+from StringIO import StringIO
+
+from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.namespace import Namespace, RDF
+from rdflib.term import URIRef, Literal
+from rdflib.exceptions import ParserError
+
+
+EX = Namespace("http://example.org/")
+
+test_data = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:ex="http://example.org/">
+  <rdf:Description rdf:about="a" xml:base="http://example.org/one/">
+    <ex:p rdf:resource="b"/>
+  </rdf:Description>
+  <rdf:Description rdf:about="a" xml:base="http://example.org/two/">
+    <ex:p rdf:resource="b"/>
+  </rdf:Description>
+  <rdf:Seq rdf:about="http://example.org/s1">
+    <rdf:li>x</rdf:li>
+    <rdf:li>y</rdf:li>
+  </rdf:Seq>
+  <rdf:Seq rdf:about="http://example.org/s2">
+    <rdf:li>z</rdf:li>
+  </rdf:Seq>
+</rdf:RDF>
+"""
+
+
+class RDFXMLParserTestCase(unittest.TestCase):
+
+    def testBases(self):
+        g = Graph()
+        g.parse(StringIO(test_data), format="xml")
+        self.assertEquals(len(g), 7)
+        self.assert_((URIRef("http://example.org/one/a"), EX.p,
+                      URIRef("http://example.org/one/b")) in g)
+        self.assert_((URIRef("http://example.org/two/a"), EX.p,
+                      URIRef("http://example.org/two/b")) in g)
+
+    def testHandlerReuse(self):
+        g = Graph()
+        g.parse(StringIO(test_data), format="xml")
+        self.assertEquals(g.value(EX.s1, RDF[2]), Literal("y"))
+        self.assertEquals(g.value(EX.s2, RDF[1]), Literal("z"))
+        self.assertEquals(g.value(EX.s2, RDF[2]), None)
+
+    def testBatchSize(self):
+        g = ConjunctiveGraph()
+        context = g.parse(StringIO(test_data), format="xml", batch_size=1)
+        self.assertEquals(len(context), 7)
+        self.assertEquals(len(g), 7)
+
+    def testErrorKeepsTriples(self):
+        data = test_data.replace("</rdf:RDF>",
+            '<rdf:Description rdf:ID="1x"/></rdf:RDF>')
+        g = Graph()
+        self.assertRaises(ParserError, g.parse, StringIO(data), format="xml")
+        self.assertEquals(len(g), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import gzip
+import shutil
+import unittest
+from tempfile import mkdtemp
+
+from rdflib import plugin
+from rdflib.graph import ConjunctiveGraph, Graph
+from rdflib.serializer import Serializer
+from rdflib.term import URIRef, Literal
+
+
+class SerializeContextsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = mkdtemp()
+        self.graph = ConjunctiveGraph()
+        self.identifiers = []
+        for i in range(5):
+            identifier = URIRef("http://example.org/graphs/%d?x=1" % i)
+            context = Graph(self.graph.store, identifier)
+            for j in range(i + 1):
+                context.add((URIRef("http://example.org/%d" % i),
+                             URIRef("http://example.org/p"), Literal(j)))
+            self.identifiers.append(identifier)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testSerializeContexts(self):
+        results = self.graph.serialize_contexts(self.dir, format="nt",
+                                                workers=3, sort=True)
+        self.assertEquals([identifier for identifier, path, seconds, error
+                           in results], self.identifiers)
+        for i, (identifier, path, seconds, error) in enumerate(results):
+            self.assertEquals(error, None)
+            self.assert_(seconds >= 0)
+            self.assertEquals(os.path.dirname(path), self.dir)
+            self.assert_(path.endswith(".nt"))
+            g = Graph()
+            g.parse(open(path, "rb"), format="nt")
+            self.assertEquals(set(g), set(self.graph.get_context(identifier)))
+        # only the files are left, under the same names every time
+        names = sorted(os.listdir(self.dir))
+        self.assertEquals(len(names), 5)
+        contents = [open(os.path.join(self.dir, name)).read()
+                    for name in names]
+        self.graph.serialize_contexts(self.dir, format="nt", sort=True)
+        self.assertEquals(sorted(os.listdir(self.dir)), names)
+        self.assertEquals([open(os.path.join(self.dir, name)).read()
+                           for name in names], contents)
+
+    def testProcesses(self):
+        threads = self.graph.serialize_contexts(self.dir, format="nt",
+                                                sort=True)
+        contents = [open(path).read() for identifier, path, seconds, error
+                    in threads]
+        processes = self.graph.serialize_contexts(self.dir, format="nt",
+                                                  workers=2, processes=True,
+                                                  sort=True)
+        self.assertEquals([(identifier, path, error) for identifier, path,
+                           seconds, error in processes],
+                          [(identifier, path, error) for identifier, path,
+                           seconds, error in threads])
+        self.assertEquals([open(path).read() for identifier, path, seconds,
+                           error in processes], contents)
+
+    def testProcessExit(self):
+        # worker processes that die leave the call with an error rather
+        # than waiting for their results
+        plugin.register("exit", Serializer, "test.test_serialize_contexts",
+                        "ExitSerializer")
+        self.assertRaises(RuntimeError, self.graph.serialize_contexts,
+                          self.dir, format="exit", suffix=".x", workers=2,
+                          processes=True)
+
+    def testCompressed(self):
+        results = self.graph.serialize_contexts(self.dir, format="xml",
+                                                suffix=".rdf.gz")
+        identifier, path, seconds, error = results[-1]
+        self.assertEquals(error, None)
+        g = Graph()
+        g.parse(data=gzip.open(path).read(), format="xml")
+        self.assertEquals(len(g), 5)
+
+    def testWorkers(self):
+        for processes in (False, True):
+            self.assertRaises(ValueError, self.graph.serialize_contexts,
+                              self.dir, format="nt", workers=0,
+                              processes=processes)
+        self.assertEquals(os.listdir(self.dir), [])
+
+    def testMode(self):
+        # files get the mode open() gives, not mkstemp's
+        name = os.path.join(self.dir, "plain")
+        open(name, "w").close()
+        mode = os.stat(name).st_mode & 0777
+        os.remove(name)
+        results = self.graph.serialize_contexts(self.dir, format="nt",
+                                                workers=3)
+        for identifier, path, seconds, error in results:
+            self.assertEquals(os.stat(path).st_mode & 0777, mode)
+
+    def testErrors(self):
+        # RDF/XML cannot write a predicate ending in "/"
+        identifier = self.identifiers[2]
+        self.graph.get_context(identifier).add(
+            (URIRef("http://example.org/s"), URIRef("http://example.org/p/"),
+             Literal("x")))
+        results = self.graph.serialize_contexts(self.dir, format="xml")
+        self.assertEquals(len(results), 5)
+        for result in results:
+            if result[0] == identifier:
+                self.assert_(isinstance(result[3], Exception))
+                self.failIf(os.path.exists(result[1]))
+            else:
+                self.assertEquals(result[3], None)
+        # no temporary file is left behind
+        self.assertEquals(len(os.listdir(self.dir)), 4)
+
+
+class ExitSerializer(Serializer):
+
+    def serialize(self, stream, **args):
+        raise SystemExit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,12 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+import unittest
+from tempfile import mkdtemp
+
+from rdflib.graph import ConjunctiveGraph, Graph
+from rdflib.term import URIRef, Literal
+
 from test import test_graph
 from test import test_context
 
@@ -15,3 +21,239 @@ class SleepycatStoreTestCase(test_context.ContextTestCase):
     store = "Sleepycat"
     non_core = True
     bsddb = True
+
+class SleepycatScanTestCase(unittest.TestCase):
+    non_core = True
+    bsddb = True
+
+    def setUp(self):
+        self.graph = ConjunctiveGraph(store="Sleepycat")
+        self.graph.open(mkdtemp(), create=True)
+        self.graph.store.scan_batch_size = 3
+        self.p = URIRef(u'p')
+        self.context = Graph(self.graph.store, URIRef(u'c'))
+        for i in range(10):
+            self.context.add((URIRef(u's%d' % i), self.p, Literal(i)))
+
+    def tearDown(self):
+        self.graph.close()
+
+    def testTriples(self):
+        triples = list(self.graph.store.triples((None, self.p, None)))
+        self.assertEquals(len(triples), 10)
+        for triple, contexts in triples:
+            self.assertEquals(list(contexts), [self.context])
+
+    def testRemoveWhileIterating(self):
+        for triple in self.context.triples((None, self.p, None)):
+            self.context.remove(triple)
+        self.assertEquals(len(self.context), 0)
+
+class SleepycatTermCacheTestCase(unittest.TestCase):
+    non_core = True
+    bsddb = True
+
+    def setUp(self):
+        self.graph = ConjunctiveGraph(store="Sleepycat")
+        self.graph.open(mkdtemp(), create=True)
+
+    def tearDown(self):
+        self.graph.close()
+
+    def testLiteralsEqualByValue(self):
+        p = URIRef(u'p')
+        self.graph.add((p, p, Literal(1)))
+        self.graph.add((p, p, Literal(1.0)))
+        self.assertEquals(
+            set(o.datatype for o in self.graph.objects(p, p)),
+            set([Literal(1).datatype, Literal(1.0).datatype]))
+
+    def testHits(self):
+        p = URIRef(u'p')
+        for i in range(10):
+            self.graph.add((p, p, Literal(i)))
+        stats = self.graph.store.term_cache_stats()
+        self.assert_(stats["term_ids"]["hits"] > 0)
+        self.assertEquals(len(list(self.graph.objects(p, p))), 10)
+
+    def testLRUCache(self):
+        from rdflib.plugins.sleepycat import LRUCache
+        cache = LRUCache(2)
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEquals(cache.get(1), 'a')
+        cache.put(3, 'c')
+        self.assert_(2 not in cache)
+        self.assertEquals(cache.get(2), None)
+        self.assertEquals((cache.hits, cache.misses), (1, 1))
+        self.assertEquals(len(cache), 2)
+
+class SleepycatBinaryGraphTestCase(test_graph.GraphTestCase):
+    non_core = True
+    bsddb = True
+
+    def setUp(self):
+        from rdflib.plugins.sleepycat import Sleepycat
+        self.store_name = Sleepycat()
+        self.store_name.term_encoding = "binary"
+        test_graph.GraphTestCase.setUp(self)
+
+class SleepycatBinaryStoreTestCase(test_context.ContextTestCase):
+    non_core = True
+    bsddb = True
+
+    def setUp(self):
+        from rdflib.plugins.sleepycat import Sleepycat
+        self.store = Sleepycat()
+        self.store.term_encoding = "binary"
+        test_context.ContextTestCase.setUp(self)
+
+class SleepycatMigrateTestCase(unittest.TestCase):
+    non_core = True
+    bsddb = True
+
+    def testMigrate(self):
+        from rdflib.plugins.sleepycat import migrate
+        from rdflib.term import BNode
+        source, destination = mkdtemp(), mkdtemp()
+        graph = ConjunctiveGraph(store="Sleepycat")
+        graph.open(source, create=True)
+        self.assertEquals(graph.store.term_encoding, "pickle")
+        graph.bind("ex", URIRef(u'http://example.org/'))
+        c1 = Graph(graph.store, URIRef(u'c1'))
+        c2 = Graph(graph.store, BNode())
+        s, p = URIRef(u'http://example.org/s'), URIRef(u'p')
+        c1.add((s, p, Literal(u'caf\xe9', lang=u'fr')))
+        c1.add((s, p, Literal(1)))
+        c2.add((s, p, Literal(1.0)))
+        c2.add((BNode(), p, s))
+        quads = set((q[:3], q[3].identifier) for q in graph.quads((None, None, None)))
+        graph.close()
+
+        migrate(source, destination)
+
+        graph = ConjunctiveGraph(store="Sleepycat")
+        graph.open(destination, create=False)
+        self.assertEquals(graph.store.term_encoding, "binary")
+        self.assertEquals(quads, set(
+            (q[:3], q[3].identifier) for q in graph.quads((None, None, None))))
+        self.assertEquals(
+            set(o.datatype for o in graph.objects(s, p) if o.language is None),
+            set([Literal(1).datatype, Literal(1.0).datatype]))
+        self.assertEquals(graph.store.namespace("ex"), u'http://example.org/')
+        graph.close()
+
+class SleepycatTransactionTestCase(unittest.TestCase):
+    non_core = True
+    bsddb = True
+
+    def setUp(self):
+        from rdflib.plugins.sleepycat import Sleepycat
+        store = Sleepycat()
+        store.transaction_aware = True
+        store.group_commit_size = None
+        store.group_commit_delay = None
+        self.path = mkdtemp()
+        self.graph = ConjunctiveGraph(store)
+        self.graph.open(self.path, create=True)
+        self.p = URIRef(u'p')
+        self.context = Graph(store, URIRef(u'c'))
+
+    def tearDown(self):
+        self.graph.close()
+
+    def triple(self, i):
+        return (URIRef(u's%d' % i), self.p, Literal(i))
+
+    def testRollback(self):
+        self.context.add(self.triple(0))
+        self.graph.commit()
+        self.context.add(self.triple(1))
+        self.context.remove(self.triple(0))
+        self.assertEquals(len(self.graph), 1)
+        self.graph.rollback()
+        self.assertEquals(set(self.graph), set([self.triple(0)]))
+        # ids assigned in the aborted transaction are reassigned
+        self.context.add(self.triple(2))
+        self.assertEquals(set(self.graph),
+                          set([self.triple(0), self.triple(2)]))
+
+    def testGroupCommit(self):
+        self.graph.store.group_commit_size = 2
+        for i in range(3):
+            self.context.add(self.triple(i))
+        self.graph.rollback()
+        self.assertEquals(set(self.graph),
+                          set([self.triple(0), self.triple(1)]))
+
+    def testGroupCommitDelay(self):
+        import time
+        self.graph.store.group_commit_delay = 0.2
+        self.context.add(self.triple(0))
+        time.sleep(0.5)
+        self.graph.rollback()
+        self.assertEquals(set(self.graph), set([self.triple(0)]))
+
+    def testClose(self):
+        self.context.add(self.triple(0))
+        self.graph.close(commit_pending_transaction=True)
+        from rdflib.plugins.sleepycat import Sleepycat
+        store = Sleepycat()
+        store.transaction_aware = True
+        self.graph = ConjunctiveGraph(store)
+        self.graph.open(self.path, create=False)
+        self.assertEquals(set(self.graph), set([self.triple(0)]))
+
+class SleepycatConfigurationTestCase(unittest.TestCase):
+    non_core = True
+    bsddb = True
+
+    def testQueryString(self):
+        graph = ConjunctiveGraph(store="Sleepycat")
+        graph.open(mkdtemp() + "?cache_size=8M&spo_page_size=16K&scan_batch_size=7",
+                   create=True)
+        graph.add((URIRef(u's'), URIRef(u'p'), Literal(1)))
+        stats = graph.store.stats()
+        graph.close()
+        self.assertEquals(stats["settings"]["cache_size"], 8*1024*1024)
+        self.assertEquals(stats["settings"]["scan_batch_size"], 7)
+        self.assertEquals(stats["databases"]["spo"]["page_size"], 16*1024)
+        self.assert_(stats["cache"]["size"] >= 8*1024*1024)
+        self.assert_("term_ids" in stats["term_cache"])
+
+    def testDict(self):
+        graph = ConjunctiveGraph(store="Sleepycat")
+        graph.open({"path": mkdtemp(), "term_encoding": "binary",
+                    "group_commit_size": "none"}, create=True)
+        self.assertEquals(graph.store.term_encoding, "binary")
+        self.assertEquals(graph.store.group_commit_size, None)
+        graph.close()
+
+    def testUnknownSetting(self):
+        graph = ConjunctiveGraph(store="Sleepycat")
+        self.assertRaises(ValueError, graph.open,
+                          mkdtemp() + "?cache=1G", create=True)
+
+    def testMissingValue(self):
+        from rdflib.plugins.sleepycat import parse_configuration
+        try:
+            parse_configuration("/tmp/db?cache_size=1M&transaction_aware")
+        except ValueError, e:
+            self.assert_("transaction_aware" in str(e), e)
+        else:
+            self.fail("ValueError not raised")
+
+from test import test_count
+
+class SleepycatCountTestCase(test_count.CountTestCase):
+    store = "Sleepycat"
+    non_core = True
+    bsddb = True
+
+    def open(self):
+        self.graph.open(mkdtemp(), create=True)
+
+class SleepycatBinaryCountTestCase(SleepycatCountTestCase):
+
+    def open(self):
+        self.graph.open(mkdtemp() + "?term_encoding=binary", create=True)
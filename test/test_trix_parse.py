@@ -2,6 +2,7 @@
 
 
 from rdflib.graph import ConjunctiveGraph
+from rdflib.term import BNode
 import unittest
 
 class TestTrixParse(unittest.TestCase):
@@ -34,6 +35,25 @@ class TestTrixParse(unittest.TestCase):
         g.parse("test/trix/nokia_example.trix",format="trix")
         
         #print "Parsed %d triples"%len(g)
+
+    def testStreaming(self):
+
+        def quads(g):
+            # anonymous graphs get new blank node names each time
+            return set((s, p, o, c.identifier) for s, p, o, c
+                       in g.quads((None, None, None))
+                       if not isinstance(c.identifier, BNode))
+
+        for f in ("test/trix/aperture.trix", "test/trix/nokia_example.trix"):
+            g1=ConjunctiveGraph()
+            g1.parse(f, format="trix", streaming=False,
+                     preserve_bnode_ids=True)
+            g2=ConjunctiveGraph()
+            g2.parse(f, format="trix", batch_size=1,
+                     preserve_bnode_ids=True)
+            self.assertEquals(quads(g2), quads(g1))
+            self.assertEquals(sorted(map(len, g2.contexts())),
+                              sorted(map(len, g1.contexts())))
         
 
 
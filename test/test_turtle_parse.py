@@ -0,0 +1,117 @@
+import unittest
+
+from rdflib.graph import Graph
+from rdflib.namespace import Namespace, RDF
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.exceptions import ParserError
+from rdflib.plugins.memory import Memory
+from rdflib.plugins.parsers.turtle import TurtleReader
+from rdflib.plugins.parsers.notation3 import BadSyntax, SinkParser
+
+
+EX = Namespace("http://example.org/")
+
+turtle_data = """@prefix : <http://example.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@base <http://example.org/base/> .
+
+# comment . with a dot
+:a :b "short . string", \"\"\"long "string"
+. with lines\"\"\" ; :c 1. :d :e 2.50, -1.5e3, true .
+<rel> a :C ; :f "x"@en-us, "1"^^xsd:int, "tab\\t\\u00e9" ;.
+_:x :g [ :h :i ], [ ], ( 1 _:x ( ) ) .
+[ :j :k ] :l _:x .
+"""
+
+
+class TurtleParserTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk_size = TurtleReader.chunk_size
+
+    def tearDown(self):
+        TurtleReader.chunk_size = self.chunk_size
+
+    def testSameAsN3(self):
+        g = Graph()
+        g.parse(data=turtle_data, format="n3")
+        for chunk_size in (1, 7, 1 << 16):
+            TurtleReader.chunk_size = chunk_size
+            g2 = Graph()
+            g2.parse(data=turtle_data, format="turtle")
+            self.assertEquals(len(g2), len(g))
+            self.assert_(isomorphic(g2, g))
+        self.assertEquals(g2.value(EX.a, EX.c), Literal(1))
+        self.assert_(Literal(u"tab\t\u00e9") in g2.objects())
+        self.assert_((URIRef("http://example.org/base/rel"), RDF.type, EX.C)
+                     in g2)
+        self.assertEquals(dict(g2.namespaces())["xsd"],
+                          URIRef("http://www.w3.org/2001/XMLSchema#"))
+
+    def testMemoryStore(self):
+        g = Graph(store=Memory())
+        g.parse(data=turtle_data, format="turtle", batch_size=1)
+        self.assertEquals(len(g), 22)
+
+    def testN3Fallback(self):
+        data = """@prefix : <http://example.org/> .
+_:a :p :o .
+{ :x :y :z } => { :x :y :w } .
+_:a :q "r" .
+"""
+        g = Graph()
+        g.parse(data=data, format="turtle")
+        self.assertEquals(len(g), 3)
+        a = g.value(predicate=EX.p, object=EX.o)
+        self.assert_(isinstance(a, BNode))
+        self.assertEquals(g.value(a, EX.q), Literal("r"))
+
+        g = Graph(store=Memory())
+        self.assertRaises(ParserError, g.parse, data=data, format="turtle")
+
+    def testN3FallbackLines(self):
+        data = """@prefix : <http://example.org/> .
+
+:a :p :o .
+{ :x :y :z } => { :x :y :w } .
+:a :q "r" .
+:a :q :r :s .
+"""
+        g = Graph()
+        try:
+            g.parse(data=data, format="turtle")
+        except BadSyntax, e:
+            # BadSyntax counts lines from 0 too
+            self.assertEquals(e.lines + 1, 6)
+        else:
+            self.fail("BadSyntax not raised")
+
+    def testN3FallbackShortReads(self):
+        data = u"""@prefix : <http://example.org/> .
+{ :x :y :z } => { :x :y :w } .
+:a :q "\u00e9\u20ac" .
+:b :q "r" .
+""".encode("utf-8")
+        chunkSize = SinkParser.chunkSize
+        SinkParser.chunkSize = 1
+        # so that the N3 parser reads most of the stream itself
+        TurtleReader.chunk_size = 1
+        try:
+            g = Graph()
+            g.parse(data=data, format="turtle")
+        finally:
+            SinkParser.chunkSize = chunkSize
+        self.assertEquals(g.value(EX.a, EX.q), Literal(u"\u00e9\u20ac"))
+        self.assertEquals(g.value(EX.b, EX.q), Literal("r"))
+
+    def testErrors(self):
+        g = Graph()
+        self.assertRaises(Exception, g.parse, format="turtle",
+                          data="<http://example.org/a> <http://example.org/b> .")
+        self.assertRaises(Exception, g.parse, format="turtle",
+                          data="<http://example.org/a> :b :c .")
+
+
+if __name__ == "__main__":
+    unittest.main()
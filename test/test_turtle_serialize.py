@@ -0,0 +1,67 @@
+import unittest
+
+from rdflib.graph import Graph
+from rdflib.namespace import Namespace, RDF
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.collection import Collection
+
+
+EX = Namespace("http://example.org/")
+
+
+class StreamingTurtleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        g = Graph()
+        g.bind("ex", EX)
+        single, nested, shared = BNode(), BNode(), BNode()
+        g.add((EX.a, EX.p, single))
+        g.add((single, EX.q, Literal("single")))
+        g.add((single, EX.r, nested))
+        g.add((nested, EX.q, Literal(1)))
+        g.add((EX.a, EX.p, shared))
+        g.add((EX.b, EX.p, shared))
+        g.add((shared, EX.q, Literal("shared", lang="en")))
+        cycle1, cycle2 = BNode(), BNode()
+        g.add((cycle1, EX.next, cycle2))
+        g.add((cycle2, EX.next, cycle1))
+        top = BNode()
+        g.add((top, EX.q, Literal("top")))
+        Collection(g, BNode(), [EX.c, Literal("d")])
+        g.add((EX.a, EX.list, list(g.subjects(RDF.first, EX.c))[0]))
+        g.add((URIRef("http://other.example/x"), RDF.type, EX.C))
+        self.graph = g
+
+    def serialize(self):
+        return self.graph.serialize(format="turtle", streaming=True)
+
+    def testRoundTrip(self):
+        data = self.serialize()
+        g = Graph()
+        g.parse(data=data, format="n3")
+        self.assert_(isomorphic(g, self.graph), data)
+
+    def testInlining(self):
+        data = self.serialize()
+        # the singly referenced node and the node it references are
+        # written in brackets, the others are labelled
+        self.assert_('ex:q "single"' in data, data)
+        self.assert_('ex:q 1' in data, data)
+        self.assertEquals(data.count("[ ex:q"), 2, data)
+        for line in data.splitlines():
+            self.failIf(line.startswith("_:") and '"single"' in line, data)
+        self.assertEquals(data.count(" ex:next "), 2, data)
+        # only prefixes already bound are used
+        self.assert_("<http://other.example/x> a ex:C" in data, data)
+
+    def testSameAsDefault(self):
+        g = Graph()
+        g.parse(data=self.graph.serialize(format="turtle"), format="n3")
+        g2 = Graph()
+        g2.parse(data=self.serialize(), format="n3")
+        self.assert_(isomorphic(g, g2))
+
+
+if __name__ == "__main__":
+    unittest.main()
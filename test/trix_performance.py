@@ -0,0 +1,68 @@
+"""
+Compares the streaming TriX handler with the one adding triples a
+graph at a time.
+
+Usage: python test/trix_performance.py [number of triples]
+
+Each handler parses the same generated document in a process of its
+own, so the peak memory reported is that of the parse alone.
+"""
+import os
+import sys
+import resource
+from subprocess import Popen, PIPE
+from tempfile import mkstemp
+from time import time
+
+from rdflib.graph import ConjunctiveGraph
+
+
+def write_document(path, number, graph_size=1000):
+    f = open(path, "w")
+    f.write('<TriX xmlns="http://www.w3.org/2004/03/trix/trix-1/">\n')
+    for i in xrange(number):
+        if i % graph_size == 0:
+            if i:
+                f.write('</graph>\n')
+            f.write('<graph><uri>http://example.org/graph/%d</uri>\n'
+                    % (i / graph_size))
+        f.write('<triple><uri>http://example.org/resource/%d</uri>'
+                '<uri>http://example.org/property/%d</uri>'
+                '<plainLiteral>value %d</plainLiteral></triple>\n'
+                % (i / 10, i % 10, i))
+    if number:
+        f.write('</graph>\n')
+    f.write('</TriX>\n')
+    f.close()
+
+
+def run(path, streaming):
+    g = ConjunctiveGraph()
+    t0 = time()
+    g.parse(path, format="trix", streaming=streaming)
+    t1 = time()
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print len(g), "%.3g" % (t1 - t0), maxrss
+
+
+def main(number):
+    fd, path = mkstemp(suffix=".trix")
+    os.close(fd)
+    try:
+        write_document(path, number)
+        for streaming in (False, True):
+            p = Popen([sys.executable, __file__, "--run", path,
+                       str(int(streaming))], stdout=PIPE)
+            triples, seconds, maxrss = p.communicate()[0].split()
+            print "%s: %s triples in %ss, %d triples/s, peak RSS %skB" % (
+                streaming and "streaming" or "graph at a time",
+                triples, seconds, int(triples) / float(seconds), maxrss)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], bool(int(sys.argv[3])))
+    else:
+        main(int((sys.argv[1:] or [100000])[0]))